@@ -1,5 +1,6 @@
 from math import cos, sin, pi, acos, tan, asin
 from numpy import linspace
+import numpy as np
 
 from math import pi
 import csv
@@ -58,20 +59,69 @@ class SolarDay:
 
     def solar_insolation(self, HRA):
         # gives value in kW/m^2
-        ID = 1.353 * 0.7 ** (self.AM(HRA) ** 0.678)  # Incident radiation
+        AM = self.AM(HRA)
+        if AM <= 0:
+            return 0  # the sun is below the horizon (e.g. rounding at sunrise)
+        ID = 1.353 * 0.7 ** (AM ** 0.678)  # Incident radiation
         elevation = to_rad(90 - self.lat + self.declination_angle())
         IM = ID * sin(to_rad(self.mod_angle) + elevation)
         return IM
 
+    def solar_insolation_array(self, HRA, module_angles=None):
+        # Same as solar_insolation for a np.array of HRAs (one array
+        # expression), the declination is only calculated once per day.
+        # With a np.array of module_angles, gives a (module angle x HRA)
+        # matrix instead (the module angle only scales ID)
+        declination = to_rad(self.declination_angle())
+        latitude = to_rad(self.lat)
+        elevation = np.arcsin(np.sin(declination) * np.sin(latitude)
+                              + np.cos(declination) * np.cos(latitude)
+                              * np.cos(HRA))
+        # No insolation with the sun below the horizon (e.g. rounding at
+        # sunrise), where AM would be -ve
+        sun_is_up = elevation > 0
+        AM = 1 / np.cos((pi / 2) - np.where(sun_is_up, elevation, pi / 2))
+        ID = np.where(sun_is_up, 1.353 * 0.7 ** (AM ** 0.678), 0)  # Incident radiation
+        noon_elevation = to_rad(90 - self.lat + self.declination_angle())
+        if module_angles is not None:
+            module_factors = np.sin(to_rad(np.asarray(module_angles, dtype=float)) + noon_elevation)
+            return np.outer(module_factors, ID)
+        IM = ID * sin(to_rad(self.mod_angle) + noon_elevation)
+        return IM
+
     # HRA is the solar time at the car location
+    # Also works on a np.array of times (time_correction is calculated once)
     def time_to_HRA(self, time):
         LST = time + self.time_correction() / 60
         HRA = to_rad(15) * (LST - 12)
         return HRA
 
-    def energy_received(self):
+    def sunrise_HRA(self):
+        # HRA where the sun's elevation (see AM) is 0, clipped for days
+        # where the sun never sets or never rises
+        cos_HRA = -tan(to_rad(self.lat)) * tan(to_rad(self.declination_angle()))
+        return -acos(min(max(cos_HRA, -1), 1))
+
+    # Sunrise and sunset are local times in hours (the inverse of time_to_HRA)
+    def sunrise(self):
+        return 12 + self.sunrise_HRA() / to_rad(15) - self.time_correction() / 60
+
+    def sunset(self):
+        return 12 - self.sunrise_HRA() / to_rad(15) - self.time_correction() / 60
+
+    def energy_received(self, number_of_points=1000):
+        # Evaluates the whole sunrise-sunset time grid as np.arrays
         points = linspace(self.sunrise(),
-                          self.sunset(), 1000, endpoint=False).tolist()
+                          self.sunset(), number_of_points, endpoint=False)
+        energy = self.solar_insolation_array(self.time_to_HRA(points))
+        self.total_energy = np.trapz(energy, points) * self.cloud
+        return(energy, points)
+
+    def energy_received_reference(self, number_of_points=1000):
+        # Original one point at a time version of energy_received, kept as
+        # a reference for the tests and benchmark
+        points = linspace(self.sunrise(),
+                          self.sunset(), number_of_points, endpoint=False).tolist()
         energy = []
         for i in range(len(points)):
             energy.append(self.solar_insolation(self.time_to_HRA(points[i])))
@@ -79,9 +129,26 @@ class SolarDay:
         return(energy, points)
 
 class SolarArray:
+
+    def __init__(self, day, latitude, longitude, timezone, cloudiness,
+                 filename, efficiency=0.17, cell_scale=5):
+        self.day = day
+        self.lat = latitude
+        self.long = longitude
+        self.time = timezone
+        self.cloud = cloudiness
+        # CSV of the cell layout (header row, then 1 row per cell with
+        # the Cell_ID in column 0 and the module angle in column 4)
+        self.filename = filename
+        # Each cell's integrated insolation is multiplied by
+        # cell_scale * efficiency
+        self.efficiency = efficiency
+        self.cell_scale = cell_scale
+        self._angles = None
+
     def data(self):
         array = []
-        with open(filename, mode='r') as infile:
+        with open(self.filename, mode='r') as infile:
             reader = csv.reader(infile)
             for row in reader:
                 cell = {"Cell_ID": row[0], "Angle": row[4]}
@@ -89,20 +156,65 @@ class SolarArray:
         # print(array)
         return(array)
 
+    def angles(self):
+        # Module angle of every cell, the layout is only parsed once
+        if self._angles is None:
+            self._angles = np.array([float(cell["Angle"]) for cell in self.data()[1:]])
+        return self._angles
+
+    def angle_groups(self):
+        # The distinct module angles and the number of cells at each one
+        return np.unique(self.angles(), return_counts=True)
+
+    def energy_per_angle(self, number_of_points=1000):
+        # Integrated insolation at each distinct module angle, from 1
+        # (module angle x time) matrix over the sunrise-sunset grid
+        angles, counts = self.angle_groups()
+        d = SolarDay(self.day, self.lat, self.long, self.time, self.cloud, 0)
+        points = linspace(d.sunrise(), d.sunset(), number_of_points, endpoint=False)
+        insolation = d.solar_insolation_array(d.time_to_HRA(points), angles)
+        return angles, counts, np.trapz(insolation, points, axis=1)
+
     # calculate and store total energy values
     def totalEnergy(self):
+        angles, counts, insol = self.energy_per_angle()
+        total_energy = np.sum(counts * insol) * self.cell_scale * self.efficiency
+        return(float(total_energy))
+
+    def totalEnergy_reference(self):
+        # Original 1 SolarDay per cell version of totalEnergy, kept as a
+        # reference for the tests and benchmark
         total_energy = 0
         array = self.data()
-        for i in range(1, len(self.data())):
+        for i in range(1, len(array)):
             module_angle = float(array[i]['Angle'])
             d = SolarDay(self.day, self.lat, self.long,
                          self.time, self.cloud, module_angle)
-            insol = integrate(d.energy_received()[1], d.energy_received()[0])
-            energy = insol * 5 * 0.17
+            energy, points = d.energy_received_reference()
+            insol = integrate(points, energy)
+            energy = insol * self.cell_scale * self.efficiency
             total_energy = total_energy + energy
 
         return(total_energy)
 
 if __name__ == '__main__':
-    test = SolarArray(182, 30.28, 97.73, 8, 0.5)
-    print(test.totalEnergy())
+    import tempfile
+    import time
+
+    # Benchmark: a 300 cell layout with 6 distinct module angles
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "cells.csv")
+        with open(filename, mode='w', newline='') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(["Cell_ID", "Row", "Column", "Module", "Angle"])
+            for cell in range(300):
+                writer.writerow([cell, cell // 20, cell % 20, cell // 50, [0, 2, 5, 8, 10, 15][cell // 50]])
+
+        test = SolarArray(182, 30.28, 97.73, 8, 0.5, filename)
+        t0 = time.perf_counter()
+        total_energy = test.totalEnergy()
+        t1 = time.perf_counter()
+        total_energy_reference = test.totalEnergy_reference()
+        t2 = time.perf_counter()
+        print(total_energy, total_energy_reference)
+        print(f"totalEnergy: {t1 - t0:.4f}s, totalEnergy_reference: {t2 - t1:.4f}s")
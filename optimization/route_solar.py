@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+
+
+
+SOLAR_CONSTANT = 1.353 # kW/m^2, same as SolarDay.solar_insolation
+SECONDS_PER_DAY = 86400
+
+
+def year_start_days(days_since_epoch):
+    """
+    year_start_days: the day of the start of the year of each time (the only calendar conversion of to_day_of_year)
+    @param days_since_epoch: np.array of days since 1970-01-01
+    @return: np.array of the days since 1970-01-01 of January 1st of the same year
+    """
+    dates = np.floor(days_since_epoch).astype(np.int64).astype("datetime64[D]")
+    return dates.astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+
+
+def to_timestamps(times):
+    """
+    to_timestamps: converts UTC times to POSIX timestamps
+    @param times: np.array of np.datetime64 UTC times, or of POSIX timestamps (seconds since 1970-01-01 UTC)
+    @return: np.array of POSIX timestamps (float64)
+    """
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = (times - np.datetime64(0, "s")) / np.timedelta64(1, "s")
+    return np.asarray(times, dtype=np.float64)
+
+
+def to_day_of_year(times):
+    """
+    to_day_of_year: converts UTC times to the (fractional) day of the year and the hour of the day
+    - Times in a single year (e.g. a race day, or a sweep over its schedules) only convert the first and last time to a
+        calendar date, which is most of the cost of converting every time
+    @param times: np.array of np.datetime64 UTC times, or of POSIX timestamps (seconds since 1970-01-01 UTC)
+    @return: np.array of the day of the year (1 on January 1st, with the time of day as the fraction)
+    @return: np.array of the UTC hour of the day
+    """
+    days_since_epoch = to_timestamps(times) / SECONDS_PER_DAY
+
+    first_year, last_year = year_start_days([np.min(days_since_epoch), np.max(days_since_epoch)]) if days_since_epoch.size else (0, 0)
+    if first_year == last_year:
+        days = days_since_epoch - first_year
+    else:
+        days = days_since_epoch - year_start_days(days_since_epoch)
+    hours = (days % 1) * 24
+    return days + 1, hours
+
+
+def equation_of_time(days):
+    """
+    equation_of_time: the difference between solar time and mean solar time
+    - https://www.pveducation.org/pvcdrom/properties-of-sunlight/solar-time
+    @param days: np.array of the day of the year
+    @return: np.array of the equation of time (minutes)
+    """
+    B = np.radians(360 / 365 * (np.asarray(days) - 81))
+    return 9.87 * np.sin(2 * B) - 7.53 * np.cos(B) - 1.5 * np.sin(B)
+
+
+def solar_hours(longitudes, days, hours):
+    """
+    solar_hours: converts UTC hours of the day to solar time (12 is solar noon)
+    @param longitudes: np.array of longitudes (degrees, -ve is West)
+    @param days: np.array of the day of the year
+    @param hours: np.array of the UTC hour of the day
+    @return: np.array of the solar hour of the day (not wrapped to 0 to 24)
+    """
+    return hours + np.asarray(longitudes) / 15 + equation_of_time(days) / 60
+
+
+def sun_geometry(days, latitudes, hour_angles):
+    """
+    sun_geometry: calculates the direction of the sun and the direct irradiance from the day, latitude and hour angle
+    - Declination from the same formula as SolarDay.declination_angle, and the direct irradiance from the same air mass
+        model as SolarDay.solar_insolation
+    @param days: np.array of the day of the year
+    @param latitudes: np.array of latitudes (degrees)
+    @param hour_angles: np.array of hour angles (radians, 0 at solar noon)
+    @return: np.array of the up, East and North components of the unit vector towards the sun
+    @return: np.array of the direct irradiance (kW/m^2) normal to the sun, 0 below the horizon
+    """
+    declinations = np.radians(-23.45 * np.cos(np.radians(360 / 365 * (np.asarray(days) + 10))))
+    latitudes = np.radians(latitudes)
+
+    sun_up = np.sin(declinations) * np.sin(latitudes) + np.cos(declinations) * np.cos(latitudes) * np.cos(hour_angles)
+    sun_east = -np.sin(hour_angles) * np.cos(declinations)
+    sun_north = np.cos(latitudes) * np.sin(declinations) - np.sin(latitudes) * np.cos(declinations) * np.cos(hour_angles)
+
+    return sun_up, sun_east, sun_north, direct_irradiance(sun_up)
+
+
+def direct_irradiance(sun_up):
+    """
+    direct_irradiance: the direct irradiance from the air mass, the same model as SolarDay.solar_insolation
+    @param sun_up: np.array of the up component of the unit vector towards the sun (the sine of the elevation)
+    @return: np.array of the direct irradiance (kW/m^2) normal to the sun, 0 below the horizon
+    """
+    sun_is_up = sun_up > 0
+    air_mass = 1 / np.where(sun_is_up, sun_up, 1)
+    return np.where(sun_is_up, SOLAR_CONSTANT * 0.7 ** (air_mass ** 0.678), 0)
+
+
+def sun_vectors(latitudes, longitudes, times):
+    """
+    sun_vectors: sun_geometry at many (position, time) pairs at once. The arrays are broadcast together, so e.g. positions of
+        shape (n,) and times of shape (m, 1) give an (m, n) grid
+    @param latitudes: np.array of latitudes (degrees)
+    @param longitudes: np.array of longitudes (degrees, -ve is West)
+    @param times: np.array of np.datetime64 UTC times or POSIX timestamps (see to_day_of_year)
+    @return: np.array of the up, East and North components of the unit vector towards the sun
+    @return: np.array of the direct irradiance (kW/m^2) normal to the sun, 0 below the horizon
+    """
+    days, hours = to_day_of_year(times)
+    hour_angles = np.radians(15 * (solar_hours(longitudes, days, hours) - 12))
+    return sun_geometry(days, latitudes, hour_angles)
+
+
+def solar_position(latitudes, longitudes, times):
+    """
+    solar_position: calculates the elevation and azimuth of the sun at many (position, time) pairs at once (see sun_vectors)
+    @param latitudes: np.array of latitudes (degrees)
+    @param longitudes: np.array of longitudes (degrees, -ve is West)
+    @param times: np.array of np.datetime64 UTC times or POSIX timestamps (see to_day_of_year)
+    @return: np.array of the elevation of the sun above the horizon (degrees, -ve at night)
+    @return: np.array of the azimuth of the sun (degrees clockwise from North, the same as a bearing)
+    """
+    sun_up, sun_east, sun_north, _ = sun_vectors(latitudes, longitudes, times)
+    return np.degrees(np.arcsin(np.clip(sun_up, -1, 1))), np.degrees(np.arctan2(sun_east, sun_north)) % 360
+
+
+def cloud_transmittance(cloud_cover):
+    """
+    cloud_transmittance: the fraction of the clear sky irradiance that gets through the clouds (Kasten-Czeplak)
+    - https://doi.org/10.1016/0038-092X(80)90391-6
+    @param cloud_cover: np.array of the cloud cover in % (0 to 100, the cloudCover of the weather forecast)
+    @return: np.array of the fraction of the irradiance that gets through (1 for a clear sky, 0.25 for an overcast sky)
+    """
+    cloud_cover = np.clip(np.asarray(cloud_cover, dtype=np.float64), 0, 100) / 100
+    return 1 - 0.75 * cloud_cover ** 3.4
+
+
+def route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=0, panel_azimuth=0, cloud_cover=None,
+                     dtype=np.float32, table=None):
+    """
+    route_irradiance: calculates the irradiance on the solar array at every point of a route at the planned time the car is
+        there, in 1 vectorized pass (the arrays are broadcast together, see sun_vectors)
+    - The direct irradiance (see sun_geometry) is projected onto the panel, which faces the bearing of the route plus
+        panel_azimuth, tilted panel_tilt up from horizontal
+    @param latitudes: np.array of the latitude of each point (e.g. the "latitude" column of RouteClass)
+    @param longitudes: np.array of the longitude of each point
+    @param bearings: np.array of the bearing of the car at each point (e.g. the "bearing_to_next_360" column)
+    @param times: np.array of the UTC time the car is at each point (np.datetime64 or POSIX timestamps)
+    @param panel_tilt: tilt of the panel from horizontal (degrees, 0 is flat)
+    @param panel_azimuth: direction the tilted panel faces relative to the front of the car (degrees clockwise)
+    @param cloud_cover (optional): np.array of the cloud cover in % at each point (see cloud_transmittance), clear if None
+    @param dtype: dtype of the result (float32 by default, to keep grids over many points and plans compact)
+    @param table (optional): solar_table.SolarTable covering the route and times to interpolate the sun from instead of
+        calculating it (see solar_table.get_route_table), off by at most its error_bound
+    @return: np.array of the irradiance on the panel (kW/m^2), 0 at night or with the sun behind the panel
+    """
+    # Angle between the sun and the normal of the panel
+    tilt = np.radians(panel_tilt)
+    panel_azimuths = np.radians(np.nan_to_num(np.asarray(bearings, dtype=np.float64)) + panel_azimuth)
+
+    if table is None:
+        sun_up, sun_east, sun_north, direct = sun_vectors(latitudes, longitudes, times)
+        cos_incidence = np.cos(tilt) * sun_up + np.sin(tilt) * (sun_east * np.sin(panel_azimuths) + sun_north * np.cos(panel_azimuths))
+        irradiance = direct * np.maximum(cos_incidence, 0)
+    elif panel_tilt == 0:
+        irradiance, = table.lookup(latitudes, longitudes, times, fields=["irradiance_up"])
+    else:
+        # The table has the direct irradiance times the unit vector towards the sun, so project it onto the normal (in float32)
+        irradiance_up, irradiance_east, irradiance_north = table.lookup(latitudes, longitudes, times)
+        normal_east = (np.sin(tilt) * np.sin(panel_azimuths)).astype(np.float32)
+        normal_north = (np.sin(tilt) * np.cos(panel_azimuths)).astype(np.float32)
+        irradiance_up *= np.float32(np.cos(tilt))
+        irradiance_east *= normal_east
+        irradiance_north *= normal_north
+        irradiance = np.maximum(irradiance_up + irradiance_east + irradiance_north, 0)
+
+    if cloud_cover is not None:
+        irradiance = irradiance * cloud_transmittance(cloud_cover)
+    return irradiance.astype(dtype)
+
+
+def segment_solar_energy(irradiance, times_to_next, panel_area, efficiency):
+    """
+    segment_solar_energy: integrates the irradiance at each point into the electrical energy from the solar array over each
+        segment (trapezoidal rule between a point and the next one), in the same units as the energy simulation
+    @param irradiance: np.array of the irradiance (kW/m^2) at each point (the last axis is the route)
+    @param times_to_next: np.array of the time (s) from each point to the next one (1 per segment, or 1 per point with the
+        last one unused, e.g. the "time(s)" of energy.EnergyModel.simulate)
+    @param panel_area: area of the solar array (m^2)
+    @param efficiency: efficiency of the solar array (0 to 1)
+    @return: np.array of the energy (J) from the solar array over each segment
+    """
+    irradiance = np.asarray(irradiance, dtype=np.float64)
+    times_to_next = np.asarray(times_to_next, dtype=np.float64)
+    if times_to_next.shape[-1] == irradiance.shape[-1]:
+        times_to_next = times_to_next[..., :-1]
+
+    mean_irradiance = (irradiance[..., :-1] + irradiance[..., 1:]) / 2
+    return mean_irradiance * 1000 * panel_area * efficiency * times_to_next
+
+
+def get_route_irradiance(route, times, panel_tilt=0, panel_azimuth=0, cloud_cover=None):
+    """
+    get_route_irradiance: route_irradiance for the route data of RouteClass (or RouteModel), as a pandas dataframe with 1 row
+        per coordinate to append to RouteClass
+    @param route: RouteClass object or pandas dataframe with "latitude", "longitude" and "bearing_to_next_360" columns
+    @param times: np.array of the UTC time the car is at each coordinate (np.datetime64 or POSIX timestamps)
+    @param panel_tilt: tilt of the panel from horizontal (degrees)
+    @param panel_azimuth: direction the tilted panel faces relative to the front of the car (degrees clockwise)
+    @param cloud_cover (optional): np.array of the cloud cover in % at each coordinate, or the name of a route data column
+    @return: pandas dataframe with data on irradiance
+    """
+    data = route.data() if callable(getattr(route, "data", None)) else route
+    if isinstance(cloud_cover, str):
+        cloud_cover = data[cloud_cover].to_numpy(dtype=np.float64)
+
+    irradiance = route_irradiance(data["latitude"].to_numpy(), data["longitude"].to_numpy(), data["bearing_to_next_360"].to_numpy(),
+                                  times, panel_tilt=panel_tilt, panel_azimuth=panel_azimuth, cloud_cover=cloud_cover)
+    return pd.DataFrame({"irradiance(kW/m^2)": irradiance})
+
+
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: a 150k point route driven over a race day, and the same route for 100 candidate start times
+    rng = np.random.default_rng(0)
+    number_of_points = 150000
+    latitudes = 40.88 + np.cumsum(rng.normal(0, 0.0001, number_of_points))
+    longitudes = -98.37 + np.cumsum(rng.normal(0, 0.0001, number_of_points))
+    bearings = rng.uniform(0, 360, number_of_points)
+    start = np.datetime64("2024-07-20T13:00:00").astype("datetime64[s]").astype(np.float64)
+    times = start + np.arange(number_of_points) * 0.2 # 8.3 hours
+    cloud_cover = rng.uniform(0, 100, number_of_points)
+
+    t0 = time.perf_counter()
+    irradiance = route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=5, cloud_cover=cloud_cover)
+    t1 = time.perf_counter()
+    candidate_times = times + np.arange(0, 100 * 300, 300)[:, np.newaxis] # start every 5 minutes
+    candidate_irradiance = route_irradiance(latitudes, longitudes, bearings, candidate_times, panel_tilt=5)
+    t2 = time.perf_counter()
+    print(f"1 plan: {t1 - t0:.4f}s, 100 plans: {t2 - t1:.4f}s ({candidate_irradiance.nbytes / 1e6:.0f}MB)")
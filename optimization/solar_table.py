@@ -0,0 +1,313 @@
+import os
+import functools
+import tempfile
+import numpy as np
+from route_solar import SOLAR_CONSTANT, SECONDS_PER_DAY, to_timestamps, to_day_of_year, solar_hours, sun_geometry
+
+
+
+
+FIELDS = ["irradiance_up", "irradiance_east", "irradiance_north"] # direct irradiance times the unit vector towards the sun
+RESOLUTION = ["start", "end", "latitudes", "longitudes", "latitude_step", "time_step"]
+SECONDS_PER_DEGREE = 240 # of mean solar time per degree of longitude
+DECLINATION_RATE = np.radians(23.45) * np.radians(360 / 365) # largest change of the declination (radians per day)
+EQUATION_OF_TIME_RATE = np.radians((2 * 9.87 + 7.53 + 1.5) * 360 / 365 / 4) # largest change of the hour angle from the equation of time (radians per day)
+MAX_IRRADIANCE_SLOPE = 3.33 # largest d(direct_irradiance)/d(sun_up) in kW/m^2, at sun_up = 0.057
+
+
+def make_axis(bounds, step):
+    """
+    make_axis: evenly spaced values from bounds[0] to bounds[1], at most step apart
+    @param bounds: (first, last) value of the axis
+    @param step: largest step between values
+    @return: np.array of the values of the axis
+    """
+    if not bounds[1] > bounds[0] or not step > 0:
+        raise ValueError(f"the axis {bounds} with step {step} is empty")
+    return np.linspace(bounds[0], bounds[1], int(np.ceil((bounds[1] - bounds[0]) / step - 1e-9)) + 1)
+
+
+def lerp(start, end, fraction):
+    """
+    lerp: linear interpolation from start to end, in place in end
+    """
+    end -= start
+    end *= fraction
+    end += start
+    return end
+
+
+class SolarTable():
+
+
+    def __init__(self, start, end, latitudes, longitudes, latitude_step=0.1, time_step=1, filepath=None):
+        """
+        SolarTable is a precomputed grid of the direct irradiance vector (route_solar.sun_geometry's direct irradiance times
+            the unit vector towards the sun) for the days of a race and the latitude band of its route, which is interpolated
+            (bilinear) instead of calculating the trig of every point
+        - The grid is over latitude x mean solar time (UTC plus 4 minutes per degree of longitude, so every day of the race
+            is one stretch of the axis). The day terms (declination and equation of time) are evaluated once per time of the
+            table at the middle of the longitude band instead of once per point, see longitude_error
+        - The table is only built or loaded from filepath on the first lookup (see values), and saved to filepath once built
+        - error_bound is the largest error of the irradiance on a panel from the table
+        @param start: UTC time of the start of the race (np.datetime64 or POSIX timestamp)
+        @param end: UTC time of the end of the race
+        @param latitudes: (min, max) latitude band of the route (degrees)
+        @param longitudes: (min, max) longitude band of the route (degrees, -ve is West)
+        @param latitude_step: largest step between the latitudes of the table (degrees)
+        @param time_step: largest step between the times of the table (minutes)
+        @param filepath (optional): .npz file to load the table from, or to save it to once it is built if it does not exist
+        @return: SolarTable object
+        """
+        start, end = to_timestamps([start, end]).tolist()
+        self.resolution = {"start": start, "end": end, "latitudes": tuple(latitudes), "longitudes": tuple(longitudes),
+                           "latitude_step": latitude_step, "time_step": time_step}
+        self.longitude = (longitudes[0] + longitudes[1]) / 2
+        self.latitudes = make_axis(latitudes, latitude_step)
+        self.solar_times = make_axis((start + longitudes[0] * SECONDS_PER_DEGREE, end + longitudes[1] * SECONDS_PER_DEGREE), time_step * 60)
+        self.shape = (len(self.latitudes), len(self.solar_times))
+        self.filepath = filepath
+        self._values = None
+        self._interpolation_error = None
+
+
+    @property
+    def filename(self):
+        resolution = self.resolution
+        return (f"solar_table_{resolution['start']:.0f}-{resolution['end']:.0f}s"
+                f"_{resolution['latitudes'][0]:g}-{resolution['latitudes'][1]:g}deg_{resolution['longitudes'][0]:g}-{resolution['longitudes'][1]:g}deg"
+                f"_{resolution['latitude_step']:g}deg_{resolution['time_step']:g}min.npz")
+
+
+    @property
+    def values(self):
+        """
+        values is the (FIELDS x latitudes x solar times) float32 array of the table (kW/m^2), loaded from filepath or built
+            (and saved to filepath) the first time it is used
+        """
+        if self._values is None:
+            if self.filepath is not None and os.path.exists(self.filepath):
+                self._load_values()
+            else:
+                self.build()
+                if self.filepath is not None:
+                    self.save(self.filepath)
+        return self._values
+
+
+    @property
+    def interpolation_error(self):
+        """
+        interpolation_error is the largest error of the interpolated components (kW/m^2), measured when the table is built at
+            the middle of every edge and the centre of every cell of the grid, where bilinear interpolation is furthest off
+        """
+        self.values
+        return self._interpolation_error
+
+
+    @property
+    def longitude_error(self):
+        """
+        longitude_error is the largest error of the components (kW/m^2) from evaluating the day terms at the middle of the
+            longitude band: a point at the edge of the band is up to half the band * 4 minutes off in UTC time, which moves the
+            declination and the equation of time by at most DECLINATION_RATE and EQUATION_OF_TIME_RATE per day. The unit vector
+            changes by at most as much, and the direct irradiance by at most MAX_IRRADIANCE_SLOPE times as much
+        """
+        longitudes = self.resolution["longitudes"]
+        days = (longitudes[1] - longitudes[0]) / 2 * SECONDS_PER_DEGREE / SECONDS_PER_DAY
+        return (SOLAR_CONSTANT + MAX_IRRADIANCE_SLOPE) * (DECLINATION_RATE + EQUATION_OF_TIME_RATE) * days
+
+
+    @property
+    def error_bound(self):
+        """
+        error_bound is the largest error of the irradiance on a panel (kW/m^2) from table lookups: the panel's unit normal
+            projects the error of the 3 components, sqrt(3) times the largest
+        """
+        return np.sqrt(3) * (self.interpolation_error + self.longitude_error)
+
+
+    def calculate(self, latitudes, solar_times):
+        """
+        calculate is a method that calculates the values of the table at (latitude, mean solar time) pairs with
+            route_solar.sun_geometry (the arrays are broadcast together)
+        @param latitudes: np.array of latitudes (degrees)
+        @param solar_times: np.array of mean solar times (POSIX timestamp plus 240s per degree of longitude)
+        @return: np.array of the FIELDS (FIELDS x the shape of the arrays)
+        """
+        days, hours = to_day_of_year(solar_times - self.longitude * SECONDS_PER_DEGREE)
+        hour_angles = np.radians(15 * (solar_hours(self.longitude, days, hours) - 12))
+        sun_up, sun_east, sun_north, direct = sun_geometry(days, latitudes, hour_angles)
+        return np.stack(np.broadcast_arrays(direct * sun_up, direct * sun_east, direct * sun_north))
+
+
+    def build(self):
+        """
+        build is a method that calculates the table, and measures its interpolation_error against a grid with half the steps
+        @return: None
+        """
+        latitudes = np.linspace(self.latitudes[0], self.latitudes[-1], 2 * len(self.latitudes) - 1)
+        solar_times = np.linspace(self.solar_times[0], self.solar_times[-1], 2 * len(self.solar_times) - 1)
+        fine_values = self.calculate(latitudes[:, np.newaxis], solar_times)
+        values = fine_values[:, ::2, ::2]
+
+        # Midpoints of the edges along the latitudes and the times, and the centres of the cells
+        errors = [fine_values[:, 1::2, ::2] - (values[:, :-1] + values[:, 1:]) / 2,
+                  fine_values[:, ::2, 1::2] - (values[:, :, :-1] + values[:, :, 1:]) / 2,
+                  fine_values[:, 1::2, 1::2] - (values[:, :-1, :-1] + values[:, 1:, :-1] + values[:, :-1, 1:] + values[:, 1:, 1:]) / 4]
+        self._interpolation_error = max(np.max(np.abs(error)) for error in errors)
+        self._values = values.astype(np.float32)
+
+
+    def save(self, filepath):
+        """
+        save is a method that saves the table to a .npz file (written to a temporary file first, so a process loading the
+            table never sees half of it)
+        @param filepath: path of the .npz file
+        @return: None
+        """
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".npz", delete=False) as file:
+            np.savez(file, values=self.values, interpolation_error=self.interpolation_error,
+                     **{key: np.asarray(value) for key, value in self.resolution.items()})
+        os.replace(file.name, filepath)
+
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        load is a class method that makes a table from a .npz file saved with save. Only the resolution is read, the values
+            are loaded on the first lookup
+        @param filepath: path of the .npz file
+        @return: SolarTable object
+        """
+        with np.load(filepath) as file:
+            resolution = {key: file[key].tolist() for key in RESOLUTION}
+        return cls(**resolution, filepath=filepath)
+
+
+    def _load_values(self):
+        with np.load(self.filepath) as file:
+            resolution = {key: file[key].tolist() for key in RESOLUTION}
+            values, interpolation_error = file["values"], float(file["interpolation_error"])
+        for key, value in self.resolution.items():
+            if not np.allclose(resolution[key], value, rtol=0, atol=1e-9):
+                raise ValueError(f"{self.filepath} is a table with {key} {resolution[key]}, not {value}")
+        if values.shape != (len(FIELDS),) + self.shape:
+            raise ValueError(f"{self.filepath} is a table of shape {values.shape[1:]}, not {self.shape}")
+        self._values, self._interpolation_error = values, interpolation_error
+
+
+    def lookup(self, latitudes, longitudes, times, fields=FIELDS):
+        """
+        lookup is a method that interpolates the direct irradiance vector from the table. The arrays are broadcast together
+            like route_solar.sun_vectors, and the work per position (e.g. shape (n,) under times of shape (m, n)) is only done
+            once per position
+        @param latitudes: np.array of latitudes (degrees), in the latitude band of the table
+        @param longitudes: np.array of longitudes (degrees, -ve is West), in the longitude band of the table
+        @param times: np.array of np.datetime64 UTC times or POSIX timestamps, in the race of the table
+        @param fields: the FIELDS to look up
+        @return: list of np.array (float32) of each field (kW/m^2)
+        """
+        latitudes, longitudes = np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)
+        for name, value, bounds in [("latitudes", latitudes, self.resolution["latitudes"]), ("longitudes", longitudes, self.resolution["longitudes"])]:
+            if value.size > 0 and (np.min(value) < bounds[0] or np.max(value) > bounds[1]):
+                raise ValueError(f"{name} must be in the table's band ({bounds[0]:g} to {bounds[1]:g})")
+
+        # Positions on the axes in float32 (the times relative to the start of the table are well within its precision)
+        time_step = self.solar_times[1] - self.solar_times[0]
+        positions = (to_timestamps(times) - (self.solar_times[0] - longitudes * SECONDS_PER_DEGREE)).astype(np.float32)
+        positions *= np.float32(1 / time_step)
+        if positions.size > 0 and (np.min(positions) < 0 or np.max(positions) > self.shape[1] - 1):
+            raise ValueError(f"times must be in the race of the table ({self.resolution['start']:.0f} to {self.resolution['end']:.0f})")
+        indices = np.minimum(np.floor(positions), self.shape[1] - 2)
+        time_fractions = positions
+        time_fractions -= indices
+
+        latitude_positions = (latitudes - self.latitudes[0]) / (self.latitudes[1] - self.latitudes[0])
+        latitude_indices = np.minimum(np.floor(latitude_positions), self.shape[0] - 2)
+        latitude_fractions = (latitude_positions - latitude_indices).astype(np.float32)
+        indices = indices.astype(np.intp)
+        indices += latitude_indices.astype(np.intp) * self.shape[1]
+
+        # The corners of the cells are the same indices into the table shifted by 1 time and/or 1 latitude. Along the times,
+        # then the latitudes
+        values = self.values.reshape(len(FIELDS), -1)
+        shifts = [0, 1, self.shape[1], self.shape[1] + 1]
+        result = []
+        for field in fields:
+            field_values = values[FIELDS.index(field)]
+            v00, v01, v10, v11 = (field_values[shift:][indices] for shift in shifts)
+            result.append(lerp(lerp(v00, v01, time_fractions), lerp(v10, v11, time_fractions), latitude_fractions))
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def get_table(directory=None, start=0, end=SECONDS_PER_DAY, latitudes=(-90, 90), longitudes=(-180, 180), latitude_step=0.1,
+              time_step=1):
+    """
+    get_table: gets the SolarTable of a race and resolution, made once per process (cached) and saved in directory (named
+        after the race and resolution), so it is only built the first time it is used in any process
+    @param directory (optional): directory of the saved tables, the table is not saved if None
+    @param start, end, latitudes, longitudes, latitude_step, time_step: see SolarTable, the start and end as POSIX
+        timestamps and the bands as tuples
+    @return: SolarTable object
+    """
+    table = SolarTable(start, end, latitudes, longitudes, latitude_step=latitude_step, time_step=time_step)
+    if directory is not None:
+        table.filepath = os.path.join(directory, table.filename)
+    return table
+
+
+def get_route_table(latitudes, longitudes, times, directory=None, latitude_step=0.1, time_step=1):
+    """
+    get_route_table: get_table for the race days and latitude/longitude band of a route, widened to whole UTC days and whole
+        degrees, so sweeps over the plans of the same race days share 1 table
+    @param latitudes: np.array of the latitude of each point of the route
+    @param longitudes: np.array of the longitude of each point of the route
+    @param times: np.array of the UTC times the car is at the points (e.g. of every candidate plan)
+    @param directory (optional): directory of the saved tables, see get_table
+    @param latitude_step, time_step: resolution of the table, see SolarTable
+    @return: SolarTable object
+    """
+    times = to_timestamps(times)
+    start, end = float(np.floor(np.min(times) / SECONDS_PER_DAY)), float(np.floor(np.max(times) / SECONDS_PER_DAY) + 1)
+    latitudes = (float(np.floor(np.min(latitudes))), float(np.floor(np.max(latitudes)) + 1))
+    longitudes = (float(np.floor(np.min(longitudes))), float(np.floor(np.max(longitudes)) + 1))
+    return get_table(directory, start * SECONDS_PER_DAY, end * SECONDS_PER_DAY, latitudes, longitudes, latitude_step, time_step)
+
+
+
+
+if __name__ == "__main__":
+    import time
+    from route_solar import route_irradiance
+
+    # Benchmark: the same route for 100 candidate start times, calculated and looked up in the table of its race day
+    rng = np.random.default_rng(0)
+    number_of_points = 150000
+    latitudes = 40.88 + np.cumsum(rng.normal(0, 0.0001, number_of_points))
+    longitudes = -98.37 + np.cumsum(rng.normal(0, 0.0001, number_of_points))
+    bearings = rng.uniform(0, 360, number_of_points)
+    start = np.datetime64("2024-07-20T13:00:00").astype("datetime64[s]").astype(np.float64)
+    times = start + np.arange(number_of_points) * 0.2 + np.arange(0, 100 * 300, 300)[:, np.newaxis]
+
+    with tempfile.TemporaryDirectory() as directory:
+        t0 = time.perf_counter()
+        table = get_route_table(latitudes, longitudes, times, directory)
+        table.values
+        t1 = time.perf_counter()
+        loaded_table = SolarTable.load(table.filepath)
+        loaded_table.values
+        t2 = time.perf_counter()
+    print(f"build and save: {t1 - t0:.4f}s, load: {t2 - t1:.4f}s ({table.values.nbytes / 1e6:.1f}MB)")
+
+    for panel_tilt in [0, 5]:
+        t3 = time.perf_counter()
+        table_irradiance = route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=panel_tilt, table=loaded_table)
+        t4 = time.perf_counter()
+        irradiance = route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=panel_tilt)
+        t5 = time.perf_counter()
+        print(f"panel_tilt={panel_tilt}: lookup: {t4 - t3:.4f}s, calculated: {t5 - t4:.4f}s, largest error: "
+              f"{np.max(np.abs(table_irradiance - irradiance)):.2e} kW/m^2, error bound: {loaded_table.error_bound:.2e} kW/m^2")
@@ -0,0 +1,137 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+import pandas as pd
+from route_solar import to_day_of_year, solar_position, cloud_transmittance, route_irradiance, segment_solar_energy, \
+    get_route_irradiance
+
+
+
+
+def test_to_day_of_year():
+    times = np.array(["2023-01-01T00:00", "2023-01-01T18:00", "2024-12-31T06:00"], dtype="datetime64[s]")
+    days, hours = to_day_of_year(times)
+    np.testing.assert_allclose(days, [1, 1.75, 366.25])
+    np.testing.assert_allclose(hours, [0, 18, 6])
+
+    posix_days, posix_hours = to_day_of_year(times.astype(np.float64))
+    np.testing.assert_allclose(posix_days, days)
+    np.testing.assert_allclose(posix_hours, hours)
+
+
+def test_solar_position_solar_noon():
+    # Waterloo on the June solstice: solar noon at about 17:22 UTC, 90 - latitude + 23.44 degrees up, due South
+    times = np.arange(np.datetime64("2023-06-21T10:00"), np.datetime64("2023-06-22T02:00"), np.timedelta64(1, "m"))
+    elevations, azimuths = solar_position(43.47, -80.54, times)
+    noon = np.argmax(elevations)
+
+    assert abs((times[noon] - np.datetime64("2023-06-21T17:22")) / np.timedelta64(1, "m")) <= 5
+    assert elevations[noon] == pytest.approx(90 - 43.47 + 23.44, abs=0.5)
+    assert azimuths[noon] == pytest.approx(180, abs=2)
+    assert 0 < azimuths[noon - 180] < 180 # East in the morning
+    assert 180 < azimuths[noon + 180] < 360 # West in the afternoon
+
+
+def test_solar_position_broadcasts():
+    latitudes = np.array([-20, 0, 30.28, 43.47])
+    longitudes = np.array([130, 0, -97.73, -80.54])
+    times = np.arange(np.datetime64("2024-07-20T00:00"), np.datetime64("2024-07-21T00:00"), np.timedelta64(1, "h"))
+    elevations, azimuths = solar_position(latitudes, longitudes, times[:, np.newaxis])
+
+    assert elevations.shape == azimuths.shape == (24, 4)
+    for i, time in enumerate(times):
+        elevation, azimuth = solar_position(latitudes, longitudes, np.full(4, time))
+        np.testing.assert_allclose(elevations[i], elevation)
+        np.testing.assert_allclose(azimuths[i], azimuth)
+
+
+def test_cloud_transmittance():
+    np.testing.assert_allclose(cloud_transmittance([0, 50, 100, 150]), [1, 1 - 0.75 * 0.5 ** 3.4, 0.25, 0.25])
+
+
+def test_route_irradiance_flat_panel():
+    times = np.array(["2024-07-20T06:00", "2024-07-20T17:30", "2024-07-20T17:30"], dtype="datetime64[s]")
+    irradiance = route_irradiance(np.full(3, 43.47), np.full(3, -80.54), np.array([0, 90, 270]), times)
+    elevations, _ = solar_position(43.47, -80.54, times)
+
+    assert irradiance.dtype == np.float32
+    assert irradiance[0] == 0 # before sunrise
+    assert irradiance[1] == irradiance[2] # a flat panel does not depend on the bearing
+    air_mass = 1 / np.sin(np.radians(elevations[1]))
+    assert irradiance[1] == pytest.approx(1.353 * 0.7 ** (air_mass ** 0.678) * np.sin(np.radians(elevations[1])), rel=1e-6)
+
+    cloudy = route_irradiance(np.full(3, 43.47), np.full(3, -80.54), np.array([0, 90, 270]), times, cloud_cover=[0, 100, 50])
+    np.testing.assert_allclose(cloudy, irradiance * cloud_transmittance([0, 100, 50]), rtol=1e-6)
+
+
+def test_route_irradiance_tilted_panel():
+    # Mid afternoon the sun is in the South West, so a panel tilted to the front gets more facing West than facing East
+    times = np.full(4, np.datetime64("2024-07-20T21:00"))
+    bearings = np.array([270, 90, 0, 180])
+    flat = route_irradiance(np.full(4, 43.47), np.full(4, -80.54), bearings, times, dtype=np.float64)
+    tilted = route_irradiance(np.full(4, 43.47), np.full(4, -80.54), bearings, times, panel_tilt=20, dtype=np.float64)
+    assert tilted[0] > flat[0] > tilted[1]
+
+    # Turning the car around is the same as turning the panel around
+    backwards = route_irradiance(np.full(4, 43.47), np.full(4, -80.54), (bearings + 180) % 360, times, panel_tilt=20,
+                                 panel_azimuth=180, dtype=np.float64)
+    np.testing.assert_allclose(backwards, tilted)
+
+    # A panel tilted 90 degrees away from the sun gets nothing
+    _, azimuth = solar_position(43.47, -80.54, times[0])
+    away = route_irradiance(43.47, -80.54, azimuth + 180, times[0], panel_tilt=90)
+    assert away == 0
+
+
+def test_route_irradiance_grid():
+    rng = np.random.default_rng(0)
+    latitudes = 40.88 + np.cumsum(rng.normal(0, 0.001, 50))
+    longitudes = -98.37 + np.cumsum(rng.normal(0, 0.001, 50))
+    bearings = rng.uniform(0, 360, 50)
+    times = np.datetime64("2024-07-20T13:00").astype("datetime64[s]").astype(np.float64) + np.arange(50) * 60
+    start_offsets = np.arange(0, 10 * 3600, 3600)[:, np.newaxis]
+
+    grid = route_irradiance(latitudes, longitudes, bearings, times + start_offsets, panel_tilt=10)
+    assert grid.shape == (10, 50)
+    for i, offset in enumerate(start_offsets[:, 0]):
+        np.testing.assert_array_equal(grid[i], route_irradiance(latitudes, longitudes, bearings, times + offset, panel_tilt=10))
+
+
+def test_segment_solar_energy():
+    irradiance = np.array([1.0, 1.0, 0.5, 0.0])
+    per_segment = segment_solar_energy(irradiance, [10, 20, 30], panel_area=4, efficiency=0.2)
+    np.testing.assert_allclose(per_segment, np.array([1.0, 0.75, 0.25]) * 1000 * 4 * 0.2 * np.array([10, 20, 30]))
+
+    # 1 time per point (the last one unused) and 1 row per plan
+    per_point = segment_solar_energy(np.stack([irradiance, irradiance]), [10, 20, 30, np.nan], panel_area=4, efficiency=0.2)
+    np.testing.assert_allclose(per_point, np.stack([per_segment, per_segment]))
+
+
+def test_get_route_irradiance():
+    route = pd.DataFrame({
+        "latitude": [43.47, 43.48, 43.49],
+        "longitude": [-80.54, -80.53, -80.52],
+        "bearing_to_next_360": [30, 30, np.nan],
+        "cloud_cover": [0, 50, 100],
+    })
+    times = np.array(["2024-07-20T17:00", "2024-07-20T17:01", "2024-07-20T17:02"], dtype="datetime64[s]")
+    irradiance = get_route_irradiance(route, times, panel_tilt=5, cloud_cover="cloud_cover")
+
+    assert list(irradiance.columns) == ["irradiance(kW/m^2)"]
+    expected = route_irradiance(route["latitude"].to_numpy(), route["longitude"].to_numpy(),
+                                route["bearing_to_next_360"].to_numpy(), times, panel_tilt=5, cloud_cover=[0, 50, 100])
+    np.testing.assert_array_equal(irradiance["irradiance(kW/m^2)"].to_numpy(), expected)
+    assert np.all(irradiance["irradiance(kW/m^2)"] > 0)
+
+
+def test_to_day_of_year_across_years():
+    times = np.array(["2023-12-31T18:00", "2024-01-01T06:00", "2024-03-01T12:00"], dtype="datetime64[s]")
+    days, hours = to_day_of_year(times)
+    np.testing.assert_allclose(days, [365.75, 1.25, 61.5])
+    np.testing.assert_allclose(hours, [18, 6, 12])
+
+    days, hours = to_day_of_year(np.array([], dtype=np.float64))
+    assert days.shape == hours.shape == (0,)
@@ -0,0 +1,122 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import csv
+import pytest
+import numpy as np
+from new_solar import SolarDay, SolarArray
+
+
+
+
+solar_days = [
+    SolarDay(182, 30.28, 97.73, 8, 0.5, 10),
+    SolarDay(10, 43.47, -80.54, -5, 1, 0),
+    SolarDay(300, -20, 130, 9, 0.8, 30),
+]
+
+
+@pytest.mark.parametrize("solar_day", solar_days)
+def test_energy_received_matches_reference(solar_day):
+    energy, points = solar_day.energy_received()
+    total_energy = solar_day.total_energy
+    reference_energy, reference_points = solar_day.energy_received_reference()
+
+    assert len(energy) == len(points) == 1000
+    np.testing.assert_allclose(points, reference_points)
+    np.testing.assert_allclose(energy, reference_energy, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(total_energy, solar_day.total_energy, rtol=1e-12)
+
+
+@pytest.mark.parametrize("latitude", range(-85, 90, 5))
+def test_energy_received_finite(latitude):
+    # Rounding puts the first grid point (sunrise) slightly below the horizon on many days, which has no insolation
+    for day in range(1, 366, 7):
+        solar_day = SolarDay(day, latitude, 97.73, 8, 0.5, 10)
+        energy, points = solar_day.energy_received()
+        assert np.all(np.isfinite(energy))
+        assert np.isfinite(solar_day.total_energy)
+
+        if day % 28 == 1:
+            total_energy = solar_day.total_energy
+            reference_energy, _ = solar_day.energy_received_reference()
+            np.testing.assert_allclose(energy, reference_energy, rtol=1e-12, atol=1e-12)
+            np.testing.assert_allclose(total_energy, solar_day.total_energy, rtol=1e-12, atol=1e-12)
+
+
+def test_solar_insolation_below_horizon():
+    solar_day = SolarDay(1, 25.0, 97.73, 8, 0.5, 10)
+    HRA = np.array([-np.pi, solar_day.sunrise_HRA() - 1e-12, 0])
+    insolation = solar_day.solar_insolation_array(HRA)
+    assert insolation[0] == insolation[1] == 0 and insolation[2] > 0
+    assert solar_day.solar_insolation(-np.pi) == 0
+
+
+@pytest.mark.parametrize("solar_day", solar_days)
+def test_solar_insolation_array(solar_day):
+    HRA = np.linspace(-1, 1, 50)
+    reference_insolation = [solar_day.solar_insolation(angle) for angle in HRA]
+    np.testing.assert_allclose(solar_day.solar_insolation_array(HRA), reference_insolation, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("solar_day", solar_days)
+def test_sunrise_sunset(solar_day):
+    # The sun's elevation is 0 at sunrise and sunset, so the air mass is (close to) infinite
+    for time in [solar_day.sunrise(), solar_day.sunset()]:
+        HRA = solar_day.time_to_HRA(time)
+        declination = np.radians(solar_day.declination_angle())
+        latitude = np.radians(solar_day.lat)
+        elevation = np.arcsin(np.sin(declination) * np.sin(latitude) + np.cos(declination) * np.cos(latitude) * np.cos(HRA))
+        assert abs(elevation) < 1e-9
+    assert solar_day.sunrise() < 12 - solar_day.time_correction() / 60 < solar_day.sunset()
+
+
+def test_polar_day():
+    solar_day = SolarDay(172, 80, 0, 0, 1, 0) # the sun never sets at 80N in June
+    np.testing.assert_allclose(solar_day.sunset() - solar_day.sunrise(), 24)
+
+
+@pytest.fixture
+def layout_filename(tmp_path):
+    filename = str(tmp_path / "cells.csv")
+    with open(filename, mode="w", newline="") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(["Cell_ID", "Row", "Column", "Module", "Angle"])
+        for cell in range(40):
+            writer.writerow([cell, cell // 10, cell % 10, cell // 10, [0, 2.5, 10, 2.5][cell % 4]])
+    return filename
+
+
+@pytest.mark.parametrize("day, latitude", [(182, 30.28), (1, 25.0), (176, -40.0), (330, 60.0)])
+def test_solar_array_matches_reference(layout_filename, day, latitude):
+    # (1, 25.0) has its sunrise grid point slightly below the horizon
+    solar_array = SolarArray(day, latitude, 97.73, 8, 0.5, layout_filename)
+    total_energy = solar_array.totalEnergy()
+    assert np.isfinite(total_energy)
+    np.testing.assert_allclose(total_energy, solar_array.totalEnergy_reference(), rtol=1e-12)
+
+
+def test_solar_array_angle_groups(layout_filename):
+    solar_array = SolarArray(182, 30.28, 97.73, 8, 0.5, layout_filename, efficiency=0.2, cell_scale=1)
+    angles, counts = solar_array.angle_groups()
+    np.testing.assert_array_equal(angles, [0, 2.5, 10])
+    np.testing.assert_array_equal(counts, [10, 20, 10])
+
+    # Each angle group is the energy of 1 SolarDay at that angle
+    angles, counts, insol = solar_array.energy_per_angle()
+    for angle, angle_insol in zip(angles, insol):
+        solar_day = SolarDay(182, 30.28, 97.73, 8, 0.5, angle)
+        energy, points = solar_day.energy_received()
+        np.testing.assert_allclose(angle_insol, np.trapz(energy, points), rtol=1e-12)
+    np.testing.assert_allclose(solar_array.totalEnergy(), np.sum(counts * insol) * 0.2)
+
+
+def test_solar_insolation_matrix():
+    solar_day = SolarDay(182, 30.28, 97.73, 8, 0.5, 0)
+    HRA = np.linspace(-1, 1, 20)
+    module_angles = [0, 5, 12.5]
+    matrix = solar_day.solar_insolation_array(HRA, module_angles)
+    assert matrix.shape == (3, 20)
+    for row, module_angle in zip(matrix, module_angles):
+        np.testing.assert_allclose(row, SolarDay(182, 30.28, 97.73, 8, 0.5, module_angle).solar_insolation_array(HRA), rtol=1e-12)
@@ -0,0 +1,129 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+from route_solar import SECONDS_PER_DAY, sun_vectors, route_irradiance
+from solar_table import SolarTable, get_table, get_route_table
+
+
+
+
+START = np.datetime64("2024-07-20T00:00").astype("datetime64[s]").astype(np.float64)
+
+
+def random_points(rng, number_of_points, table):
+    resolution = table.resolution
+    return (rng.uniform(*resolution["latitudes"], number_of_points), rng.uniform(*resolution["longitudes"], number_of_points),
+            rng.uniform(resolution["start"], resolution["end"], number_of_points))
+
+
+@pytest.mark.parametrize("resolution", [
+    {"start": START, "end": START + SECONDS_PER_DAY, "latitudes": (40, 42), "longitudes": (-99, -97)},
+    {"start": START, "end": START + 8 * SECONDS_PER_DAY, "latitudes": (-35, -12), "longitudes": (130, 139), "latitude_step": 0.5, "time_step": 5},
+    {"start": START - 200 * SECONDS_PER_DAY, "end": START - 199 * SECONDS_PER_DAY, "latitudes": (55, 65), "longitudes": (-5, 5),
+     "latitude_step": 1, "time_step": 15},
+])
+def test_lookup_within_error_bound(resolution):
+    table = SolarTable(**resolution)
+    latitudes, longitudes, times = random_points(np.random.default_rng(0), 200000, table)
+
+    looked_up = table.lookup(latitudes, longitudes, times)
+    sun_up, sun_east, sun_north, direct = sun_vectors(latitudes, longitudes, times)
+    for looked_up_field, exact_field in zip(looked_up, [direct * sun_up, direct * sun_east, direct * sun_north]):
+        assert looked_up_field.dtype == np.float32
+        assert np.max(np.abs(looked_up_field - exact_field)) <= table.interpolation_error + table.longitude_error + 1e-6
+
+
+def test_route_irradiance_with_table():
+    rng = np.random.default_rng(1)
+    table = SolarTable(START, START + SECONDS_PER_DAY, (30, 50), (-100, -80))
+    latitudes, longitudes, times = random_points(rng, 100000, table)
+    bearings = rng.uniform(0, 360, 100000)
+
+    for panel_tilt in [0, 20, 90]:
+        exact = route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=panel_tilt, dtype=np.float64)
+        looked_up = route_irradiance(latitudes, longitudes, bearings, times, panel_tilt=panel_tilt, dtype=np.float64, table=table)
+        assert np.all(looked_up >= 0)
+        assert np.max(np.abs(looked_up - exact)) <= table.error_bound + 1e-6
+
+    # Positions of shape (n,) under times of shape (m, n)
+    times = START + 13 * 3600 + np.arange(1000) * 10 + np.arange(0, 3600, 600)[:, np.newaxis]
+    exact = route_irradiance(latitudes[:1000], longitudes[:1000], bearings[:1000], times, panel_tilt=5)
+    looked_up = route_irradiance(latitudes[:1000], longitudes[:1000], bearings[:1000], times, panel_tilt=5, table=table)
+    assert looked_up.shape == (6, 1000)
+    assert np.max(np.abs(looked_up - exact)) <= table.error_bound + 1e-6
+
+
+def test_resolution():
+    coarse = SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), latitude_step=0.5, time_step=10)
+    fine = SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), latitude_step=0.05, time_step=1)
+    assert fine.interpolation_error < coarse.interpolation_error / 50
+
+    # Steps that do not divide the band are rounded down, and the times cover the race at every longitude of the band
+    table = SolarTable(START, START + 3600, (0, 10), (-1, 1), latitude_step=3, time_step=7)
+    assert table.shape == (5, 11)
+    np.testing.assert_allclose(table.latitudes, [0, 2.5, 5, 7.5, 10])
+    assert table.solar_times[0] == START - 240 and table.solar_times[-1] == START + 3600 + 240
+
+    # Wider longitude bands evaluate the day terms further from their points
+    assert SolarTable(START, START + 3600, (0, 10), (-10, 10)).longitude_error == pytest.approx(10 * table.longitude_error)
+
+
+def test_lookup_outside_table():
+    table = SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), time_step=10)
+    with pytest.raises(ValueError):
+        table.lookup(43, -98, START + 3600)
+    with pytest.raises(ValueError):
+        table.lookup(41, -96, START + 3600)
+    with pytest.raises(ValueError):
+        table.lookup(41, -98, START + SECONDS_PER_DAY + 3600)
+
+    # The edges of the table are in it
+    table.lookup([40, 42], [-99, -97], [START, START + SECONDS_PER_DAY])
+    assert table.lookup(41, -98, np.datetime64("2024-07-20T18:00"))[0] > 0
+
+
+def test_save_and_load(tmp_path):
+    filepath = str(tmp_path / "table.npz")
+    table = SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), time_step=10, filepath=filepath)
+    assert table._values is None and not os.path.exists(filepath) # lazy
+
+    latitudes, longitudes, times = random_points(np.random.default_rng(2), 1000, table)
+    looked_up = table.lookup(latitudes, longitudes, times)
+    assert os.path.exists(filepath)
+
+    loaded = SolarTable.load(filepath)
+    assert loaded.resolution == table.resolution
+    assert loaded._values is None
+    for loaded_field, field in zip(loaded.lookup(latitudes, longitudes, times), looked_up):
+        np.testing.assert_array_equal(loaded_field, field)
+    assert loaded.interpolation_error == table.interpolation_error
+
+    # A table with the same filepath loads it instead of building
+    same = SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), time_step=10, filepath=filepath)
+    same.build = None
+    np.testing.assert_array_equal(same.values, table.values)
+
+    # A table of another race or resolution does not load it, even with the same shape
+    for different in [SolarTable(START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), time_step=5, filepath=filepath),
+                      SolarTable(START + 3600, START + SECONDS_PER_DAY + 3600, (40, 42), (-99, -97), time_step=10, filepath=filepath),
+                      SolarTable(START, START + SECONDS_PER_DAY, (41, 43), (-99, -97), time_step=10, filepath=filepath)]:
+        with pytest.raises(ValueError):
+            different.values
+
+
+def test_get_route_table(tmp_path):
+    latitudes, longitudes = np.array([40.2, 40.9, 41.3]), np.array([-98.6, -98.1, -97.2])
+    times = START + 13 * 3600 + np.array([0, 1800, 3600]) + np.arange(0, 7200, 600)[:, np.newaxis]
+    table = get_route_table(latitudes, longitudes, times, str(tmp_path))
+    assert table.resolution == {"start": START, "end": START + SECONDS_PER_DAY, "latitudes": (40, 42), "longitudes": (-99, -97),
+                                "latitude_step": 0.1, "time_step": 1}
+    assert get_route_table(latitudes[::2], longitudes[::2], times[0], str(tmp_path)) is table
+    assert get_table(str(tmp_path), START, START + SECONDS_PER_DAY, (40, 42), (-99, -97), 0.1, 1) is table
+    assert table.filepath == os.path.join(str(tmp_path), table.filename)
+
+    table.values
+    assert os.listdir(str(tmp_path)) == [table.filename]
+    assert get_route_table(latitudes, longitudes, times).filepath is None
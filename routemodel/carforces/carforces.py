@@ -3,7 +3,7 @@ import os.path
 sys.path.append(os.path.dirname(sys.path[0]))
 
 import numpy as np
-from tools.tools import velocity_vector, vector_projection
+from tools.tools import velocity_vector, vector_projection, vector_projections
 
 
 
@@ -29,6 +29,10 @@ Forces are relative to the car (and not a flat surface/earth)
 
 Net x force: gravity force (x-direction) + applied force + friction force + drag force
 Net y force: gravity force (y-direction) + normal force + downforce
+
+The gravity, normal and friction functions also take a np.array of elevation_angles (1 force per angle), and the
+BATCHED FORCE CALCULATIONS take (n, 3) arrays of velocity vectors, so the forces of every point of a route are
+calculated in 1 call
 """
 
 
@@ -54,7 +58,7 @@ def x_force_gravity(car_mass, elevation_angle=0, gravity=EARTH_GRAVITY):
     """
     Calculates the force of gravity in the x-direction relative to the car (-ve force is pushing car backward, +ve force is pushing car forward)
     @param car_mass: mass of the car
-    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down)
+    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down), a number or a numpy array
     @param gravity: gravitational acceleration on earth
     @return: force of gravity in the x-direction relative to the car
     """
@@ -65,7 +69,7 @@ def y_force_gravity(car_mass, elevation_angle=0, gravity=EARTH_GRAVITY):
     """
     Calculates the force of gravity in the y-direction relative to the car (-ve as force is always pushing down)
     @param car_mass: mass of the car
-    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down)
+    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down), a number or a numpy array
     @param gravity: gravitational acceleration on earth
     @return: force of gravity in the y-direction relative to the car
     """
@@ -76,7 +80,7 @@ def y_force_normal(car_mass, elevation_angle=0, gravity=EARTH_GRAVITY):
     """
     Calculates the normal in the y-direction relative to the car (+ve as force is always pushing up)
     @param car_mass: mass of the car
-    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down)
+    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down), a number or a numpy array
     @param gravity: gravitational acceleration on earth
     @return: normal force in the y-direction relative to the car
     """
@@ -97,7 +101,7 @@ def x_force_friction(car_mass, elevation_angle=0, coef_resistance=ROLLING_RESIST
     """
     Calculates the friction (actually called rolling friction or rolling drag) of the car
     @param car_mass: mass of the car
-    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down)
+    @param elevation_angle: elevation_angle of the car relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down), a number or a numpy array
     @param coef_resistance: the rolling resistance coefficient of the car
     @param gravity: gravitational acceleration on earth
     @return: the friction force in the x-direction relative to the car
@@ -204,5 +208,99 @@ def x_force_applied(car_mass, car_vi_vector, car_vf_vector, timedelta):
 
 
 
+"""
+BATCHED FORCE CALCULATIONS (1 VELOCITY VECTOR PER ROW)
+"""
+
+def x_forces_drag(
+    car_velocity_vectors,
+    wind_velocity_vectors,
+    car_cross_sectional_area,
+    fluid_density=AIR_DENSITY,
+    drag_coefficent=DRAG_COEFFICIENT
+    ):
+    """
+    Calculates the drag force of the car due to the fluid (wind) at many points at once (the batched version of x_force_drag)
+    @param car_velocity_vectors: an (n, 3) numpy array of the velocity vectors of the car (see tools/tools.velocity_vectors)
+    @param wind_velocity_vectors: an (n, 3) numpy array of the velocity vectors of the wind, or a (3,) numpy array used at every point
+    @param car_cross_sectional_area: the cross sectional area of the car when looking directly at the front of the car
+    @param fluid_density: the fluid density (air density), a number or an (n,) numpy array
+    @param drag_coefficent: the drag coefficent of the car
+    @return: an (n,) numpy array of the drag force of the car due to the fluid (wind) in the x-direction relative to the car
+        (0 where the car is stopped)
+    """
+    car_fluid_velocity_vectors = vector_projections(car_velocity_vectors, wind_velocity_vectors)
+    car_fluid_velocity_squared_magnitudes = np.einsum("ij,ij->i", car_fluid_velocity_vectors, car_fluid_velocity_vectors)
+
+    drag_forces = 0.5 * fluid_density * car_fluid_velocity_squared_magnitudes * drag_coefficent * car_cross_sectional_area
+    return -1 * drag_forces # Change to negative/positive to represent the force direction relative to the car
+
+
+def y_forces_downforce(
+    car_velocity_vectors,
+    wind_velocity_vectors,
+    wing_area,
+    fluid_density=AIR_DENSITY,
+    lift_coefficent=LIFT_COEFFICIENT
+    ):
+    """
+    Calculates the downforce of the car due to the fluid (wind) at many points at once (the batched version of y_force_downforce)
+    @param car_velocity_vectors: an (n, 3) numpy array of the velocity vectors of the car (see tools/tools.velocity_vectors)
+    @param wind_velocity_vectors: an (n, 3) numpy array of the velocity vectors of the wind, or a (3,) numpy array used at every point
+    @param wing_area: the cross sectional area of the car when looking directly down the car (the entire car is treated as a wing)
+    @param fluid_density: the fluid density (air density), a number or an (n,) numpy array
+    @param lift_coefficent: the lift coefficent of the car
+    @return: an (n,) numpy array of the down force of the car due to the fluid (wind) in the y-direction relative to the car
+        (0 where the car is stopped)
+    """
+    car_fluid_velocity_vectors = vector_projections(car_velocity_vectors, wind_velocity_vectors)
+    car_fluid_velocity_squared_magnitudes = np.einsum("ij,ij->i", car_fluid_velocity_vectors, car_fluid_velocity_vectors)
+
+    downforces = lift_coefficent * 0.5 * fluid_density * car_fluid_velocity_squared_magnitudes * wing_area
+    return -1 * downforces # Change to negative/positive to represent the force direction relative to the car
+
+
+def x_forces_applied(car_mass, car_vi_vectors, car_vf_vectors, timedeltas):
+    """
+    calculate the applied force in the x direction (relative to the car) using f=ma at many points at once (the batched version of x_force_applied)
+    @param car_mass: mass of the car
+    @param car_vi_vectors: an (n, 3) numpy array of the initial velocity vectors of the car (see tools/tools.velocity_vectors)
+    @param car_vf_vectors: an (n, 3) numpy array of the final velocity vectors of the car (see tools/tools.velocity_vectors)
+    @param timedeltas: the time differences between the inital and final velocities, a number or an (n,) numpy array
+    @return: an (n,) numpy array of the applied force in the x-direction relative to the car (0 where the car starts stopped)
+    """
+    car_vi_vectors, car_vf_vectors = np.atleast_2d(car_vi_vectors), np.atleast_2d(car_vf_vectors)
+    assert car_vi_vectors.shape == car_vf_vectors.shape and car_vi_vectors.shape[1] == 3
+
+    # The signed length of the resultant vector in the x-direction (relative to car) is +ve when it pushes the car forward
+    resultant_vectors = car_vf_vectors - car_vi_vectors
+    car_vi_magnitudes = np.linalg.norm(car_vi_vectors, axis=1)
+    dot_products = np.einsum("ij,ij->i", car_vi_vectors, resultant_vectors)
+    resultant_projection_lengths = np.divide(dot_products, car_vi_magnitudes, out=np.zeros(len(dot_products)), where=car_vi_magnitudes > 0)
+
+    return car_mass * resultant_projection_lengths / np.abs(timedeltas)
+
+
+
+
 if __name__ == "__main__":
-    pass
+    import time
+    from tools.tools import velocity_vectors
+
+    # Benchmark: drag, downforce and applied force at 150k route points, batched vs 1 point at a time
+    rng = np.random.default_rng(0)
+    speeds = rng.uniform(15, 25, 150000)
+    car_velocity_vectors = velocity_vectors(speeds, rng.uniform(0, 360, 150000), rng.uniform(-5, 5, 150000))
+    wind_velocity_vectors = velocity_vectors(rng.uniform(0, 10, 150000), rng.uniform(0, 360, 150000), 0)
+
+    t0 = time.perf_counter()
+    x_forces_drag(car_velocity_vectors, wind_velocity_vectors, 1.5)
+    y_forces_downforce(car_velocity_vectors, wind_velocity_vectors, 6)
+    x_forces_applied(500, car_velocity_vectors[:-1], car_velocity_vectors[1:], 1)
+    t1 = time.perf_counter()
+    for i in range(len(speeds) - 1):
+        x_force_drag(car_velocity_vectors[i], wind_velocity_vectors[i], 1.5)
+        y_force_downforce(car_velocity_vectors[i], wind_velocity_vectors[i], 6)
+        x_force_applied(500, car_velocity_vectors[i], car_velocity_vectors[i + 1], 1)
+    t2 = time.perf_counter()
+    print(f"batched: {t1 - t0:.4f}s, 1 point at a time: {t2 - t1:.4f}s")
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+
+
+COORDINATE_PRECISION = 100000 # 1e-5 degrees (~1m), the same resolution used by the Bing Maps point compression algorithm
+
+
+def quantize_coordinates(coordinates: list):
+    """
+    quantize_coordinates converts coordinates into the integer keys used by the elevation cache
+    @param coordinates: a list of coordinate tuples (or an (n, 2) array of latitudes and longitudes)
+    @return: np.array of the quantized latitudes and np.array of the quantized longitudes (integers in 1e-5 degrees)
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    keys = np.rint(coordinates * COORDINATE_PRECISION).astype(np.int64)
+    return keys[:, 0], keys[:, 1]
+
+
+class ElevationCache():
+
+
+    def __init__(self, filepath: str = "elevation_cache.sqlite"):
+        """
+        ElevationCache is a persistent (SQLite file) store of elevations keyed on coordinates quantized to 1e-5 degrees, so
+            re-running the route pipeline only requests the elevations of coordinates it has never seen before
+        @param filepath: path of the SQLite cache file (created if it does not exist), ":memory:" for a cache that is not saved
+        @return: ElevationCache object
+        """
+        self.filepath = filepath
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS elevations (latitude INTEGER, longitude INTEGER, elevation REAL, PRIMARY KEY (latitude, longitude)) WITHOUT ROWID"
+            )
+        self._connection.commit()
+
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM elevations").fetchone()[0]
+
+
+    def get(self, coordinates: list):
+        """
+        get is a method that looks up the cached elevation of every coordinate
+        @param coordinates: a list of coordinate tuples
+        @return: np.array of the elevation of each coordinate (nan where the coordinate is not in the cache)
+        """
+        latitudes, longitudes = quantize_coordinates(coordinates)
+        elevations = np.full(len(latitudes), np.nan)
+        if len(latitudes) == 0:
+            return elevations
+
+        # Join against a temporary table of the requested keys instead of running one query per coordinate
+        cursor = self._connection.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS lookup (position INTEGER PRIMARY KEY, latitude INTEGER, longitude INTEGER)")
+        cursor.execute("DELETE FROM lookup")
+        cursor.executemany("INSERT INTO lookup VALUES (?, ?, ?)", zip(range(len(latitudes)), latitudes.tolist(), longitudes.tolist()))
+        rows = cursor.execute(
+            "SELECT lookup.position, elevations.elevation FROM lookup JOIN elevations "
+            "ON elevations.latitude = lookup.latitude AND elevations.longitude = lookup.longitude"
+            ).fetchall()
+        cursor.execute("DELETE FROM lookup")
+
+        if len(rows) > 0:
+            positions, values = zip(*rows)
+            elevations[list(positions)] = values
+        return elevations
+
+
+    def put(self, coordinates: list, elevations: list):
+        """
+        put is a method that saves the elevation of every coordinate into the cache (replacing any previous value)
+        @param coordinates: a list of coordinate tuples
+        @param elevations: a list of the elevation of each coordinate
+        @return: None
+        """
+        latitudes, longitudes = quantize_coordinates(coordinates)
+        elevations = np.asarray(elevations, dtype=np.float64)
+        if len(latitudes) != len(elevations):
+            raise ValueError(f"put requires 1 elevation per coordinate ({len(latitudes)} coordinates, {len(elevations)} elevations)")
+
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO elevations VALUES (?, ?, ?)", zip(latitudes.tolist(), longitudes.tolist(), elevations.tolist())
+            )
+        self._connection.commit()
+
+
+    def import_snapshot(self, filepath: str):
+        """
+        import_snapshot is a method to bulk load elevations into the cache, e.g. a snapshot made before going on the road so
+            the pipeline can run fully offline
+        @param filepath: path of another elevation cache file (.sqlite/.db) or of a csv with latitude, longitude and elevation columns
+        @return: number of elevations in the snapshot
+        """
+        if os.path.splitext(filepath)[1] in [".sqlite", ".db"]:
+            self._connection.execute("ATTACH DATABASE ? AS snapshot", (filepath,))
+            try:
+                count = self._connection.execute("SELECT COUNT(*) FROM snapshot.elevations").fetchone()[0]
+                self._connection.execute("INSERT OR REPLACE INTO elevations SELECT latitude, longitude, elevation FROM snapshot.elevations")
+                self._connection.commit()
+            finally:
+                self._connection.execute("DETACH DATABASE snapshot")
+            return count
+
+        snapshot = pd.read_csv(filepath)
+        self.put(list(zip(snapshot["latitude"], snapshot["longitude"])), snapshot["elevation"])
+        return snapshot.shape[0]
+
+
+    def export_snapshot(self, filepath: str):
+        """
+        export_snapshot is a method to save every cached elevation into a snapshot file that import_snapshot can load
+        @param filepath: path of the snapshot, a copy of the cache if it ends in .sqlite/.db, else a csv with latitude,
+            longitude and elevation columns
+        @return: number of elevations in the snapshot
+        """
+        if os.path.splitext(filepath)[1] in [".sqlite", ".db"]:
+            snapshot = sqlite3.connect(filepath)
+            self._connection.backup(snapshot)
+            snapshot.close()
+            return len(self)
+
+        rows = self._connection.execute("SELECT latitude, longitude, elevation FROM elevations").fetchall()
+        snapshot = pd.DataFrame(rows, columns=["latitude", "longitude", "elevation"])
+        snapshot[["latitude", "longitude"]] = snapshot[["latitude", "longitude"]] / COORDINATE_PRECISION
+        snapshot.to_csv(filepath, index=False)
+        return snapshot.shape[0]
+
+
+    def close(self):
+        """
+        close is a method to close the cache file
+        @return: None
+        """
+        self._connection.close()
+
+
+
+
+if __name__ == "__main__":
+    pass
@@ -1,13 +1,31 @@
 from geopy import distance as calc_distance
 import requests
 import json
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import warnings
+from pyproj import Geod
+from elevations.elevation_cache import ElevationCache
+from elevations.point_compression import compress_coordinates
+from elevations.level_of_detail import LevelOfDetail
 
 
 
 
+WGS84_GEOD = Geod(ellps="WGS84")
+
+
+def read_only(array: np.ndarray):
+    """
+    Marks an array as read only so the views returned by the range queries can't change the object's data
+    @param array: numpy array
+    @return: the same array (not writeable)
+    """
+    array.flags.writeable = False
+    return array
+
+
+
 
 class RouteElevation():
     def __init__(self, coordinates: list, BING_MAPS_API_KEY: str, sample_frequency_upper_bound: int = 1000, offset: int = 0, debug: bool = False):
@@ -37,6 +55,10 @@ class RouteElevation():
         self._y_axis_elevations = None
         self._x_axis_segments = None
         self._y_axis_segments = None
+        self._segment_start_indexes = None
+        self._distance_array = None
+        self._elevation_array = None
+        self._level_of_detail = None
         
         self.BING_MAPS_API_KEY = BING_MAPS_API_KEY
         self.build_elevations()
@@ -56,6 +78,9 @@ class RouteElevation():
         self._y_axis_elevations = self.build_y_axis_elevations(self._elevation_data_between_coordinate_pairs)
         self._x_axis_segments = self.build_x_axis_segments(self._x_axis_distance, self._sample_distances_between_coordinates)
         self._y_axis_segments = self.build_y_axis_segments(self._y_axis_elevations, self._sample_distances_between_coordinates)
+        self._segment_start_indexes = self.build_segment_start_indexes(self._sample_distances_between_coordinates)
+        self._distance_array = read_only(np.asarray(self._x_axis_distance))
+        self._elevation_array = read_only(np.asarray(self._y_axis_elevations))
 
 
 
@@ -250,6 +275,20 @@ class RouteElevation():
             print("\n-> Y-axis segments\n", y_axis_segments)
 
         return y_axis_segments
+
+
+
+    def build_segment_start_indexes(self, sample_frequency_distances_between_coordinates: list):
+        """
+        Builds the index (in the x-values and y-values) of every coordinate, so get_elevations finds its range without walking
+            the segments
+        @param sample_frequency_distances_between_coordinates: List of tuples where the tuple[0] represents the number of points used (tuple[0]-1 represents 
+            the number of intervals) and tuple[1] represents the interval distance (distance between polyline points). The i-th element/tuple in the list 
+            represents the data for between coordinates n and n+1
+        @return: numpy array where the i-th entry is the index of coordinate i in the x-values and y-values
+        """
+        intervals = np.array([sample_frequency[0] - 1 for sample_frequency in sample_frequency_distances_between_coordinates], dtype=np.int64)
+        return np.concatenate(([0], np.cumsum(intervals)))
         
 
 
@@ -262,7 +301,6 @@ class RouteElevation():
         @return: List of numbers that represents the x-values (distances) from start_point to end_point
         @return:List of numbers that represents the y-values (elevations) from start_point to end_point
         """
-        sample_distances_between_coordinates = self._sample_distances_between_coordinates
         x_axis_distance = self._x_axis_distance
         y_axis_elevations = self._y_axis_elevations
         points = [*filter(lambda point: point is not None, [start_point, end_point])]
@@ -279,18 +317,32 @@ class RouteElevation():
             assert start_point < end_point, "start_point must be less than end_point"
             start_point, end_point = points
 
-            end_index = -1 * end_point
-            for i in range(end_point):
-                end_index += sample_distances_between_coordinates[i][0]
-
-            start_index = -1 * start_point
-            for i in range(start_point):
-                start_index += sample_distances_between_coordinates[i][0]
+            start_index = self._segment_start_indexes[start_point]
+            end_index = self._segment_start_indexes[end_point]
 
             return x_axis_distance[start_index:end_index+1], y_axis_elevations[start_index:end_index+1]
 
 
 
+    def get_elevations_between(self, start_distance: float, end_distance: float):
+        """
+        Gets the distance and elevation values between 2 distances along the route (e.g. the next 10km from the car's position)
+            - The range is found with a binary search on the distances and returned as (read only) views of the object's arrays,
+              so a query costs O(log n) no matter how long the route or the range is
+        @param start_distance: The distance (in meters, including the offset) to start getting elevations from
+        @param end_distance: The distance (in meters, including the offset) to stop getting elevations from (inclusive)
+        @return: numpy array of the x-values (distances) from start_distance to end_distance
+        @return: numpy array of the y-values (elevations) from start_distance to end_distance
+        """
+        if start_distance > end_distance:
+            raise ValueError("start_distance must be less than or equal to end_distance")
+
+        start_index = np.searchsorted(self._distance_array, start_distance, side="left")
+        end_index = np.searchsorted(self._distance_array, end_distance, side="right")
+        return self._distance_array[start_index:end_index], self._elevation_array[start_index:end_index]
+
+
+
     def get_dataframe(self, start_point: int = None, end_point: int = None):
         """
         Builds the distance and elevation values in a dataframe for the user to use
@@ -307,29 +359,49 @@ class RouteElevation():
                 
 
 
-    def plot_elevations(self, start_point: int = None, end_point: int = None):
+    def get_level_of_detail(self):
+        """
+        Gets the levels of detail of the distance and elevation values (built the first time they are needed), which are used
+            to plot any part of a long route with a bounded number of points
+        @return: LevelOfDetail object
+        """
+        if self._level_of_detail is None:
+            self._level_of_detail = LevelOfDetail(self._distance_array, self._elevation_array)
+        return self._level_of_detail
+
+
+
+    def plot_elevations(self, start_point: int = None, end_point: int = None, max_points: int = 2000):
         """
         Plots the distance and elevation values for the user
             - If both params are None, plots all the distances and elevations for all the coordinates
+            - Long ranges are downsampled to max_points (keeping the peaks and valleys) so they plot quickly
         @param start_point (optional): The starting coordinate to start plotting elevations from
         @param end_point (optional): The ending coordinate to stop plotting elevations from
+        @param max_points (optional): The maximum number of distance and elevation values plotted
         """
+        import matplotlib.pyplot as plt
         points = [*filter(lambda point: point is not None, [start_point, end_point])]
 
         if (len(points) != 0 and len(points) != 2):
             raise ValueError("plot_elevations requires 0 or 2 parameters: start_point and end_point (0-indexed)")
 
         else:
-            x_axis_distance, y_axis_elevations = self.get_elevations(start_point, end_point)
             start_index, end_index = start_point or 0, end_point or self._number_of_segment_points - 1
+            assert 0 <= start_index, "start_point must be greater than or equal to 0"
+            assert end_index <= self._number_of_segment_points - 1, f"end_point must be less than {self._number_of_segment_points}"
+            assert start_index < end_index, "start_point must be less than end_point"
+
             x_axis_segments, y_axis_segments = self._x_axis_segments[start_index:end_index+1], self._y_axis_segments[start_index:end_index+1]
+            x_axis_distance, y_axis_elevations = self.get_level_of_detail().window(x_axis_segments[0], x_axis_segments[-1], max_points)
+            datapoints = self._segment_start_indexes[end_index] - self._segment_start_indexes[start_index] + 1
 
             fig, ax = plt.subplots()
             ax.plot(x_axis_distance, y_axis_elevations, zorder=1)
             ax.scatter(x_axis_segments, y_axis_segments, color="red", marker=".", zorder=2)
             for i in range(start_index, end_index+1):
                 ax.annotate(i, (x_axis_segments[i-start_index], y_axis_segments[i-start_index]), horizontalalignment="center")
-            ax.set_title(f"Route Elevation from point {start_index} to {end_index} ({len(x_axis_distance)} datapoints)")
+            ax.set_title(f"Route Elevation from point {start_index} to {end_index} ({datapoints} datapoints, {len(x_axis_distance)} plotted)")
             ax.set_xlabel("Distance (m)")
             ax.set_ylabel("Elevation (m)")
             # fig.savefig('elevations.png', bbox_inches='tight')
@@ -340,20 +412,26 @@ class RouteElevation():
 
 
 class CoordinateElevation():
-    def __init__(self, coordinates: list, BING_MAPS_API_KEY: str, debug: bool = False):
+    def __init__(self, coordinates: list, BING_MAPS_API_KEY: str, debug: bool = False, cache: ElevationCache = None):
         """
         Initializes a CoordinateElevation object which represents the elevations of each coordinate in coordinates. Builds 
         the elevation data and stores them
         @param coordinates: List of (lat, long) coordinate tuples which represents the route
         @param debug: Set to True if want object to print data upon each step of the algorithm (for debugging purposes). Else, False
+        @param cache (optional): ElevationCache to look elevations up in first. Only the coordinates missing from the cache are
+            requested from the API (and then saved into the cache)
         @return: CoordinateElevation object
         """
         self._coordinates = coordinates
         self._number_of_coordinates = len(coordinates)
 
         self._debug = debug
+        self._cache = cache
         self._compressed_coordinates_lst = None
         self._elevation_data = None
+        self._trip_distances = None
+        self._elevation_array = None
+        self._level_of_detail = None
 
         self.BING_MAPS_API_KEY = BING_MAPS_API_KEY
         self.build_elevations()
@@ -365,8 +443,48 @@ class CoordinateElevation():
         Builds the elevation data and stores them in the class object. This method is ran upon object initialization.
         - Step-by-step process of what the algorithm is doing under the hood
         """
-        self._compressed_coordinates_lst = self.compress_coordinates(self._coordinates)
-        self._elevation_data = self.build_elevation_data(self._compressed_coordinates_lst)
+        if self._cache is None:
+            self._compressed_coordinates_lst = self.compress_coordinates(self._coordinates)
+            self._elevation_data = self.build_elevation_data(self._compressed_coordinates_lst)
+        else:
+            self._elevation_data = self.build_cached_elevation_data(self._coordinates)
+
+        self._trip_distances = read_only(self.build_trip_distances(self._coordinates))
+        self._elevation_array = read_only(np.asarray(self._elevation_data))
+
+
+
+    def build_cached_elevation_data(self, coordinates: list):
+        """
+        Looks up the elevations in the cache and requests only the coordinates missing from it (which are then saved into the cache)
+        @param coordinates: List of (lat, long) coordinate tuples which represents the route
+        @return: Returns a list of numbers, where the i-th entry represents the elevation for the i-th coordinates
+        """
+        elevation_data = self._cache.get(coordinates)
+        missing = np.isnan(elevation_data)
+        query_coordinates = [coordinates[i] for i in np.flatnonzero(missing)]
+        if self._debug == True:
+            print("\n-> Cached Elevations\n", f"{len(coordinates) - len(query_coordinates)} hits, {len(query_coordinates)} misses")
+
+        self._compressed_coordinates_lst = self.compress_coordinates(query_coordinates)
+        queried_elevation_data = self.build_elevation_data(self._compressed_coordinates_lst)
+        self._cache.put(query_coordinates, queried_elevation_data)
+
+        elevation_data[missing] = queried_elevation_data
+        return elevation_data.tolist()
+
+
+
+    def build_trip_distances(self, coordinates: list):
+        """
+        Builds the distance along the route (from the first coordinate) of every coordinate, which is sorted so distance range
+            queries can use a binary search
+        @param coordinates: List of (lat, long) coordinate tuples which represents the route
+        @return: numpy array where the i-th entry is the distance (in meters) from the first coordinate to coordinate i
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        _, _, distances = WGS84_GEOD.inv(coordinates[:-1, 1], coordinates[:-1, 0], coordinates[1:, 1], coordinates[1:, 0])
+        return np.concatenate(([0], np.cumsum(distances)))
 
 
 
@@ -381,29 +499,7 @@ class CoordinateElevation():
         compressed_coordinates_lst = []
 
         for coordinate_lst in split_coordinates:
-            latitude = 0
-            longitude = 0
-            compressed_coordinates = ""
-
-            for coordinate in coordinate_lst:
-                newLatitude = round(coordinate[0] * 100000)
-                newLongitude = round(coordinate[1] * 100000)
-
-                dy = newLatitude - latitude
-                dx = newLongitude - longitude
-                latitude = newLatitude
-                longitude = newLongitude
-
-                dy = (dy << 1) ^ (dy >> 31)
-                dx = (dx << 1) ^ (dx >> 31)
-
-                index = int(((dy + dx) * (dy + dx + 1) / 2) + dy)
-                while index > 0:
-                    rem = index & 31
-                    index = int((index - rem) / 32)
-                    if index > 0:
-                        rem += 32
-                    compressed_coordinates += "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"[rem]
+            compressed_coordinates = compress_coordinates(coordinate_lst)
 
             if self._debug == True:
                 print("\n-> Compressed Coordinates\n", compressed_coordinates)
@@ -470,6 +566,25 @@ class CoordinateElevation():
 
 
 
+    def get_elevations_between(self, start_distance: float, end_distance: float):
+        """
+        Gets the trip distance and elevation values between 2 distances along the route (e.g. the next 10km from the car's position)
+            - The range is found with a binary search on the trip distances and returned as (read only) views of the object's
+              arrays, so a query costs O(log n) no matter how long the route or the range is
+        @param start_distance: The distance (in meters from the first coordinate) to start getting elevations from
+        @param end_distance: The distance (in meters from the first coordinate) to stop getting elevations from (inclusive)
+        @return: numpy array of the trip distances of the coordinates from start_distance to end_distance
+        @return: numpy array of the elevations of the coordinates from start_distance to end_distance
+        """
+        if start_distance > end_distance:
+            raise ValueError("start_distance must be less than or equal to end_distance")
+
+        start_index = np.searchsorted(self._trip_distances, start_distance, side="left")
+        end_index = np.searchsorted(self._trip_distances, end_distance, side="right")
+        return self._trip_distances[start_index:end_index], self._elevation_array[start_index:end_index]
+
+
+
     def get_dataframe(self, start_point: int = None, end_point: int = None):
         """
         Builds the coordinates and elevation values in a dataframe for the user to use
@@ -491,17 +606,42 @@ class CoordinateElevation():
 
 
 
-    def plot_elevations(self, start_point: int = None, end_point: int = None):
+    def get_level_of_detail(self):
+        """
+        Gets the levels of detail of the coordinate index and elevation values (built the first time they are needed), which
+            are used to plot any part of a long route with a bounded number of points
+        @return: LevelOfDetail object
+        """
+        if self._level_of_detail is None:
+            self._level_of_detail = LevelOfDetail(np.arange(self._number_of_coordinates), self._elevation_array)
+        return self._level_of_detail
+
+
+
+    def plot_elevations(self, start_point: int = None, end_point: int = None, max_points: int = 2000):
         """
         Plots the coordinate index and elevation values for the user
             - If both params are None, plots all the distances and elevations for all the coordinates
+            - Long ranges are downsampled to max_points (keeping the peaks and valleys) so they plot quickly
         @param start_point (optional): The starting coordinate index to start getting elevations from
         @param end_point (optional): The ending coordinate index to stop getting elevations from
+        @param max_points (optional): The maximum number of elevation values plotted
         """
-        coordinates, elevations = self.get_elevations(start_point, end_point)
+        import matplotlib.pyplot as plt
+        points = [*filter(lambda point: point is not None, [start_point, end_point])]
+
+        if (len(points) != 0 and len(points) != 2):
+            raise ValueError("plot_elevations requires 0 or 2 parameters: start_point and end_point (0-indexed)")
+
+        start_index, end_index = start_point or 0, end_point or self._number_of_coordinates - 1
+        assert 0 <= start_index, "start_point must be greater than or equal to 0"
+        assert end_index <= self._number_of_coordinates - 1, f"end_point must be less than {self._number_of_coordinates}"
+        assert start_index < end_index, "start_point must be less than end_point"
+
+        indexes, elevations = self.get_level_of_detail().window(start_index, end_index, max_points)
         fig, ax = plt.subplots()
-        ax.plot(elevations)
-        ax.set_title(f"Route Elevation from point {start_point} to {end_point} ({len(elevations)} datapoints)")
+        ax.plot(indexes, elevations)
+        ax.set_title(f"Route Elevation from point {start_point} to {end_point} ({end_index - start_index + 1} datapoints, {len(elevations)} plotted)")
         ax.set_ylabel("Elevation (m)")
         ax.set_xlabel("Coordinate Index")
         ax.set_xticks([])
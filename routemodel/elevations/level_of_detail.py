@@ -0,0 +1,167 @@
+import numpy as np
+
+
+
+
+DOWNSAMPLING_METHODS = ["minmax", "lttb"]
+
+
+def min_max_indexes(y: np.ndarray, max_points: int):
+    """
+    min_max_indexes downsamples a series by splitting it into equal buckets and keeping the lowest and highest point of each
+        bucket (and the first and last points), so every peak and valley that is visible in a plot is kept
+    @param y: numpy array of the values
+    @param max_points: maximum number of points to keep (at least 4)
+    @return: sorted numpy array of the indexes of the points kept
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    interior = np.asarray(y[1:-1], dtype=np.float64)
+    bucket_size = int(np.ceil(len(interior) / ((max_points - 2) // 2)))
+    buckets = int(np.ceil(len(interior) / bucket_size))
+    padding = buckets * bucket_size - len(interior)
+
+    lows = np.pad(interior, (0, padding), constant_values=np.inf).reshape(buckets, bucket_size)
+    highs = np.pad(interior, (0, padding), constant_values=-np.inf).reshape(buckets, bucket_size)
+    bucket_starts = 1 + np.arange(buckets) * bucket_size
+    kept = np.concatenate(([0, n - 1], bucket_starts + lows.argmin(axis=1), bucket_starts + highs.argmax(axis=1)))
+    return np.unique(kept)
+
+
+def lttb_indexes(x: np.ndarray, y: np.ndarray, max_points: int):
+    """
+    lttb_indexes downsamples a series with the Largest-Triangle-Three-Buckets algorithm, which keeps the point of each bucket
+        that forms the largest triangle with the point kept in the previous bucket and the average of the next bucket
+    - https://skemman.is/bitstream/1946/15343/3/SS_MSthesis.pdf
+    @param x: sorted numpy array of the x-values
+    @param y: numpy array of the y-values
+    @param max_points: maximum number of points to keep (at least 3)
+    @return: sorted numpy array of the indexes of the points kept
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64) # max_points - 2 buckets between the first and last points
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        previous = kept[bucket]
+
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        kept[bucket + 1] = start + int(np.argmax(areas))
+    return kept
+
+
+class LevelOfDetail():
+    def __init__(self, x, y, method: str = "minmax", factor: int = 4, min_points: int = 1000):
+        """
+        LevelOfDetail keeps downsampled copies (levels) of a series for plotting. Level i has about factor^i times fewer points
+            than the series, and each level is only computed the first time a zoom range needs it. A window of the series is
+            drawn from the most detailed level that fits in the number of points asked for, so redrawing any window of a long
+            series costs O(log n + max_points)
+        @param x: sorted array of the x-values (e.g. distances)
+        @param y: array of the y-values (e.g. elevations)
+        @param method: "minmax" (keeps the lowest and highest point of every bucket, so no peak or valley is lost) or "lttb"
+        @param factor: reduction in the number of points from 1 level to the next
+        @param min_points: number of points below which no coarser level is made
+        @return: LevelOfDetail object
+        """
+        if method not in DOWNSAMPLING_METHODS:
+            raise ValueError(f"method must be one of {DOWNSAMPLING_METHODS}")
+        if len(x) != len(y):
+            raise ValueError("LevelOfDetail requires the same number of x-values and y-values")
+
+        self._x = np.asarray(x)
+        self._y = np.asarray(y)
+        self._method = method
+        self._factor = factor
+        self._min_points = min_points
+        self._levels = {0: (self._x, self._y)}
+
+        self.number_of_levels = 1
+        while len(self._x) / factor ** self.number_of_levels >= min_points:
+            self.number_of_levels += 1
+
+
+    def downsample(self, x: np.ndarray, y: np.ndarray, max_points: int):
+        """
+        downsample: downsamples a series with the object's method
+        @param x: sorted numpy array of the x-values
+        @param y: numpy array of the y-values
+        @param max_points: maximum number of points to keep
+        @return: numpy array of the x-values kept
+        @return: numpy array of the y-values kept
+        """
+        if self._method == "minmax":
+            kept = min_max_indexes(y, max(max_points, 4))
+        else:
+            kept = lttb_indexes(x, y, max(max_points, 3))
+        return x[kept], y[kept]
+
+
+    def level(self, level: int):
+        """
+        level: gets (and caches) a level of detail of the series
+        @param level: 0 for the full series, up to number_of_levels - 1 for the coarsest level
+        @return: numpy array of the x-values of the level
+        @return: numpy array of the y-values of the level
+        """
+        if level not in self._levels:
+            self._levels[level] = self.downsample(self._x, self._y, int(np.ceil(len(self._x) / self._factor ** level)))
+        return self._levels[level]
+
+
+    def window(self, start_x: float = None, end_x: float = None, max_points: int = 2000):
+        """
+        window: gets the points of the series between 2 x-values, from the most detailed level that has at most max_points
+            points in the window
+        @param start_x (optional): the x-value to start the window from (the start of the series if None)
+        @param end_x (optional): the x-value to end the window at, inclusive (the end of the series if None)
+        @param max_points: maximum number of points returned
+        @return: numpy array of the x-values in the window
+        @return: numpy array of the y-values in the window
+        """
+        start_x = self._x[0] if start_x is None else start_x
+        end_x = self._x[-1] if end_x is None else end_x
+
+        # The window's size at level 0 gives a first guess of the level, which is then refined with the actual level sizes
+        window_points = np.searchsorted(self._x, end_x, side="right") - np.searchsorted(self._x, start_x, side="left")
+        level = 0 if window_points <= max_points else int(np.ceil(np.log(window_points / max_points) / np.log(self._factor)))
+        level = min(level, self.number_of_levels - 1)
+
+        while True:
+            x, y = self.level(level)
+            start, end = np.searchsorted(x, start_x, side="left"), np.searchsorted(x, end_x, side="right")
+            if end - start <= max_points:
+                return x[start:end], y[start:end]
+            if level == self.number_of_levels - 1:
+                return self.downsample(x[start:end], y[start:end], max_points)
+            level += 1
+
+
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: a 500k point elevation profile, full route then a sliding 10km window
+    distances = np.arange(500000) * 25.0
+    elevations = 200 + 50 * np.sin(distances / 20000) + np.random.default_rng(0).normal(0, 2, len(distances))
+
+    t0 = time.perf_counter()
+    level_of_detail = LevelOfDetail(distances, elevations)
+    level_of_detail.window(max_points=2000)
+    t1 = time.perf_counter()
+    for start in range(0, 10000000, 100000):
+        level_of_detail.window(start, start + 10000, max_points=2000)
+    t2 = time.perf_counter()
+    print(f"full route: {t1 - t0:.4f}s, 100 windows: {t2 - t1:.4f}s")
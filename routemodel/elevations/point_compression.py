@@ -0,0 +1,198 @@
+import numpy as np
+
+
+
+
+SAFE_CHARACTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+SAFE_CHARACTER_CODES = np.frombuffer(SAFE_CHARACTERS.encode("ascii"), dtype=np.uint8)
+SAFE_CHARACTER_VALUES = np.full(256, -1, dtype=np.int64)
+SAFE_CHARACTER_VALUES[SAFE_CHARACTER_CODES] = np.arange(len(SAFE_CHARACTERS))
+MAX_DIGITS = 13 # 5 bit digits that cover every int64 index
+
+
+def pairing_indexes(coordinates: np.ndarray, deltas: bool = True):
+    """
+    pairing_indexes is a function that computes the Cantor pairing index of the zig-zag encoded latitude and longitude of
+        every coordinate (the integer that is written in base 64 for each coordinate)
+    @param coordinates: an (n, 2) array of latitudes and longitudes
+    @param deltas: True to encode each coordinate relative to the one before it (as in a query string), False to encode every
+        coordinate on its own (as the first coordinate of a query string)
+    @return: np.array of the index of each coordinate
+    """
+    quantized = np.rint(coordinates * 100000).astype(np.int64)
+    if deltas:
+        quantized = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    zigzag = (quantized << 1) ^ (quantized >> 63)
+    dy, dx = zigzag[:, 0], zigzag[:, 1]
+    return (dy + dx) * (dy + dx + 1) // 2 + dy
+
+
+def digit_counts(indexes: np.ndarray):
+    """
+    digit_counts is a function that counts the base 64 characters needed for each index (at least 1)
+    @param indexes: np.array of pairing indexes
+    @return: np.array of the number of characters of each index
+    """
+    counts = np.ones(len(indexes), dtype=np.int64)
+    for digit in range(1, MAX_DIGITS):
+        counts += (indexes >> (5 * digit)) > 0
+    return counts
+
+
+def encoded_lengths(coordinates):
+    """
+    encoded_lengths is a function that computes how many characters each coordinate takes in a compressed query string
+    @param coordinates: a list of coordinate tuples (or an (n, 2) array of latitudes and longitudes)
+    @return: np.array of the length of each coordinate after the coordinate before it
+    @return: np.array of the length of each coordinate when it is the first coordinate of a query string
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    return digit_counts(pairing_indexes(coordinates)), digit_counts(pairing_indexes(coordinates, deltas=False))
+
+
+def compress_coordinates(coordinates) -> str:
+    """
+    compress_coordinates is a function that compresses a list of coordinates into 1 query string for the Bing Maps API. The
+        zig-zag deltas and Cantor pairing indexes of every coordinate are computed as numpy integer arrays and the base 64
+        digits are written into a preallocated buffer, so the time is linear in the number of coordinates
+    - https://learn.microsoft.com/en-us/bingmaps/rest-services/elevations/point-compression-algorithm
+    - Unlike compress_coordinates_reference, a coordinate equal to the one before it is encoded as "A" instead of nothing
+        so every coordinate still gets an elevation
+    @param coordinates: a list of coordinate tuples (or an (n, 2) array of latitudes and longitudes)
+    @return: the compressed coordinates string
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if len(coordinates) == 0:
+        return ""
+
+    indexes = pairing_indexes(coordinates)
+    counts = digit_counts(indexes)
+    starts = np.cumsum(counts) - counts
+
+    buffer = np.empty(int(counts.sum()), dtype=np.uint8)
+    for digit in range(int(counts.max())):
+        has_digit = counts > digit
+        values = (indexes[has_digit] >> (5 * digit)) & 31
+        values += 32 * (counts[has_digit] > digit + 1) # continuation bit on every digit but the last
+        buffer[starts[has_digit] + digit] = SAFE_CHARACTER_CODES[values]
+
+    return buffer.tobytes().decode("ascii")
+
+
+def plan_chunks(coordinates, max_length: int, max_points: int = 1024) -> list:
+    """
+    plan_chunks is a function that splits coordinates into as few query strings as possible. Each chunk takes as many
+        coordinates as fit in max_length compressed characters (using the actual length of each coordinate, which is short
+        for the small deltas of a dense route) and max_points coordinates
+    @param coordinates: a list of coordinate tuples (or an (n, 2) array of latitudes and longitudes)
+    @param max_length: maximum number of characters in the compressed coordinates string of a chunk
+    @param max_points: maximum number of coordinates in a chunk
+    @return: list of the (start, end) coordinate indexes of each chunk (end excluded)
+    """
+    delta_lengths, absolute_lengths = encoded_lengths(coordinates)
+    if (absolute_lengths > max_length).any():
+        raise ValueError(f"max_length ({max_length}) is too short for a single coordinate")
+
+    # cumulative_lengths[i] is the length of coordinates [0, i) encoded as deltas
+    cumulative_lengths = np.concatenate(([0], np.cumsum(delta_lengths)))
+    chunks = []
+    start = 0
+    while start < len(delta_lengths):
+        # The chunk [start, end) is absolute_lengths[start] + cumulative_lengths[end] - cumulative_lengths[start + 1] long
+        budget = max_length - absolute_lengths[start] + cumulative_lengths[start + 1]
+        end = int(np.searchsorted(cumulative_lengths, budget, side="right")) - 1
+        end = min(end, start + max_points, len(delta_lengths))
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def decompress_coordinates(compressed_coordinates: str) -> list:
+    """
+    decompress_coordinates is a function that decodes a compressed coordinates string back into coordinates (the inverse
+        of compress_coordinates, to 1e-5 degrees)
+    - https://learn.microsoft.com/en-us/bingmaps/rest-services/elevations/point-compression-algorithm
+    @param compressed_coordinates: the compressed coordinates string
+    @return: a list of coordinate tuples
+    """
+    values = SAFE_CHARACTER_VALUES[np.frombuffer(compressed_coordinates.encode("ascii"), dtype=np.uint8)]
+    if (values < 0).any():
+        raise ValueError("compressed_coordinates has characters that are not used by the point compression algorithm")
+    if len(values) == 0:
+        return []
+    if values[-1] >= 32:
+        raise ValueError("compressed_coordinates ends in the middle of a coordinate")
+
+    # Every coordinate ends with the first digit without a continuation bit
+    ends = np.flatnonzero(values < 32)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    digits = np.arange(len(values)) - np.repeat(starts, ends - starts + 1)
+    indexes = np.add.reduceat((values & 31) << (5 * digits), starts)
+
+    # Invert the Cantor pairing of (dy, dx) (the float square root is corrected for indexes above 2^53)
+    diagonals = ((np.sqrt(8 * indexes.astype(np.float64) + 1) - 1) // 2).astype(np.int64)
+    diagonals -= diagonals * (diagonals + 1) // 2 > indexes
+    diagonals += (diagonals + 1) * (diagonals + 2) // 2 <= indexes
+    dy = indexes - diagonals * (diagonals + 1) // 2
+    dx = diagonals - dy
+
+    # Invert the zig-zag encoding and the deltas
+    latitudes = np.cumsum((dy >> 1) ^ -(dy & 1)) / 100000
+    longitudes = np.cumsum((dx >> 1) ^ -(dx & 1)) / 100000
+    return list(zip(latitudes.tolist(), longitudes.tolist()))
+
+
+def compress_coordinates_reference(coordinates: list) -> str:
+    """
+    compress_coordinates_reference is the original 1 coordinate at a time implementation of compress_coordinates. It is
+        kept as a reference for the tests and benchmark
+    @param coordinates: a list of coordinate tuples
+    @return: the compressed coordinates string
+    """
+    latitude = 0
+    longitude = 0
+    compressed_coordinates = ""
+
+    for coordinate in coordinates:
+        newLatitude = round(coordinate[0] * 100000)
+        newLongitude = round(coordinate[1] * 100000)
+
+        dy = newLatitude - latitude
+        dx = newLongitude - longitude
+        latitude = newLatitude
+        longitude = newLongitude
+
+        dy = (dy << 1) ^ (dy >> 31)
+        dx = (dx << 1) ^ (dx >> 31)
+
+        index = int(((dy + dx) * (dy + dx + 1) / 2) + dy)
+        while index > 0:
+            rem = index & 31
+            index = int((index - rem) / 32)
+            if index > 0:
+                rem += 32
+            compressed_coordinates += SAFE_CHARACTERS[rem]
+
+    return compressed_coordinates
+
+
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: 150k coordinates of a ~25m interval route (without repeated coordinates, which the 2 encoders encode differently)
+    rng = np.random.default_rng(0)
+    steps = rng.uniform(0.0001, 0.0003, size=(150000, 2)) * rng.choice([-1, 1], size=(150000, 2))
+    coordinates = (np.array([43.47, -80.54]) + np.cumsum(steps, axis=0)).tolist()
+
+    t0 = time.perf_counter()
+    compressed_coordinates = compress_coordinates(coordinates)
+    t1 = time.perf_counter()
+    compressed_coordinates_reference = compress_coordinates_reference(coordinates)
+    t2 = time.perf_counter()
+    decompress_coordinates(compressed_coordinates)
+    t3 = time.perf_counter()
+
+    assert compressed_coordinates == compressed_coordinates_reference
+    print(f"compress_coordinates: {t1 - t0:.4f}s, compress_coordinates_reference: {t2 - t1:.4f}s, decompress_coordinates: {t3 - t2:.4f}s")
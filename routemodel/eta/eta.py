@@ -2,16 +2,21 @@ import sys
 import os.path
 sys.path.append(os.path.dirname(sys.path[0]))
 
-import geopy
 from geopy.distance import distance as geodist
 from geographiclib.geodesic import Geodesic
 from routemodel.routemodel import RouteModel
+from eta.route_index import RouteIndex
+from eta.route_tracker import RouteTracker
+import numpy as np
 import pandas as pd
 
 # Extra dependencies for Ryan's get_coordinates method
 from pyproj import Geod
 import math
 
+WGS84_GEOD = Geod(ellps="WGS84")
+GEOFENCE_COLUMNS = ["south", "north", "west", "east"] # column order of the geofence box arrays
+
 def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd.DataFrame:
     """
     get_coordinates is a function that consumes a polygonal chain representation of a route and returns an interpolated route
@@ -224,7 +229,13 @@ class ETA():
         self.route = route
 
         self.route_model = get_coordinates(polyline_coordinates=route, interval_upper_bound=25)
+        self.route_index = RouteIndex(self.route_model['latitude'].to_numpy(), self.route_model['longitude'].to_numpy())
+        self.route_tracker = RouteTracker(
+            self.route_model['latitude'].to_numpy(), self.route_model['longitude'].to_numpy(), self.route_model['trip(m)'].to_numpy(), self.route_index
+            )
         self.checkpoint_frequency = 1000 # meters
+        self.checkpoint_sets = {} # {freq: checkpoints}, see build_checkpoints
+        self.geofence_size = 300 # meters from the checkpoint to each side of its geofence box, see geofence_size
         self.generate_checkpoints(self.checkpoint_frequency)
         self.current_checkpoint = 0
 
@@ -247,30 +258,70 @@ class ETA():
 
         return distance_between_coordinates
     
+    @property
+    def geofence_size(self):
+        return self._geofence_size
+
+    @geofence_size.setter
+    def geofence_size(self, geofence_size):
+        """
+        Sets the geofence size and rebuilds the geofence boxes of the current checkpoints (the boxes of other frequencies in 
+        checkpoint_sets are rebuilt when build_checkpoints next uses them)
+        @param geofence_size: meters from the checkpoint to each side of its geofence box
+        """
+        self._geofence_size = geofence_size
+        if hasattr(self, "checkpoint_geofences"):
+            self.checkpoint_geofences = self.build_checkpoints([self.checkpoint_frequency])[self.checkpoint_frequency]["geofences"]
+
+    def build_checkpoints(self, freqs):
+        """
+        Builds the checkpoints for one or more checkpoint frequencies from the route's trip distances without looping over 
+        the route. Results are cached in checkpoint_sets so switching between frequencies does not recompute them (the 
+        geofence boxes are rebuilt if geofence_size has changed since they were built)
+        @param freqs: list of distances in meters between each generated checkpoint, e.g. [250, 1000, 5000]
+        @return: dictionary of {freq: {"checkpoint": np.array of the checkpoint number of every route model point,
+            "checkpoint_index": np.array of the route model index of every checkpoint, 
+            "geofences": np.array of the geofence box of every checkpoint (see build_geofences),
+            "geofence_size": the geofence_size the boxes were built with}}
+        """
+        trip = self.route_model['trip(m)'].to_numpy()
+        latitudes = self.route_model['latitude'].to_numpy()
+        longitudes = self.route_model['longitude'].to_numpy()
+        for freq in freqs:
+            if freq not in self.checkpoint_sets:
+                checkpoint = (trip // freq).astype(np.int64) # the last checkpoint passed for any given route model point
+                checkpoint_index = np.flatnonzero(np.concatenate(([True], checkpoint[1:] != checkpoint[:-1])))
+                self.checkpoint_sets[freq] = {
+                    "checkpoint": checkpoint,
+                    "checkpoint_index": checkpoint_index,
+                    }
+            checkpoints = self.checkpoint_sets[freq]
+            if checkpoints.get("geofence_size") != self.geofence_size:
+                checkpoint_index = checkpoints["checkpoint_index"]
+                checkpoints["geofences"] = self.build_geofences(latitudes[checkpoint_index], longitudes[checkpoint_index])
+                checkpoints["geofence_size"] = self.geofence_size
+
+        return {freq: self.checkpoint_sets[freq] for freq in freqs}
+
     def generate_checkpoints(self, freq):
         """
         Generates 'checkpoints' which are {freq} meters apart where weather and other API calls can be made from
         @param freq: the distance in meters between each generated checkpoint
         @return: List of coordinates representing each of the checkpoints
         """
+        checkpoints = self.build_checkpoints([freq])[freq]
+        checkpoint_index = checkpoints["checkpoint_index"]
+
+        self.checkpoint_frequency = freq
+        self.checkpoint_index = checkpoint_index.tolist()
+        self.checkpoint_coords = np.column_stack((
+            self.route_model['latitude'].to_numpy()[checkpoint_index],
+            self.route_model['longitude'].to_numpy()[checkpoint_index]
+            )).tolist()
+        self.checkpoint_trip = self.route_model['trip(m)'].to_numpy()[checkpoint_index]
+        self.checkpoint_geofences = checkpoints["geofences"]
+        self.route_model['checkpoint'] = checkpoints["checkpoint"]
 
-        self.checkpoint_coords = [] 
-        self.checkpoint_index = []
-        checkpoint = [] # Stores the index of the last checkpoint passed for any given route model point
-
-        lst_checkpoint = -1
-
-        for index, row in self.route_model.iterrows():
-            cur_checkpoint = int(row['trip(m)'] // freq)
-            if cur_checkpoint != lst_checkpoint: 
-                self.checkpoint_coords.append([row['latitude'], row['longitude']])
-                self.checkpoint_index.append(index)
-            
-            checkpoint.append(cur_checkpoint)
-            lst_checkpoint = cur_checkpoint
-
-        self.route_model['checkpoint'] = checkpoint
-        
         return self.checkpoint_coords
 
     def update_location(self):
@@ -289,37 +340,94 @@ class ETA():
 
     def check_geofence(self, clat, clon, plat, plon):
         '''
-        Checks if the given lat/lon is within a 600m box of a specified point
+        Checks if the given lat/lon is within the geofence box (geofence_size meters north, south, east and west) of a specified 
+        point. The box is built with build_geofences, use in_geofences for the checkpoints whose boxes are already built
         '''
-        wb = geodist(kilometers = 0.3).destination(point=geopy.Point(plat, plon), bearing = 270).longitude
-        sb = geodist(kilometers = 0.3).destination(point=geopy.Point(plat, plon), bearing = 180).latitude
-        eb = geodist(kilometers = 0.3).destination(point=geopy.Point(plat, plon), bearing = 90).longitude
-        nb = geodist(kilometers = 0.3).destination(point=geopy.Point(plat, plon), bearing = 0).latitude
+        south, north, west, east = self.build_geofences([plat], [plon])[0]
+        return bool((south < clat) and (clat < north) and (west < clon) and (clon < east))
 
-        c1 = (sb < clat) and (clat < nb)
-        c2 = (wb < clon) and (clon < eb)
-
-        return (c1 and c2)
+    def build_geofences(self, latitudes, longitudes):
+        '''
+        Builds the geofence box (a box stretching geofence_size meters north, south, east and west) of every given point 
+        with one batched geodesic calculation
+        @param latitudes: np.array of the latitudes of the points
+        @param longitudes: np.array of the longitudes of the points
+        @return: np.array of shape (n, 4) with the [south, north, west, east] bounds of each box (see GEOFENCE_COLUMNS)
+        '''
+        n = len(latitudes)
+        bearings = np.tile([180, 0, 270, 90], n) # same order as GEOFENCE_COLUMNS
+        lons, lats, _ = WGS84_GEOD.fwd(np.repeat(longitudes, 4), np.repeat(latitudes, 4), bearings, np.full(4*n, float(self.geofence_size)))
+        lats = lats.reshape(n, 4)
+        lons = lons.reshape(n, 4)
+        return np.column_stack((lats[:, 0], lats[:, 1], lons[:, 2], lons[:, 3]))
+
+    def in_geofences(self, lat, lon, checkpoints = None):
+        '''
+        Checks if the given lat/lon is within the geofence box of each checkpoint, using the boxes built with the checkpoints
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param checkpoints: list of the checkpoints to check, every checkpoint is checked if not provided
+        @return: np.array of booleans, True where the lat/lon is inside the checkpoint's geofence
+        '''
+        geofences = self.checkpoint_geofences if checkpoints is None else self.checkpoint_geofences[checkpoints]
+        south, north, west, east = geofences.T
+        return (south < lat) & (lat < north) & (west < lon) & (lon < east)
 
-    def find_closest_point(self, lat, lon):
+    def geofence_hits(self, latitudes, longitudes, chunk_size = 4096):
+        '''
+        Checks a whole trace of positions (e.g. a day of GPS logs) against the geofence boxes of all the checkpoints. The trace 
+        is checked chunk_size positions at a time so memory use does not grow with the length of the trace
+        @param latitudes: array of the latitudes of the trace
+        @param longitudes: array of the longitudes of the trace
+        @param chunk_size: number of positions checked against every box at once
+        @return: np.array of the index of every position that is inside a geofence
+        @return: np.array of the checkpoint whose geofence that position is inside (a position appears once per geofence)
+        '''
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        south, north, west, east = self.checkpoint_geofences.T
+
+        position_hits = []
+        checkpoint_hits = []
+        for start in range(0, len(latitudes), chunk_size):
+            lat = latitudes[start:start+chunk_size, np.newaxis]
+            lon = longitudes[start:start+chunk_size, np.newaxis]
+            positions, checkpoints = np.nonzero((south < lat) & (lat < north) & (west < lon) & (lon < east))
+            position_hits.append(positions + start)
+            checkpoint_hits.append(checkpoints)
+
+        if len(position_hits) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(position_hits), np.concatenate(checkpoint_hits)
+
+    def find_closest_point(self, lat, lon, use_index = True):
         '''
         The function takes in a coordinate point (lat/lon) and finds the closest point to it inside the route model 
         @param lat: float representing the latitude
         @param lon: float representing the longitude
+        @param use_index: when True the route's spatial index (see route_index.py) is used, otherwise every point is checked
         @return: a row of the route_model dataframe containing information about the closest point on the race route
         '''
+        if use_index:
+            closest_index, _ = self.route_index.nearest(lat, lon)
+            return self.route_model.iloc[closest_index]
 
         distances = self.route_model.apply(lambda row: geodist((lat, lon), (row['latitude'], row['longitude'])).meters, axis=1)
         return self.route_model.iloc[distances.idxmin()]
 
-    def update_checkpoint(self, lat = None, lon = None, full_scan = True):
+    def update_checkpoint(self, lat = None, lon = None, full_scan = True, incremental = False, speed = None, timestamp = None):
         '''
         update_checkpoint() is a function that determines which segment of the race the car is on based on the current lat/lon.
-        When full_scan == true, a brute force method is used to check for the closest point.
+        When full_scan == true, the closest point on the whole route is found using the route's spatial index.
+        When incremental == true, the route tracker only searches the part of the route just ahead of the last matched point
+        (see route_tracker.py), which is the cheapest option for frequent location updates.
 
         @param lat: float representing the latitude, an automatic location update is done if it is not provided
         @param lon: float representing the longitude, an automatic location update is done if it is not provided
         @param full_scan: boolean that determines which method is used to update the checkpoint
+        @param incremental: boolean, when True the route tracker is used (full_scan is ignored)
+        @param speed: speed of the car in m/s, only used when incremental is True (sizes the search window)
+        @param timestamp: time of the location in seconds, only used when incremental is True (current time if not provided)
         '''
         # If update racepoint is called with lat/lon given
         if lat and lon:
@@ -328,8 +436,13 @@ class ETA():
         else:
             self.update_location()
 
-        # Brute Force on larger points dataset
-        if full_scan:
+        # Closest point just ahead of the last matched point
+        if incremental:
+            closest_index = self.route_tracker.update(self.lat, self.lon, speed=speed, timestamp=timestamp)
+            self.current_checkpoint = self.route_model['checkpoint'].iat[closest_index]
+
+        # Closest point on the whole route
+        elif full_scan:
             closest_point = self.find_closest_point(self.lat, self.lon)
             self.current_checkpoint = closest_point['checkpoint']
             print(self.current_checkpoint)
@@ -337,8 +450,7 @@ class ETA():
         else:
             i = self.current_checkpoint
             if i+1 < len(self.checkpoint_coords):
-                plat, plon = self.checkpoint_coords[i+1]
-                if self.check_geofence(self.lat, self.lon, plat, plon) == True:
+                if self.in_geofences(self.lat, self.lon, [i+1])[0]:
                     self.current_checkpoint = i+1
 
     def get_next_checkpoint_coordinates(self):
@@ -354,37 +466,64 @@ class ETA():
     def get_checkpoints_coordinates(self):
         return self.checkpoints_coords
         
-    def get_eta(self):
+    def get_checkpoint_times(self, speed_profile = None):
+        """
+        Calculates the driving time from the first checkpoint to every checkpoint
+        @param speed_profile: speeds in km/h, either one per checkpoint segment (n-1 values, the i-th value is the speed from 
+            checkpoint i to i+1) or one per route_model point (the i-th value is the speed from point i to i+1, e.g. routebook 
+            speed limits). self.speed is used everywhere if it is not provided
+        @return: np.array of n float values representing the time (in minutes) to reach each checkpoint from the first checkpoint
         """
+        n = len(self.checkpoint_index)
+        if speed_profile is None:
+            # Unit conversion is to put meters into kilometers and time into minutes
+            segment_times = (np.diff(self.checkpoint_trip)/1000) / self.speed * 60
+            return np.concatenate(([0.0], np.cumsum(segment_times)))
+
+        speed_profile = np.asarray(speed_profile, dtype=np.float64)
+        if len(speed_profile) == n-1:
+            segment_times = (np.diff(self.checkpoint_trip)/1000) / speed_profile * 60
+            return np.concatenate(([0.0], np.cumsum(segment_times)))
+
+        if len(speed_profile) == len(self.route_model):
+            point_distances = np.diff(self.route_model['trip(m)'].to_numpy())
+            point_times = np.concatenate(([0.0], np.cumsum((point_distances/1000) / speed_profile[:-1] * 60)))
+            return point_times[self.checkpoint_index]
+
+        raise ValueError(f"speed_profile must have one speed per checkpoint segment ({n-1}) or per route point ({len(self.route_model)})")
+
+    def get_eta(self, speed_profile = None):
+        """
+        Calculates the time to reach every checkpoint in one array operation
+        @param speed_profile: speeds in km/h per checkpoint segment or per route point (see get_checkpoint_times). self.speed 
+            is used everywhere if it is not provided
         @return: a list of float values representing the time it takes to reach the checkpoints
         """
-        
         next_closest_checkpoint = self.current_checkpoint+1
         n = len(self.checkpoint_coords)
-        eta = [-1 for _ in range(n)]
+        eta = np.full(n, -1.0)
 
         if next_closest_checkpoint >= n: 
-            self.eta = eta
+            self.eta = eta.tolist()
             return self.eta
 
-        print(self.route_model)
-
         slat = self.lat
         slon = self.lon
         elat = self.checkpoint_coords[next_closest_checkpoint][0]
         elon = self.checkpoint_coords[next_closest_checkpoint][1]
-
         dist_to_next_checkpoint = geodist((slat, slon), (elat, elon)).meters
-        # Unit conversion is to put meters into kilometers and time into minutes
-        eta[next_closest_checkpoint] =  (dist_to_next_checkpoint/1000) / self.speed * 60 
-
-        for future_checkpoint in range(next_closest_checkpoint+1, n):
-            a = self.checkpoint_index[next_closest_checkpoint]
-            b = self.checkpoint_index[future_checkpoint]
 
+        checkpoint_times = self.get_checkpoint_times(speed_profile)
+        if next_closest_checkpoint > 0:
+            # The car is between the current and next checkpoint, so it covers the remaining distance at that segment's average speed
+            segment_time = checkpoint_times[next_closest_checkpoint] - checkpoint_times[next_closest_checkpoint-1]
+            segment_distance = self.checkpoint_trip[next_closest_checkpoint] - self.checkpoint_trip[next_closest_checkpoint-1]
+            eta_next = dist_to_next_checkpoint * segment_time / segment_distance
+        else:
             # Unit conversion is to put meters into kilometers and time into minutes
-            eta_next_to_future = ((self.route_model.iloc[b].loc['trip(m)'] - self.route_model.iloc[a].loc['trip(m)'])/1000) / self.speed * 60
-            eta[future_checkpoint] = eta[next_closest_checkpoint] + eta_next_to_future
+            eta_next = (dist_to_next_checkpoint/1000) / self.speed * 60
+
+        eta[next_closest_checkpoint:] = eta_next + checkpoint_times[next_closest_checkpoint:] - checkpoint_times[next_closest_checkpoint]
 
-        self.eta = eta
-        return eta
+        self.eta = eta.tolist()
+        return self.eta
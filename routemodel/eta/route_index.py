@@ -0,0 +1,108 @@
+import numpy as np
+from pyproj import Geod
+from scipy.spatial import cKDTree
+
+
+
+
+WGS84_GEOD = Geod(ellps="WGS84")
+WGS84_MIN_RADIUS_OF_CURVATURE = 6335439.327 # meters, meridional radius at the equator (so chord search radii are never too small)
+
+
+def to_unit_vectors(latitudes, longitudes):
+    """
+    to_unit_vectors: converts coordinates into 3D points on the unit sphere (earth-centered, earth-fixed axes)
+    @param latitudes: latitude or array of latitudes (degrees)
+    @param longitudes: longitude or array of longitudes (degrees)
+    @return: np.array of shape (n, 3) with the (x, y, z) unit vector of each coordinate
+    """
+    lat_radians = np.radians(np.atleast_1d(np.asarray(latitudes, dtype=np.float64)))
+    lon_radians = np.radians(np.atleast_1d(np.asarray(longitudes, dtype=np.float64)))
+    cos_lat = np.cos(lat_radians)
+    return np.column_stack((cos_lat * np.cos(lon_radians), cos_lat * np.sin(lon_radians), np.sin(lat_radians)))
+
+
+class RouteIndex():
+    def __init__(self, latitudes, longitudes, refine_candidates: int = 8):
+        """
+        RouteIndex is a spatial index over the points of a route. The points are stored as unit-sphere vectors in a KD-tree,
+            so a nearest point query only looks at O(log n) points instead of every point on the route. The few closest
+            candidates by straight-line (chord) distance are then re-ranked by their exact WGS84 geodesic distance
+        @param latitudes: array of the route's latitudes
+        @param longitudes: array of the route's longitudes
+        @param refine_candidates: number of KD-tree candidates re-ranked by geodesic distance for each query
+        @return: RouteIndex object
+        """
+        self._latitudes = np.asarray(latitudes, dtype=np.float64)
+        self._longitudes = np.asarray(longitudes, dtype=np.float64)
+        if len(self._latitudes) == 0 or len(self._latitudes) != len(self._longitudes):
+            raise ValueError("RouteIndex requires the same (non-zero) number of latitudes and longitudes")
+
+        self._refine_candidates = refine_candidates
+        self._tree = cKDTree(to_unit_vectors(self._latitudes, self._longitudes))
+
+
+    def __len__(self):
+        return len(self._latitudes)
+
+
+    def k_nearest(self, lat: float, lon: float, k: int = 1):
+        """
+        k_nearest: finds the k route points closest to a coordinate
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param k: number of route points to return
+        @return: np.array of the route point indexes, sorted from closest to furthest
+        @return: np.array of the geodesic distances (in meters) to those route points
+        """
+        k = min(k, len(self))
+        candidates = min(max(k, self._refine_candidates), len(self))
+        _, indexes = self._tree.query(to_unit_vectors(lat, lon)[0], k=candidates)
+        indexes = np.atleast_1d(indexes)
+
+        _, _, distances = WGS84_GEOD.inv(
+            np.full(len(indexes), lon, dtype=np.float64), np.full(len(indexes), lat, dtype=np.float64),
+            self._longitudes[indexes], self._latitudes[indexes]
+            )
+        order = np.argsort(distances, kind="stable")[:k]
+        return indexes[order], distances[order]
+
+
+    def within_distance(self, lat: float, lon: float, distance: float):
+        """
+        within_distance: finds every route point within a distance of a coordinate
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param distance: search radius (in meters)
+        @return: np.array of the route point indexes, sorted from closest to furthest
+        @return: np.array of the geodesic distances (in meters) to those route points
+        """
+        chord_radius = 2 * np.sin(min(distance / (2 * WGS84_MIN_RADIUS_OF_CURVATURE), np.pi / 2)) * 1.01
+        indexes = np.asarray(self._tree.query_ball_point(to_unit_vectors(lat, lon)[0], r=chord_radius), dtype=np.int64)
+
+        _, _, distances = WGS84_GEOD.inv(
+            np.full(len(indexes), lon, dtype=np.float64), np.full(len(indexes), lat, dtype=np.float64),
+            self._longitudes[indexes], self._latitudes[indexes]
+            )
+        within = distances <= distance
+        indexes, distances = indexes[within], distances[within]
+        order = np.argsort(distances, kind="stable")
+        return indexes[order], distances[order]
+
+
+    def nearest(self, lat: float, lon: float):
+        """
+        nearest: finds the route point closest to a coordinate
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @return: index of the closest route point
+        @return: geodesic distance (in meters) to the closest route point
+        """
+        indexes, distances = self.k_nearest(lat, lon, k=1)
+        return int(indexes[0]), float(distances[0])
+
+
+
+
+if __name__ == "__main__":
+    pass
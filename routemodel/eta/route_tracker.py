@@ -0,0 +1,137 @@
+import time
+import numpy as np
+from pyproj import Geod
+from eta.route_index import RouteIndex
+
+
+
+
+WGS84_GEOD = Geod(ellps="WGS84")
+
+
+class RouteTracker():
+    def __init__(self, latitudes, longitudes, trip_meters, route_index: RouteIndex = None, max_match_error: float = 50,
+                 max_speed: float = 40, window_margin: float = 100):
+        """
+        RouteTracker matches a stream of location fixes to the route. It remembers the last matched route point and only
+            searches a window of the route ahead of it, sized from the speed and the time since the last fix, so each fix
+            costs O(window) work. The whole route (route_index) is only searched for the first fix or when the best point in
+            the window is further than max_match_error from the fix. Since the window only moves forward along the route,
+            parts of the route that pass near each other (loops) are not mixed up
+        @param latitudes: array of the route's latitudes
+        @param longitudes: array of the route's longitudes
+        @param trip_meters: array of the cumulative trip distance (in meters) at each route point
+        @param route_index: RouteIndex of the route used for global lookups (built from latitudes and longitudes if None)
+        @param max_match_error: distance (in meters) from the route above which the window match is rejected
+        @param max_speed: speed (in m/s) used to size the window when the fix has no speed
+        @param window_margin: distance (in meters) searched around the expected position on top of the distance travelled,
+            which includes a little behind the last matched point to absorb GPS jitter
+        @return: RouteTracker object
+        """
+        self._latitudes = np.asarray(latitudes, dtype=np.float64)
+        self._longitudes = np.asarray(longitudes, dtype=np.float64)
+        self._trip_meters = np.asarray(trip_meters, dtype=np.float64)
+        self._route_index = route_index if route_index is not None else RouteIndex(self._latitudes, self._longitudes)
+
+        self._max_match_error = max_match_error
+        self._max_speed = max_speed
+        self._window_margin = window_margin
+
+        self.last_index = None
+        self.last_error = None
+        self.global_lookups = 0
+        self._last_timestamp = None
+
+
+    def reset(self):
+        """
+        reset: forgets the last match, the next fix will be matched against the whole route
+        """
+        self.last_index = None
+        self.last_error = None
+        self._last_timestamp = None
+
+
+    def update(self, lat: float, lon: float, speed: float = None, timestamp: float = None):
+        """
+        update: matches a location fix to the route
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param speed (optional): speed of the car (in m/s) at the fix, max_speed is assumed if not provided
+        @param timestamp (optional): time of the fix in seconds, the current (monotonic) time is used if not provided
+        @return: index of the matched route point
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        if self.last_index is None:
+            index, error = self.global_match(lat, lon)
+        else:
+            elapsed = max(timestamp - self._last_timestamp, 0)
+            travelled = (self._max_speed if speed is None else speed) * elapsed
+            last_trip = self._trip_meters[self.last_index]
+
+            start = np.searchsorted(self._trip_meters, last_trip - self._window_margin, side="left")
+            end = np.searchsorted(self._trip_meters, last_trip + travelled + self._window_margin, side="right")
+            index, error = self.window_match(lat, lon, start, end)
+
+            if error > self._max_match_error:
+                expected_trip = last_trip + (0 if speed is None else speed * elapsed)
+                index, error = self.global_match(lat, lon, expected_trip)
+
+        self.last_index = index
+        self.last_error = error
+        self._last_timestamp = timestamp
+        return index
+
+
+    def window_match(self, lat: float, lon: float, start: int, end: int):
+        """
+        window_match: finds the closest route point to a coordinate among the route points [start, end)
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param start: first route point index of the window
+        @param end: route point index after the end of the window
+        @return: index of the closest route point in the window
+        @return: geodesic distance (in meters) to that route point
+        """
+        start, end = max(int(start), 0), max(min(int(end), len(self._trip_meters)), int(start) + 1)
+        window_size = end - start
+        _, _, distances = WGS84_GEOD.inv(
+            np.full(window_size, lon, dtype=np.float64), np.full(window_size, lat, dtype=np.float64),
+            self._longitudes[start:end], self._latitudes[start:end]
+            )
+        closest = int(np.argmin(distances))
+        return start + closest, float(distances[closest])
+
+
+    def global_match(self, lat: float, lon: float, expected_trip: float = None):
+        """
+        global_match: finds the route point matching a coordinate using the whole route. When several separate parts of the
+            route (e.g. both directions of an out-and-back) are within max_match_error of the coordinate, the closest point of
+            each part is found and the one closest to expected_trip is used
+        @param lat: float representing the latitude
+        @param lon: float representing the longitude
+        @param expected_trip (optional): the trip distance (in meters) the car is expected to be at
+        @return: index of the matched route point
+        @return: geodesic distance (in meters) to that route point
+        """
+        self.global_lookups += 1
+        indexes, distances = self._route_index.within_distance(lat, lon, self._max_match_error)
+        if expected_trip is None or len(indexes) == 0:
+            return self._route_index.nearest(lat, lon)
+
+        # Split the candidates into runs of consecutive route points and keep the closest point of each run
+        order = np.argsort(indexes)
+        indexes, distances = indexes[order], distances[order]
+        runs = np.split(np.arange(len(indexes)), np.flatnonzero(np.diff(indexes) > 1) + 1)
+        run_closest = np.array([run[np.argmin(distances[run])] for run in runs])
+
+        best = run_closest[np.argmin(np.abs(self._trip_meters[indexes[run_closest]] - expected_trip))]
+        return int(indexes[best]), float(distances[best])
+
+
+
+
+if __name__ == "__main__":
+    pass
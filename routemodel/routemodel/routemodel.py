@@ -1,12 +1,103 @@
 from geographiclib.geodesic import Geodesic
 from pyproj import Geod
-import math
+import numpy as np
 import pandas as pd
 import warnings
 from typing import List, Tuple
 
 
 
+WGS84_GEOD = Geod(ellps="WGS84") # Reused for every batched geodesic calculation
+
+# Categories for the integer coded columns (code -1 means no value, same as pandas.Categorical)
+TURN_TYPES = ["Slight Left", "Slight Right", "Standard Left", "Standard Right", "Hook Left", "Hook Right"]
+GENERAL_TRAVEL_DIRECTIONS = ["N", "E", "S", "W"] + [
+    f"{quadrant[0]}{degrees}{chr(176)}{quadrant[1]}" for quadrant in ["NE", "SE", "SW", "NW"] for degrees in range(91)
+    ]
+
+
+
+class RouteStore():
+
+    FLOAT_COLUMNS = [
+        "latitude",
+        "longitude",
+        "trip_meters",
+        "dist_to_next_coordinate",
+        "true_bearing_to_next",
+        "bearing_to_next_360",
+        "true_bearing_to_prev",
+        "bearing_to_prev_360",
+        "turn_bearing",
+        "relative_turn_angle",
+        ]
+
+    def __init__(self, number_of_points: int):
+        """
+        RouteStore is a compact columnar store for the interpolated route. All float columns live in one contiguous
+            float64 block (one row per column) and the text columns are stored as integer codes, so a route costs
+            ~90 bytes per point and the DataFrame built from it shares the same memory
+        @param number_of_points: number of coordinates in the interpolated route
+        @return: RouteStore object with every value unset (nan for floats, -1 for integer codes)
+        """
+        self._float_data = np.full((len(self.FLOAT_COLUMNS), number_of_points), np.nan, dtype=np.float64)
+        self.polyline_point_index = np.full(number_of_points, -1, dtype=np.int32)
+        self.general_travel_direction_codes = np.full(number_of_points, -1, dtype=np.int16)
+        self.turn_type_codes = np.full(number_of_points, -1, dtype=np.int8)
+
+
+    def __len__(self):
+        return self._float_data.shape[1]
+
+
+    def column(self, name: str):
+        """
+        column: gives a float column of the store without copying
+        @param name: name of the column (see RouteStore.FLOAT_COLUMNS)
+        @return: np.array view of the column, writes to it update the store
+        """
+        return self._float_data[self.FLOAT_COLUMNS.index(name)]
+
+
+    def general_travel_direction(self):
+        """
+        general_travel_direction: gives the general travel direction labels backed by the stored codes (no copy)
+        @return: pandas Categorical of the general traveling direction at each coordinate
+        """
+        return pd.Categorical.from_codes(self.general_travel_direction_codes, categories=GENERAL_TRAVEL_DIRECTIONS)
+
+
+    def turn_type(self):
+        """
+        turn_type: gives the turn type labels backed by the stored codes (no copy)
+        @return: pandas Categorical of the type of turn at each coordinate
+        """
+        return pd.Categorical.from_codes(self.turn_type_codes, categories=TURN_TYPES)
+
+
+    def nbytes(self):
+        """
+        nbytes: memory used by the store
+        @return: number of bytes used by all the stored arrays
+        """
+        return self._float_data.nbytes + self.polyline_point_index.nbytes + self.general_travel_direction_codes.nbytes + self.turn_type_codes.nbytes
+
+
+    def to_dataframe(self):
+        """
+        to_dataframe: builds a DataFrame over the stored arrays. The float columns are a view of the float block and the
+            text columns are categoricals over the stored codes, so no column data is copied
+        @return: DataFrame of the route data
+        """
+        data = pd.DataFrame(self._float_data.T, columns=self.FLOAT_COLUMNS, copy=False)
+        polyline_point_index = pd.arrays.IntegerArray(self.polyline_point_index, self.polyline_point_index < 0)
+        data.insert(0, "polyline_point_index", polyline_point_index)
+        data.insert(data.columns.get_loc("bearing_to_prev_360") + 1, "general_travel_direction", self.general_travel_direction())
+        data.insert(data.columns.get_loc("turn_bearing") + 1, "turn_type", self.turn_type())
+        return data
+
+
+
 class RouteModel():
 
     def __init__(self, coordinate_lst_input: List[Tuple[float]], interval_upper_bound: int = 100):
@@ -17,10 +108,9 @@ class RouteModel():
         self._coordinate_lst_input = coordinate_lst_input
         self._interval_upper_bound = interval_upper_bound
 
-        self._segment_cooridnates = None
+        self._store = None
 
         self._coordinate_point_index = None
-        self._all_coordinates = None
 
         self._latitudes = None
         self._longitudes = None
@@ -52,109 +142,139 @@ class RouteModel():
 
     def build_data(self):
         """
-        build_data: Runs the algorithm
+        build_data: Runs the algorithm. Every stage writes its results into a RouteStore and the attributes below are
+            views of the store's arrays. The DataFrame is only built when get_data() is called
         """
-        self._segment_cooridnates = self.build_segment_cooridnates(self._coordinate_lst_input, self._interval_upper_bound)
-
-        segment_and_coordinate_data = self.build_segment_points(self._segment_cooridnates)
-        self._coordinate_point_index = segment_and_coordinate_data["coordinate_point_index"]
-        self._all_coordinates = segment_and_coordinate_data["all_coordinates"]
-
-        latlon_data = self.build_latitudes_longitudes(self._all_coordinates)
-        self._latitudes = latlon_data["latitudes"]
-        self._longitudes = latlon_data["longitudes"]
-
-        dist_and_bearing_data = self.build_distance_and_bearing(self._all_coordinates)
-        self._dist_to_next_coordinate = dist_and_bearing_data["dist_to_next_coordinate"]
-        self._trip_meters = dist_and_bearing_data["trip_meters"]
-        self._true_bearing_to_next = dist_and_bearing_data["true_bearing_to_next"]
-        self._true_bearing_to_prev = dist_and_bearing_data["true_bearing_to_prev"]
-        self._bearing_to_next_360 = dist_and_bearing_data["bearing_to_next_360"]
-        self._bearing_to_prev_360 = dist_and_bearing_data["bearing_to_prev_360"]
-
-        self._general_travel_direction = self.build_general_travel_direction(self._bearing_to_next_360)
+        coordinate_data = self.build_interpolated_coordinates(self._coordinate_lst_input, self._interval_upper_bound)
+        store = RouteStore(len(coordinate_data["latitudes"]))
+        store.polyline_point_index[:] = coordinate_data["coordinate_point_index"]
+        store.column("latitude")[:] = coordinate_data["latitudes"]
+        store.column("longitude")[:] = coordinate_data["longitudes"]
+        del coordinate_data
+
+        dist_and_bearing_data = self.build_distance_and_bearing(store.column("latitude"), store.column("longitude"))
+        for column, key in [
+            ("dist_to_next_coordinate", "dist_to_next_coordinate"),
+            ("trip_meters", "trip_meters"),
+            ("true_bearing_to_next", "true_bearing_to_next"),
+            ("true_bearing_to_prev", "true_bearing_to_prev"),
+            ("bearing_to_next_360", "bearing_to_next_360"),
+            ("bearing_to_prev_360", "bearing_to_prev_360"),
+            ]:
+            store.column(column)[:] = dist_and_bearing_data[key]
+        del dist_and_bearing_data
+
+        store.general_travel_direction_codes[:] = self.build_general_travel_direction(store.column("bearing_to_next_360"))
+
+        turn_data = self.build_turn_data(store.column("true_bearing_to_next"))
+        store.column("turn_bearing")[:] = turn_data["turn_bearings"]
+        store.turn_type_codes[:] = turn_data["turn_type"]
+        store.column("relative_turn_angle")[:] = turn_data["relative_turn_angle"]
+        del turn_data
+
+        self._store = store
+        self._coordinate_point_index = store.polyline_point_index
+        self._latitudes = store.column("latitude")
+        self._longitudes = store.column("longitude")
+        self._trip_meters = store.column("trip_meters")
+        self._dist_to_next_coordinate = store.column("dist_to_next_coordinate")
+        self._true_bearing_to_next = store.column("true_bearing_to_next")
+        self._true_bearing_to_prev = store.column("true_bearing_to_prev")
+        self._bearing_to_next_360 = store.column("bearing_to_next_360")
+        self._bearing_to_prev_360 = store.column("bearing_to_prev_360")
+        self._general_travel_direction = store.general_travel_direction()
+        self._turn_bearings = store.column("turn_bearing")
+        self._turn_type = store.turn_type()
+        self._relative_turn_angle = store.column("relative_turn_angle")
 
-        turn_data = self.build_turn_data(self._all_coordinates, self._true_bearing_to_next)
-        self._turn_bearings = turn_data["turn_bearings"]
-        self._turn_type = turn_data["turn_type"]
-        self._relative_turn_angle = turn_data["relative_turn_angle"]
-
-        self._data = self.build_dataframe()
+        self._data = None
 
 
-    def build_segment_cooridnates(self, coordinate_lst_input: List[Tuple[float]], interval_upper_bound: int): 
+    def build_interpolated_coordinates(self, coordinate_lst_input: List[Tuple[float]], interval_upper_bound: int): 
         """
-        build_segment_cooridnates: interpolates each segment into multiple coordinates with the distance between each coordinate
-            less than interval_upper_bound
+        build_interpolated_coordinates: interpolates every segment of the polygonal chain so that the distance between each
+            coordinate is less than interval_upper_bound. The whole chain is handled at once: one batched Geod.inv call gives
+            every segment's length and interval count, and one batched Geod.fwd call places every interpolated point
+            (equally spaced along the segment's geodesic, same as Geod.npts) into preallocated arrays
         @param coordinate_lst_input: polygonal chain representation of the route
         @param interval_upper_bound: uppper bound for the distance between coordinates
-        @return: returns a list of lists that contains the coordinates for each segment in the route/polygonal chain
-        """
-        segment_cooridnates = []
-        for i, _ in enumerate(coordinate_lst_input[1:], start=1):
-            lat_1, long_1 = coordinate_lst_input[i-1]
-            lat_2, long_2 = coordinate_lst_input[i]
-
-            geo_data = Geodesic.WGS84.Inverse(lat_1, long_1, lat_2, long_2)
-            dist = geo_data['s12'] # https://geographiclib.sourceforge.io/1.52/python/interface.html
-            intervals_num = math.ceil(dist/interval_upper_bound)-1
-            
-            if intervals_num == 0:
-                segment_cooridnates.append([(lat_1, long_1), (lat_2, long_2)])
-            else:
-                g = Geod(ellps="WGS84")
-                longlats = g.npts(long_1, lat_1, long_2, lat_2, intervals_num) # be careful here because the lat and longs order is switched
-                data = [(lat_1, long_1)] + [(lat, long) for long, lat in longlats] + [(lat_2, long_2)]
-                segment_cooridnates.append(data)
-
-        return segment_cooridnates
-
-
-    def build_segment_points(self, segment_cooridnates: List[List[Tuple[float]]]):
-        """
-        build_segment_points: Formats segment_cooridnates into a long list of coordinates
-        @param segment_cooridnates: a list of lists that contains the coordinates for each segment in the route/polygonal chain
-        @return coordinate_point_index: a list of the polygonal chain points and their index
-        @return all_coordinates: long list of coordinates that represents the route
-        """
-        segment_points = {0:0} # {point, index}
-        all_coordinates = segment_cooridnates[0].copy()
-        for i, segment_coordinate in enumerate(segment_cooridnates[1:], start=1):
-            segment_points[len(all_coordinates)-1] = i
-            all_coordinates += segment_coordinate[1:]
-        segment_points[len(all_coordinates)-1] = len(segment_cooridnates)
-
-        coordinate_point_index = [segment_points[i] if i in segment_points else None for i in range(len(all_coordinates))]
-        
-        return {"coordinate_point_index":coordinate_point_index, "all_coordinates":all_coordinates}
-
-
-    def build_latitudes_longitudes(self, all_coordinates: List[Tuple[float]]):
+        @return latitudes: np.array of all the latitudes of the interpolated route
+        @return longitudes: np.array of all the longitudes of the interpolated route
+        @return coordinate_point_index: np.array of the polygonal chain point index of each coordinate (-1 if the coordinate
+            is an interpolated point)
         """
-        build_latitudes_longitudes: Converts list of coordinates into their lat and long
-        @param all_coordinates: long list of coordinates that represents the route
-        @return latitudes: a list of all the latitudes in all_coordinates
-        @return longitudes: a list of all the longitudes in all_coordinates
+        polyline = np.asarray(coordinate_lst_input, dtype=np.float64).reshape(-1, 2)
+        polyline_latitudes = polyline[:, 0]
+        polyline_longitudes = polyline[:, 1]
+
+        # be careful here because pyproj uses (long, lat) order
+        azimuths, _, distances = WGS84_GEOD.inv(polyline_longitudes[:-1], polyline_latitudes[:-1], polyline_longitudes[1:], polyline_latitudes[1:])
+        intervals_num = np.maximum(np.ceil(distances/interval_upper_bound).astype(np.int64) - 1, 0) # points added inside each segment
+        polyline_positions = np.concatenate(([0], np.cumsum(intervals_num + 1))) # index of each polyline point in the route
+        number_of_coordinates = polyline_positions[-1] + 1
+
+        latitudes = np.empty(number_of_coordinates, dtype=np.float64)
+        longitudes = np.empty(number_of_coordinates, dtype=np.float64)
+        latitudes[polyline_positions] = polyline_latitudes
+        longitudes[polyline_positions] = polyline_longitudes
+
+        # Every coordinate but the last is step k of its segment (step 0 being the segment's starting polyline point)
+        segment = np.repeat(np.arange(len(distances)), intervals_num + 1)
+        step = np.arange(number_of_coordinates - 1) - polyline_positions[segment]
+        interpolated = np.flatnonzero(step > 0)
+        if len(interpolated) > 0:
+            segment = segment[interpolated]
+            step_distance = step[interpolated] * distances[segment] / (intervals_num[segment] + 1)
+            longitudes[interpolated], latitudes[interpolated], _ = WGS84_GEOD.fwd(
+                polyline_longitudes[segment], polyline_latitudes[segment], azimuths[segment], step_distance
+                )
+
+        coordinate_point_index = np.full(number_of_coordinates, -1, dtype=np.int32)
+        coordinate_point_index[polyline_positions] = np.arange(len(polyline_positions))
+
+        return {"latitudes":latitudes, "longitudes":longitudes, "coordinate_point_index":coordinate_point_index}
+
+
+    def build_distance_and_bearing(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """"
+        build_distance_and_bearing: finds the distance to the next coordinate, the bearing to the next and previous coordinate.
+            All coordinate pairs are solved in one batched pyproj Geod.inv call (see build_distance_and_bearing_reference
+            for the per-point version)
+        @param latitudes: array of the route's latitudes
+        @param longitudes: array of the route's longitudes
+        @return dist_to_next_coordinate: np.array of distances between coordinates (nan for the last coordinate)
+        @return trip_meters: cumulative number of meters completed (at this point relative to the start of the route)
+        @return true_bearing_to_next: np.array of bearings to next coordinates to true north (nan for the last coordinate)
+        @return true_bearing_to_prev: np.array of bearings to prev coordinates to true north (nan for the first coordinate)
+        @return bearing_to_next_360: np.array of bearings to next coordinates in 360 degrees (nan for the last coordinate)
+        @return bearing_to_prev_360: np.array of bearings to prev coordinates in 360 degrees (nan for the first coordinate)
         """
-        latitudes = []
-        longitudes = []
-        for _, coordinate in enumerate(all_coordinates):
-            latitudes.append(coordinate[0])
-            longitudes.append(coordinate[1])
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
 
-        return {"latitudes":latitudes, "longitudes":longitudes}
+        # Geod.inv takes (lon, lat) order and returns the back azimuth (bearing from point 2 to point 1) as its second value
+        azimuth_to_next, azimuth_to_prev, dist = WGS84_GEOD.inv(longitudes[:-1], latitudes[:-1], longitudes[1:], latitudes[1:])
+        trip_meters = np.concatenate(([0.0], np.cumsum(dist)))
 
+        true_bearing_to_next = np.append(azimuth_to_next, np.nan)
+        true_bearing_to_prev = np.insert(azimuth_to_prev, 0, np.nan)
 
-    def build_distance_and_bearing(self, all_coordinates: List[Tuple[float]]):
+        return {
+            "dist_to_next_coordinate": np.append(dist, np.nan), 
+            "trip_meters": trip_meters,
+            "true_bearing_to_next": true_bearing_to_next, 
+            "true_bearing_to_prev": true_bearing_to_prev,
+            "bearing_to_next_360": np.where(true_bearing_to_next < 0, true_bearing_to_next + 360, true_bearing_to_next),
+            "bearing_to_prev_360": np.where(true_bearing_to_prev < 0, true_bearing_to_prev + 360, true_bearing_to_prev)
+            }
+
+
+    def build_distance_and_bearing_reference(self, all_coordinates: List[Tuple[float]]):
         """"
-        build_distance_and_bearing: finds the distance to the next coordinate, the bearing to the next and previous coordinate
+        build_distance_and_bearing_reference: per-point reference implementation of build_distance_and_bearing (one
+            Geodesic.WGS84.Inverse call per coordinate). Kept to validate and benchmark the batched engine against
         @param all_coordinates: long list of coordinates that represents the route
-        @return dist_to_next_coordinate: list of distances between coordinates
-        @return trip_meters: cumulative number of meters completed (at this point relative to the start of the route)
-        @return true_bearing_to_next: list of bearings to next coordinates to true north
-        @return true_bearing_to_prev: list of bearings to prev coordinates to true north
-        @return bearing_to_next_360: list of bearings to next coordinates in 360 degrees
-        @return bearing_to_prev_360: list of bearings to prev coordinates in 360 degrees
+        @return: same values as build_distance_and_bearing
         """
         dist_to_next_coordinate = []
         trip_meters = [0]
@@ -184,71 +304,55 @@ class RouteModel():
             }
 
 
-    def build_general_travel_direction(self, bearing_to_next_360: List[float]):
+    def build_general_travel_direction(self, bearing_to_next_360: np.ndarray):
         """"
         build_general_travel_direction: finds the general traveling direction at the coordinate
-        @param bearing_to_next_360: list of bearings to next coordinates in 360 degrees
-        @return: alist of the general traveling direction at the coordinate
-        """
-        general_travel_direction = []
-        for bearing in bearing_to_next_360:
-            if bearing is None:
-                general_travel_direction.append(None)
-            elif bearing == 0 or bearing == 360:
-                general_travel_direction.append("N")
-            elif bearing == 90:
-                general_travel_direction.append("E")
-            elif bearing == 180:
-                general_travel_direction.append("S")
-            elif bearing == 270:
-                general_travel_direction.append("W")
-            elif 0 < bearing < 90:
-                general_travel_direction.append(f"N{bearing:.0f}{chr(176)}E")
-            elif 90 < bearing < 180:
-                general_travel_direction.append(f"S{bearing-90:.0f}{chr(176)}E")
-            elif 180 < bearing < 270:
-                general_travel_direction.append(f"S{bearing-180:.0f}{chr(176)}W")
-            elif 270 < bearing < 360:
-                general_travel_direction.append(f"N{bearing-270:.0f}{chr(176)}W")
-
-        return general_travel_direction
-
-
-    def build_turn_data(self, all_coordinates, true_bearing_to_next: List[float]):
+        @param bearing_to_next_360: np.array of bearings to next coordinates in 360 degrees
+        @return: np.array of general traveling direction codes at the coordinate (index into GENERAL_TRAVEL_DIRECTIONS, 
+            -1 if there is no next coordinate)
+        """
+        bearing = np.asarray(bearing_to_next_360, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            conditions = [
+                (bearing == 0) | (bearing == 360),
+                bearing == 90,
+                bearing == 180,
+                bearing == 270,
+                (0 < bearing) & (bearing < 90),
+                (90 < bearing) & (bearing < 180),
+                (180 < bearing) & (bearing < 270),
+                (270 < bearing) & (bearing < 360),
+                ]
+            # Degrees are rounded half to even, which is the same as the f"{bearing:.0f}" formatting
+            choices = [0, 1, 2, 3, 4 + np.rint(bearing), 95 + np.rint(bearing-90), 186 + np.rint(bearing-180), 277 + np.rint(bearing-270)]
+            general_travel_direction = np.select(conditions, choices, default=-1)
+
+        return general_travel_direction.astype(np.int16)
+
+
+    def build_turn_data(self, true_bearing_to_next: np.ndarray):
         """
         build_turn_data: determines the type of turn and the turning angle
-        @param all_coordinates: long list of coordinates that represents the route
-        @param true_bearing_to_next: list of bearings to next coordinates to true north
-        @return turn_bearings: the relative turn bearing,
-        @return turn_type: a list of type of turn at the coordinate,
-        @return relative_turn_angle: the relative turn angle (formatted)
-        """
-        turn_bearings = [None]
-        for i, _ in enumerate(all_coordinates[1:-1], start=1):
-            bearing1 = true_bearing_to_next[i-1]
-            bearing2 = true_bearing_to_next[i]
-            if bearing2-bearing1 > 180:
-                 turn_bearings.append(bearing2-bearing1-360)
-            elif bearing2-bearing1 < -180:
-                turn_bearings.append(bearing2-bearing1+360)
-            else:
-                turn_bearings.append(bearing2-bearing1)
-        turn_bearings.append(None)
-
-        turn_type = []
-        relative_turn_angle = []
-        for bearing in turn_bearings:
-            if bearing is None or abs(bearing) < 1:
-                turn_type.append(None)
-                relative_turn_angle.append(None)
-                continue
-            elif -60 <= bearing <= 60: # within 60 degrees is a slight turn
-                turn_type.append("Slight Left" if bearing < 0 else "Slight Right")
-            elif -120 <= bearing <= 120: # within 60-120 degrees is a standard turn
-                turn_type.append("Standard Left" if bearing < 0 else "Standard Right")
-            else: # greater than 120 degrees is a hook turn
-                turn_type.append("Hook Left" if bearing < 0 else "Hook Right")
-            relative_turn_angle.append(abs(bearing))
+        @param true_bearing_to_next: np.array of bearings to next coordinates to true north
+        @return turn_bearings: the relative turn bearing (nan for the first and last coordinate),
+        @return turn_type: np.array of turn type codes at the coordinate (index into TURN_TYPES, -1 if there is no turn),
+        @return relative_turn_angle: the relative turn angle (formatted, nan if there is no turn)
+        """
+        true_bearing_to_next = np.asarray(true_bearing_to_next, dtype=np.float64)
+        bearing_change = true_bearing_to_next[1:-1] - true_bearing_to_next[:-2]
+        bearing_change = np.where(bearing_change > 180, bearing_change - 360, bearing_change)
+        bearing_change = np.where(bearing_change < -180, bearing_change + 360, bearing_change)
+        turn_bearings = np.concatenate(([np.nan], bearing_change, [np.nan]))
+
+        with np.errstate(invalid="ignore"):
+            relative_turn_angle = np.abs(turn_bearings)
+            is_turn = relative_turn_angle >= 1
+            is_right = turn_bearings > 0
+            # within 60 degrees is a slight turn, within 60-120 degrees is a standard turn, greater than 120 degrees is a hook turn
+            turn_severity = np.select([relative_turn_angle <= 60, relative_turn_angle <= 120], [0, 1], default=2)
+
+        turn_type = np.where(is_turn, 2*turn_severity + is_right, -1).astype(np.int8)
+        relative_turn_angle = np.where(is_turn, relative_turn_angle, np.nan)
 
         return {
             "turn_bearings": turn_bearings,
@@ -259,40 +363,37 @@ class RouteModel():
 
     def build_dataframe(self): 
         """
-        build_dataframe: builds Pandas DataFrame
+        build_dataframe: builds Pandas DataFrame over the route store (no column data is copied)
         @return: DataFrame of the route data
         """
-        data = pd.DataFrame({
-            "polyline_point_index": self._coordinate_point_index,
-            "latitude": self._latitudes,
-            "longitude": self._longitudes,
-            "trip_meters": self._trip_meters,
-            "dist_to_next_coordinate": self._dist_to_next_coordinate, # in meters
-            "true_bearing_to_next": self._true_bearing_to_next,
-            "bearing_to_next_360": self._bearing_to_next_360,
-            "true_bearing_to_prev": self._true_bearing_to_prev,
-            "bearing_to_prev_360": self._bearing_to_prev_360,
-            "general_travel_direction": self._general_travel_direction,
-            "turn_bearing": self._turn_bearings,
-            "turn_type": self._turn_type,
-            "relative_turn_angle": self._relative_turn_angle,
-        }).fillna('')
-        return data
+        return self._store.to_dataframe()
 
 
     def get_data(self):
         """
-        build_dataframe: gives user route data DataFrame
+        get_data: gives user route data DataFrame. The DataFrame is built on first use
         @return: DataFrame of the route data
         """
-        if self._data is None:
+        if self._store is None:
             self.build_data()
+        if self._data is None:
+            self._data = self.build_dataframe()
         return self._data
 
 
+    def get_store(self):
+        """
+        get_store: gives user the columnar route store that backs the route data DataFrame
+        @return: RouteStore of the route data
+        """
+        if self._store is None:
+            self.build_data()
+        return self._store
+
+
     def get_csv(self, filename: str):
         """
-        build_dataframe: saves user route data as csv
+        get_csv: saves user route data as csv
         @param filename: name of saved file
         """
         data = self.get_data()
@@ -305,12 +406,29 @@ class RouteModel():
         get_elevations_list: gives user a list of all coordinate tuples
         @return: list of tuples, where each tuple represents a (latitude, longitude) coordinate
         """
-        data = self.get_data()
-        latitudes = data["latitude"].to_list()
-        longitudes = data["longitude"].to_list()
+        store = self.get_store()
+        latitudes = store.column("latitude").tolist()
+        longitudes = store.column("longitude").tolist()
         return list(zip(latitudes, longitudes))
 
 
 
 if __name__ == "__main__":
-    pass
+    # Benchmark for the batched geodesic engine vs the per-point reference (points per second)
+    import time
+
+    n_points = 150000 # Roughly a cross-country route at 25m spacing
+    route = RouteModel([(43.81857948416717, -79.40101625627213), (43.82045746557804, -79.3901457521166), (43.81990512423598, -79.38545051088512)])
+    benchmark_latitudes = np.linspace(30, 30 + n_points*0.000225, n_points) # ~25m steps north
+    benchmark_longitudes = -97 + 0.01*np.sin(np.linspace(0, 200*np.pi, n_points)) # weave east/west
+    benchmark_coordinates = list(zip(benchmark_latitudes.tolist(), benchmark_longitudes.tolist()))
+
+    start = time.perf_counter()
+    route.build_distance_and_bearing(benchmark_latitudes, benchmark_longitudes)
+    elapsed = time.perf_counter() - start
+    print(f"  batched: {elapsed:.3f}s ({n_points/elapsed:,.0f} points/s)")
+
+    start = time.perf_counter()
+    route.build_distance_and_bearing_reference(benchmark_coordinates)
+    elapsed = time.perf_counter() - start
+    print(f"reference: {elapsed:.3f}s ({n_points/elapsed:,.0f} points/s)")
@@ -187,4 +187,55 @@ class Test_Applied_Force():
         timedelta_4 = 2
         applied_force_4 = x_force_applied(mass_4, car_vi_vector_4, car_vf_vector_4, timedelta_4)
         correct_applied_force_4 = 53.45224838
-        np.isclose(applied_force_4, correct_applied_force_4)
\ No newline at end of file
+        np.isclose(applied_force_4, correct_applied_force_4)
+
+
+
+class Test_Batched_Forces():
+    rng = np.random.default_rng(0)
+    car_velocity_vectors = rng.uniform(-10, 10, size=(50, 3))
+    wind_velocity_vectors = rng.uniform(-5, 5, size=(50, 3))
+    car_vf_vectors = rng.uniform(-10, 10, size=(50, 3))
+
+
+    def test_x_forces_drag(self):
+        drag_forces = x_forces_drag(self.car_velocity_vectors, self.wind_velocity_vectors, 1.5, fluid_density=1.1, drag_coefficent=0.3)
+        correct_drag_forces = [x_force_drag(car, wind, 1.5, fluid_density=1.1, drag_coefficent=0.3) for car, wind in zip(self.car_velocity_vectors, self.wind_velocity_vectors)]
+        np.testing.assert_array_almost_equal(drag_forces, correct_drag_forces)
+
+        # 1 wind vector for every point
+        drag_forces = x_forces_drag(self.car_velocity_vectors, np.array([1, 2, 0]), 1.5)
+        correct_drag_forces = [x_force_drag(car, np.array([1, 2, 0]), 1.5) for car in self.car_velocity_vectors]
+        np.testing.assert_array_almost_equal(drag_forces, correct_drag_forces)
+
+
+    def test_y_forces_downforce(self):
+        downforces = y_forces_downforce(self.car_velocity_vectors, self.wind_velocity_vectors, 6, fluid_density=1.1, lift_coefficent=0.2)
+        correct_downforces = [y_force_downforce(car, wind, 6, fluid_density=1.1, lift_coefficent=0.2) for car, wind in zip(self.car_velocity_vectors, self.wind_velocity_vectors)]
+        np.testing.assert_array_almost_equal(downforces, correct_downforces)
+
+
+    def test_x_forces_applied(self):
+        applied_forces = x_forces_applied(123, self.car_velocity_vectors, self.car_vf_vectors, 0.5)
+        correct_applied_forces = [x_force_applied(123, vi, vf, 0.5) for vi, vf in zip(self.car_velocity_vectors, self.car_vf_vectors)]
+        np.testing.assert_array_almost_equal(applied_forces, correct_applied_forces)
+
+        timedeltas = self.rng.uniform(0.1, 2, 50)
+        applied_forces = x_forces_applied(123, self.car_velocity_vectors, self.car_vf_vectors, timedeltas)
+        correct_applied_forces = [x_force_applied(123, vi, vf, timedelta) for vi, vf, timedelta in zip(self.car_velocity_vectors, self.car_vf_vectors, timedeltas)]
+        np.testing.assert_array_almost_equal(applied_forces, correct_applied_forces)
+
+
+    def test_stopped_car(self):
+        stopped = np.zeros((2, 3))
+        wind = np.array([[1, 2, 3], [-4, 0, 1]])
+        np.testing.assert_array_equal(x_forces_drag(stopped, wind, 1.5), [0, 0])
+        np.testing.assert_array_equal(y_forces_downforce(stopped, wind, 6), [0, 0])
+        np.testing.assert_array_equal(x_forces_applied(100, stopped, wind, 1), [0, 0])
+
+
+    def test_gravity_and_friction_arrays(self):
+        elevation_angles = np.array([-10, 0, 5, 10])
+        np.testing.assert_array_almost_equal(x_force_gravity(100, elevation_angles), [x_force_gravity(100, angle) for angle in elevation_angles])
+        np.testing.assert_array_almost_equal(y_force_normal(100, elevation_angles), [y_force_normal(100, angle) for angle in elevation_angles])
+        np.testing.assert_array_almost_equal(x_force_friction(100, elevation_angles, 0.01), [x_force_friction(100, angle, 0.01) for angle in elevation_angles])
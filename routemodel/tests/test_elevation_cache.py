@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import numpy as np
+import requests
+from elevations.elevations import CoordinateElevation
+from elevations.elevation_cache import ElevationCache
+
+
+
+
+coordinates = [(44.0104111274582, -79.67866520101909), (44.028996763626, -79.59455210533561), (44.037352902093524, -79.596693165953), (44.067688969642624, -79.62238589336177), (44.07494094439971, -79.62452695397917), (44.05647962446555, -79.70741658645272)]
+correct_elevations = [195, 207, 183, 189, 190, 207]
+
+
+class FakeResponse():
+    def __init__(self, elevations):
+        self._elevations = elevations
+
+    def json(self):
+        return {"statusCode": 200, "resourceSets": [{"resources": [{"elevations": self._elevations, "zoomLevel": 14}]}]}
+
+
+def test_coordinate_elevation_cache(monkeypatch, tmp_path):
+    requested = []
+    def post(url):
+        requested.append(url)
+        return FakeResponse(correct_elevations[:2])
+    monkeypatch.setattr(requests, "post", post)
+
+    cache = ElevationCache(str(tmp_path / "elevations.sqlite"))
+    cache.put(coordinates[2:], correct_elevations[2:])
+    route = CoordinateElevation(coordinates=coordinates, BING_MAPS_API_KEY="", cache=cache)
+
+    assert len(requested) == 1
+    assert route.get_elevations()[1] == correct_elevations
+    np.testing.assert_array_equal(cache.get(coordinates), correct_elevations)
+
+    # A fully cached route is built offline
+    route = CoordinateElevation(coordinates=coordinates, BING_MAPS_API_KEY="", cache=cache)
+    assert len(requested) == 1
+    assert route.get_dataframe()["elevation"].tolist() == correct_elevations
+
+
+# routemodelv2/elevations has a copy of elevation_cache.py (each route model runs with its own directory on the path), which
+# must stay the same so both route models read and write the same cache files
+def test_elevation_cache_same_as_routemodelv2():
+    routemodel_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(routemodel_directory, "elevations", "elevation_cache.py"), "rb") as file:
+        routemodel_copy = file.read()
+    with open(os.path.join(os.path.dirname(routemodel_directory), "routemodelv2", "elevations", "elevation_cache.py"), "rb") as file:
+        routemodelv2_copy = file.read()
+    assert routemodel_copy == routemodelv2_copy
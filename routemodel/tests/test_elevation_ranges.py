@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+import requests
+from urllib.parse import urlparse, parse_qs
+from elevations.elevations import RouteElevation, CoordinateElevation
+
+
+
+
+coordinates = [(44.0104111274582, -79.67866520101909), (44.028996763626, -79.59455210533561), (44.037352902093524, -79.596693165953), (44.067688969642624, -79.62238589336177), (44.07494094439971, -79.62452695397917), (44.05647962446555, -79.70741658645272)]
+
+
+class FakeResponse():
+    def __init__(self, elevations):
+        self._elevations = elevations
+
+    def json(self):
+        return {"statusCode": 200, "resourceSets": [{"resources": [{"elevations": self._elevations, "zoomLevel": 14}]}]}
+
+
+def fake_post(url):
+    """
+    Stand-in for the Bing Maps API: the polyline API returns `samples` elevations, the list API 1 elevation per coordinate
+    """
+    query = parse_qs(urlparse(url).query)
+    if "samples" in query:
+        return FakeResponse(list(range(100, 100 + int(query["samples"][0]))))
+    return FakeResponse([150 + i for i in range(len(coordinates))])
+
+
+@pytest.fixture
+def route_elevation(monkeypatch):
+    monkeypatch.setattr(requests, "post", fake_post)
+    return RouteElevation(coordinates=coordinates, BING_MAPS_API_KEY="", sample_frequency_upper_bound=500)
+
+
+@pytest.fixture
+def coordinate_elevation(monkeypatch):
+    monkeypatch.setattr(requests, "post", fake_post)
+    return CoordinateElevation(coordinates=coordinates, BING_MAPS_API_KEY="")
+
+
+def test_route_get_elevations_by_point(route_elevation):
+    distances, elevations = route_elevation.get_elevations()
+    for start_point, end_point in [(0, 3), (4, 5), (1, 2), (0, 5)]:
+        # The range used to be found by walking the segments
+        start_index = sum(route_elevation._sample_distances_between_coordinates[i][0] - 1 for i in range(start_point))
+        end_index = sum(route_elevation._sample_distances_between_coordinates[i][0] - 1 for i in range(end_point))
+        assert route_elevation.get_elevations(start_point, end_point) == (distances[start_index:end_index+1], elevations[start_index:end_index+1])
+
+
+def test_route_get_elevations_between(route_elevation):
+    distances, elevations = route_elevation.get_elevations()
+    for start_distance, end_distance in [(0, 19721), (940, 5000), (7053, 7053), (7054, 7524), (-100, 100), (19000, 50000)]:
+        range_distances, range_elevations = route_elevation.get_elevations_between(start_distance, end_distance)
+        in_range = [start_distance <= distance <= end_distance for distance in distances]
+        assert range_distances.tolist() == [distance for distance, keep in zip(distances, in_range) if keep]
+        assert range_elevations.tolist() == [elevation for elevation, keep in zip(elevations, in_range) if keep]
+
+    # The ranges are read only views of the route's arrays
+    range_distances, range_elevations = route_elevation.get_elevations_between(940, 5000)
+    assert np.shares_memory(range_elevations, route_elevation._elevation_array)
+    with pytest.raises(ValueError):
+        range_elevations[0] = 0
+    with pytest.raises(ValueError):
+        route_elevation.get_elevations_between(5000, 940)
+
+
+def test_coordinate_get_elevations_between(coordinate_elevation):
+    trip_distances, elevations = coordinate_elevation.get_elevations_between(0, 1e9)
+    np.testing.assert_allclose(np.diff(trip_distances), [7053.25, 944.2, 3949.8, 823.85, 6950.51], atol=0.01)
+    assert elevations.tolist() == coordinate_elevation.get_elevations()[1]
+
+    trip_distances, elevations = coordinate_elevation.get_elevations_between(7000, 12000)
+    assert elevations.tolist() == [151, 152, 153]
+    assert np.shares_memory(trip_distances, coordinate_elevation._trip_distances)
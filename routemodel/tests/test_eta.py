@@ -3,8 +3,13 @@ import os.path
 sys.path.append(os.path.dirname(sys.path[0]))
 
 import pytest
+import numpy as np
 import pandas as pd
+import geopy
+from geopy.distance import distance as geodist
 from eta.eta import ETA
+from eta.route_index import RouteIndex
+from eta.route_tracker import RouteTracker
 
 
 """
@@ -38,4 +43,150 @@ def test_eta_times():
 
 # Tests if the eta object can successfully update the car's location
 def test_location_update():
-    assert(eta.update_location())
\ No newline at end of file
+    assert(eta.update_location())
+
+# Tests if the spatial index finds the same closest point as checking every point
+def test_closest_point_index():
+    rng = np.random.default_rng(0)
+    latitudes = rng.uniform(43.465, 43.495, 50)
+    longitudes = rng.uniform(-80.567, -80.525, 50)
+    for lat, lon in zip(latitudes, longitudes):
+        indexed = eta.find_closest_point(lat, lon)
+        brute_force = eta.find_closest_point(lat, lon, use_index=False)
+        assert indexed.name == brute_force.name
+
+# Tests if k-nearest queries return the closest route points in order
+def test_route_index_k_nearest():
+    route_index = RouteIndex([0, 0, 0, 0], [0, 0.001, 0.002, 0.003])
+    indexes, distances = route_index.k_nearest(0, 0.0021, k=3)
+    assert indexes.tolist() == [2, 3, 1]
+    assert np.all(np.diff(distances) > 0)
+    assert route_index.nearest(0, -1)[0] == 0
+
+# Tests if the route tracker follows an out-and-back route (which passes within 20m of itself) without jumping legs
+def test_route_tracker_out_and_back():
+    out_latitudes = np.linspace(43.0, 43.01, 50) # ~22m apart
+    latitudes = np.concatenate((out_latitudes, out_latitudes[::-1]))
+    longitudes = np.concatenate((np.full(50, -80.0), np.full(50, -80.00025))) # return leg ~20m west
+    trip_meters = np.concatenate(([0], np.cumsum(np.hypot(np.diff(latitudes)*111000, np.diff(longitudes)*81000))))
+
+    tracker = RouteTracker(latitudes, longitudes, trip_meters, max_match_error=15, window_margin=30)
+    for i in range(0, 100, 2):
+        matched = tracker.update(latitudes[i], longitudes[i] + 0.00004, speed=20, timestamp=i) # ~3m east of the route
+        assert matched == i
+    assert tracker.global_lookups == 1
+
+# Tests if the route tracker recovers when the car jumps further along the route than its window
+def test_route_tracker_fallback():
+    latitudes = np.linspace(43.0, 43.1, 500)
+    longitudes = np.full(500, -80.0)
+    trip_meters = np.linspace(0, 11100, 500)
+
+    tracker = RouteTracker(latitudes, longitudes, trip_meters)
+    assert tracker.update(latitudes[10], longitudes[10], speed=10, timestamp=0) == 10
+    assert tracker.update(latitudes[400], longitudes[400], speed=10, timestamp=1) == 400
+    assert tracker.global_lookups == 2
+
+# Tests if the incremental checkpoint update matches the full scan along the route
+def test_incremental_checkpoint():
+    route_model = eta.route_model
+    for timestamp, i in enumerate(range(0, len(route_model), 20)):
+        lat, lon = route_model['latitude'].iat[i], route_model['longitude'].iat[i]
+        eta.update_checkpoint(lat, lon, incremental=True, speed=25, timestamp=timestamp)
+        assert eta.current_checkpoint == route_model['checkpoint'].iat[i]
+
+# Tests if the vectorized eta matches adding up the trip distance between each checkpoint
+def test_eta_matches_checkpoint_trip():
+    eta.update_checkpoint(43.46786317655638, -80.56637564010215, full_scan=True)
+    arrival_times = eta.get_eta()
+    trip = eta.route_model['trip(m)']
+    next_checkpoint = eta.current_checkpoint + 1
+    for checkpoint in range(next_checkpoint+1, len(arrival_times)):
+        a = eta.checkpoint_index[next_checkpoint]
+        b = eta.checkpoint_index[checkpoint]
+        correct_eta = arrival_times[next_checkpoint] + ((trip.iloc[b] - trip.iloc[a])/1000) / eta.speed * 60
+        assert np.isclose(arrival_times[checkpoint], correct_eta)
+    assert arrival_times[:next_checkpoint] == [-1]*next_checkpoint
+
+# Tests if speed profiles per checkpoint segment and per route point give the expected arrival times
+def test_eta_speed_profile():
+    eta.update_checkpoint(43.46786317655638, -80.56637564010215, full_scan=True)
+    n = len(eta.checkpoint_coords)
+    uniform = np.array(eta.get_eta())
+
+    doubled = np.array(eta.get_eta(speed_profile=np.full(n-1, eta.speed*2)))
+    passed = uniform == -1
+    assert np.all(doubled[passed] == -1)
+    np.testing.assert_allclose(doubled[~passed], uniform[~passed]/2)
+
+    point_profile = np.array(eta.get_eta(speed_profile=np.full(len(eta.route_model), eta.speed)))
+    np.testing.assert_allclose(point_profile, uniform)
+
+    with pytest.raises(ValueError):
+        eta.get_eta(speed_profile=[1, 2])
+
+# Tests if the vectorized checkpoints match walking the route point by point
+def test_checkpoint_generation_matches_loop():
+    for freq in [250, 1000, 5000]:
+        checkpoint_coords = eta.generate_checkpoints(freq)
+        correct_coords, correct_index, correct_checkpoint = [], [], []
+        lst_checkpoint = -1
+        for index, row in eta.route_model.iterrows():
+            cur_checkpoint = int(row['trip(m)'] // freq)
+            if cur_checkpoint != lst_checkpoint:
+                correct_coords.append([row['latitude'], row['longitude']])
+                correct_index.append(index)
+            correct_checkpoint.append(cur_checkpoint)
+            lst_checkpoint = cur_checkpoint
+
+        assert checkpoint_coords == correct_coords
+        assert eta.checkpoint_index == correct_index
+        assert eta.route_model['checkpoint'].tolist() == correct_checkpoint
+    eta.generate_checkpoints(1000)
+
+# Tests if several checkpoint frequencies can be built at once and are reused
+def test_build_checkpoints_multiple_frequencies():
+    checkpoint_sets = eta.build_checkpoints([250, 1000, 5000])
+    assert list(checkpoint_sets.keys()) == [250, 1000, 5000]
+    assert len(checkpoint_sets[250]["checkpoint_index"]) > len(checkpoint_sets[1000]["checkpoint_index"]) > len(checkpoint_sets[5000]["checkpoint_index"])
+    assert eta.build_checkpoints([1000])[1000] is checkpoint_sets[1000]
+
+# Tests if the precomputed geofence boxes give the same result as building the 600m box around the checkpoint with geopy
+def test_precomputed_geofences():
+    rng = np.random.default_rng(1)
+    for checkpoint, (plat, plon) in enumerate(eta.checkpoint_coords):
+        west, south, east, north = (geodist(kilometers = 0.3).destination(point=geopy.Point(plat, plon), bearing = bearing)
+                                    for bearing in [270, 180, 90, 0])
+        for clat, clon in zip(plat + rng.uniform(-0.004, 0.004, 20), plon + rng.uniform(-0.005, 0.005, 20)):
+            inside = (south.latitude < clat < north.latitude) and (west.longitude < clon < east.longitude)
+            assert eta.in_geofences(clat, clon, [checkpoint])[0] == inside
+            assert eta.check_geofence(clat, clon, plat, plon) == inside
+
+# Tests if changing geofence_size rebuilds the cached geofence boxes
+def test_geofence_size_change():
+    checkpoint_sets = eta.build_checkpoints([250, 1000])
+    small_boxes = checkpoint_sets[250]["geofences"].copy()
+    plat, plon = eta.checkpoint_coords[3]
+    clat = plat + 0.0045 # ~500m north, outside a 300m box and inside a 600m one
+    assert not eta.in_geofences(clat, plon, [3])[0]
+
+    eta.geofence_size = 600
+    try:
+        assert eta.in_geofences(clat, plon, [3])[0]
+        rebuilt = eta.build_checkpoints([250])[250]
+        assert rebuilt["geofence_size"] == 600
+        assert np.all(rebuilt["geofences"][:, 1] > small_boxes[:, 1]) and np.all(rebuilt["geofences"][:, 0] < small_boxes[:, 0])
+    finally:
+        eta.geofence_size = 300
+    assert not eta.in_geofences(clat, plon, [3])[0]
+    np.testing.assert_array_equal(eta.build_checkpoints([250])[250]["geofences"], small_boxes)
+
+# Tests if a whole trace can be checked against every geofence at once
+def test_geofence_hits():
+    trace_latitudes = eta.route_model['latitude'].to_numpy()
+    trace_longitudes = eta.route_model['longitude'].to_numpy()
+    positions, checkpoints = eta.geofence_hits(trace_latitudes, trace_longitudes, chunk_size=100)
+    for position, checkpoint in zip(positions, checkpoints):
+        assert eta.in_geofences(trace_latitudes[position], trace_longitudes[position], [checkpoint])[0]
+    assert set(checkpoints.tolist()) == set(range(len(eta.checkpoint_coords)))
+    assert len(positions) == sum(eta.in_geofences(lat, lon).sum() for lat, lon in zip(trace_latitudes, trace_longitudes))
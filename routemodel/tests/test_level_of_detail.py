@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+from elevations.level_of_detail import LevelOfDetail, min_max_indexes, lttb_indexes
+
+
+
+
+distances = np.arange(200000) * 25.0
+elevations = 200 + 50 * np.sin(distances / 20000) + np.random.default_rng(0).normal(0, 1, len(distances))
+elevations[[1234, 98765, 150001]] = [400, -100, 350] # spikes that must survive downsampling
+
+
+def test_min_max_keeps_extremes_and_ends():
+    kept = min_max_indexes(elevations, 1000)
+    assert len(kept) <= 1000
+    assert kept[0] == 0 and kept[-1] == len(elevations) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert {1234, 98765, 150001} <= set(kept.tolist())
+
+
+def test_lttb_keeps_spikes():
+    kept = lttb_indexes(distances, elevations, 1000)
+    assert len(kept) == 1000
+    assert kept[0] == 0 and kept[-1] == len(elevations) - 1
+    assert {1234, 98765, 150001} <= set(kept.tolist())
+
+
+def test_short_series_is_not_downsampled():
+    assert np.array_equal(min_max_indexes(elevations[:50], 100), np.arange(50))
+    assert np.array_equal(lttb_indexes(distances[:50], elevations[:50], 100), np.arange(50))
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_window_respects_max_points(method):
+    level_of_detail = LevelOfDetail(distances, elevations, method=method)
+    for start_x, end_x in [(None, None), (0, 1000000), (2000000, 2100000), (4000000, 4000100)]:
+        x, y = level_of_detail.window(start_x, end_x, max_points=500)
+        assert 0 < len(x) <= 500
+        assert len(x) == len(y)
+        assert np.all(np.diff(x) > 0)
+        if start_x is not None:
+            assert x[0] >= start_x and x[-1] <= end_x
+
+
+def test_small_window_is_full_detail():
+    level_of_detail = LevelOfDetail(distances, elevations)
+    x, y = level_of_detail.window(1000000, 1010000, max_points=2000)
+    start = np.searchsorted(distances, 1000000)
+    assert np.array_equal(x, distances[start:start + 401])
+    assert np.array_equal(y, elevations[start:start + 401])
+
+
+def test_levels_are_cached():
+    level_of_detail = LevelOfDetail(distances, elevations)
+    assert level_of_detail.number_of_levels > 1
+    level_of_detail.window(max_points=2000)
+    cached_levels = dict(level_of_detail._levels)
+    assert len(cached_levels) > 1
+    level_of_detail.window(max_points=2000)
+    for level, (x, y) in cached_levels.items():
+        assert level_of_detail.level(level)[0] is x
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        LevelOfDetail(distances, elevations, method="average")
+    with pytest.raises(ValueError):
+        LevelOfDetail(distances, elevations[:-1])
+
+
+def test_elevations_does_not_import_matplotlib():
+    sys.modules.pop("elevations.elevations", None)
+    matplotlib_loaded = "matplotlib.pyplot" in sys.modules
+    import elevations.elevations
+    assert matplotlib_loaded or "matplotlib.pyplot" not in sys.modules
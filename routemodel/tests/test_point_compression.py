@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import numpy as np
+from elevations.point_compression import compress_coordinates, decompress_coordinates, compress_coordinates_reference
+
+
+
+
+coordinates = [(44.0104111274582, -79.67866520101909), (44.028996763626, -79.59455210533561), (44.037352902093524, -79.596693165953), (44.067688969642624, -79.62238589336177), (44.07494094439971, -79.62452695397917), (44.05647962446555, -79.70741658645272)]
+
+
+def test_compress_coordinates():
+    assert compress_coordinates(coordinates) == compress_coordinates_reference(coordinates)
+    np.testing.assert_allclose(decompress_coordinates(compress_coordinates(coordinates)), coordinates, atol=0.000005)
+    assert compress_coordinates([(35.89431, -110.72522), (35.89393, -110.72578), (35.89374, -110.72606), (35.89337, -110.72662)]) == "vx1vilihnM6hR7mEl2Q"
+
+
+# routemodelv2/elevations has a copy of point_compression.py (each route model runs with its own directory on the path),
+# which must stay the same so both route models send the same requests
+def test_point_compression_same_as_routemodelv2():
+    routemodel_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(routemodel_directory, "elevations", "point_compression.py"), "rb") as file:
+        routemodel_copy = file.read()
+    with open(os.path.join(os.path.dirname(routemodel_directory), "routemodelv2", "elevations", "point_compression.py"), "rb") as file:
+        routemodelv2_copy = file.read()
+    assert routemodel_copy == routemodelv2_copy
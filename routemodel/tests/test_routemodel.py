@@ -3,6 +3,8 @@ import os.path
 sys.path.append(os.path.dirname(sys.path[0]))
 
 import math
+import numpy as np
+from pyproj import Geod
 from routemodel.routemodel import RouteModel
 
 
@@ -38,7 +40,7 @@ class Test_RouteModel():
     def test_polyline_point_index(self):
         polyline_point_index = self.route._coordinate_point_index
         correct_polyline_point_index = [0, 1, 2]
-        assert polyline_point_index == correct_polyline_point_index
+        assert polyline_point_index.tolist() == correct_polyline_point_index
 
 
     def test_latitude(self):
@@ -116,3 +118,50 @@ class Test_RouteModel():
         elevations = self.route.get_elevations_list()
         correct_elevations = [(43.81857948416717,-79.40101625627213), (43.82045746557804, -79.3901457521166), (43.81990512423598, -79.38545051088512)]
         self.is_almost_equal(elevations, correct_elevations)
+
+
+    def test_batched_distance_and_bearing_matches_reference(self):
+        dense_route = RouteModel(self.coordinate_lst_input, 50)
+        all_coordinates = dense_route.get_elevations_list()
+        batched = dense_route.build_distance_and_bearing(dense_route._latitudes, dense_route._longitudes)
+        reference = dense_route.build_distance_and_bearing_reference(all_coordinates)
+        assert batched.keys() == reference.keys()
+        for key in reference:
+            batched_values = np.array(batched[key], dtype=float) # None -> nan
+            reference_values = np.array(reference[key], dtype=float)
+            np.testing.assert_allclose(batched_values, reference_values, rtol=0, atol=1e-6, equal_nan=True)
+
+
+    def test_dataframe_shares_store_memory(self):
+        data = self.route.get_data()
+        store = self.route.get_store()
+        assert data is self.route.get_data() # built once
+        assert np.shares_memory(data["latitude"].to_numpy(), store.column("latitude"))
+        assert np.shares_memory(data["trip_meters"].to_numpy(), store.column("trip_meters"))
+        assert data["turn_type"].tolist()[1] == "Slight Right"
+        assert data["general_travel_direction"].tolist()[:2] == ["N77°E", "S9°E"]
+        assert data["polyline_point_index"].tolist() == [0, 1, 2]
+
+
+    def test_interpolated_coordinates_match_npts(self):
+        interval_upper_bound = 100
+        coordinate_data = self.route.build_interpolated_coordinates(self.coordinate_lst_input, interval_upper_bound)
+
+        g = Geod(ellps="WGS84")
+        correct_coordinates = [self.coordinate_lst_input[0]]
+        correct_point_index = [0]
+        for i, (lat_2, long_2) in enumerate(self.coordinate_lst_input[1:], start=1):
+            lat_1, long_1 = self.coordinate_lst_input[i-1]
+            intervals_num = math.ceil(g.inv(long_1, lat_1, long_2, lat_2)[2]/interval_upper_bound)-1
+            correct_coordinates += [(lat, long) for long, lat in g.npts(long_1, lat_1, long_2, lat_2, intervals_num)] + [(lat_2, long_2)]
+            correct_point_index += [-1]*intervals_num + [i]
+
+        np.testing.assert_allclose(coordinate_data["latitudes"], [lat for lat, _ in correct_coordinates], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(coordinate_data["longitudes"], [long for _, long in correct_coordinates], rtol=0, atol=1e-9)
+        assert coordinate_data["coordinate_point_index"].tolist() == correct_point_index
+
+
+    def test_interpolated_coordinates_repeated_point(self):
+        coordinates = [self.coordinate_lst_input[0], self.coordinate_lst_input[1], self.coordinate_lst_input[1], self.coordinate_lst_input[2]]
+        coordinate_data = self.route.build_interpolated_coordinates(coordinates, 1000)
+        assert coordinate_data["coordinate_point_index"].tolist() == [0, 1, 2, 3]
@@ -67,27 +67,145 @@ def vector_projection(vector_1: np.ndarray, vector_2: np.ndarray):
 
 
 
-# Caching unhashable return values (numpy.ndarray is unhashable hence this work around))
-def np_cache(function: Callable):
-    @lru_cache()
-    def cached_wrapper(hashable_array):
-        array = np.array(hashable_array)
-        return function(array)
+# Batched functions (1 vector per row, no python loop over the rows)
+
+def velocity_vectors(speeds: np.ndarray, bearings: np.ndarray, elevation_angles: np.ndarray):
+    """
+    velocity_vectors: creates the cartesian vectors of many velocities at once (the batched version of velocity_vector)
+    @param speeds: np.array of the speeds (magnitudes, 0 is allowed for a stopped car)
+    @param bearings: np.array of the direction bearings (in degrees) of the velocities (in x-y axis) where 0/360 degrees is North
+    @param elevation_angles: np.array of the elevation_angles of the velocities relative to the x-axis (0 is on x-y plane, +ve is going up, -ve is going down)
+    @return: (n, 3) np.array with 1 3d vector per row
+    """
+    speeds, bearings, elevation_angles = np.broadcast_arrays(*map(np.asarray, [speeds, bearings, elevation_angles]))
+    assert np.all(speeds >= 0)
+    assert np.all((0 <= bearings) & (bearings <= 360))
+    assert np.all((-90 <= elevation_angles) & (elevation_angles <= 90))
+
+    theta_radians = np.radians(90 - bearings)
+    phi_radians = np.radians(90 - elevation_angles)
+
+    x = speeds * np.cos(theta_radians) * np.sin(phi_radians)
+    y = speeds * np.sin(theta_radians) * np.sin(phi_radians)
+    z = speeds * np.cos(phi_radians)
+    return np.stack([x, y, z], axis=-1).reshape(-1, 3)
+
+
+def vector_projections(vectors_1: np.ndarray, vectors_2: np.ndarray):
+    """
+    vector_projections: calculates the projection of each row of vectors_2 onto the same row of vectors_1 (the batched version
+        of vector_projection). The projection onto a zero vector is the zero vector
+    @param vectors_1: (n, 3) np.array with 1 vector per row (or a (3,) np.array used for every row)
+    @param vectors_2: (n, 3) np.array with 1 vector per row (or a (3,) np.array used for every row)
+    @return: (n, 3) np.array of the projection of each row of vectors_2 onto the same row of vectors_1
+    """
+    vectors_1, vectors_2 = np.broadcast_arrays(np.atleast_2d(vectors_1), np.atleast_2d(vectors_2))
+    assert vectors_1.shape[1] == 3
+
+    squared_norms = np.einsum("ij,ij->i", vectors_1, vectors_1)
+    dot_products = np.einsum("ij,ij->i", vectors_2, vectors_1)
+    scales = np.divide(dot_products, squared_norms, out=np.zeros(len(squared_norms)), where=squared_norms > 0)
+    return scales[:, np.newaxis] * vectors_1
+
+
+
+
+# Caching unhashable arguments and return values (numpy.ndarray is unhashable hence this work around)
+def hashable_argument(argument, decimals: int):
+    """
+    hashable_argument: turns 1 argument of a cached function into its cache key. Numbers and numpy arrays are rounded to
+        decimals places, so arguments closer than the tolerance share 1 cache entry
+    @param argument: a number, a numpy array or any hashable value
+    @param decimals: number of decimal places the numbers are rounded to
+    @return: hashable cache key of the argument
+    """
+    if isinstance(argument, (float, np.floating)):
+        return round(float(argument), decimals) + 0.0 # + 0.0 so -0.0 and 0.0 share 1 key
+    if isinstance(argument, np.ndarray):
+        if np.issubdtype(argument.dtype, np.floating):
+            argument = np.round(argument, decimals) + 0.0
+        return ("ndarray", argument.dtype.str, argument.shape, tuple(argument.ravel().tolist()))
+    return argument
+
+
+def unhashable_argument(key):
+    """
+    unhashable_argument: turns a cache key back into the (rounded) argument it was made from
+    @param key: cache key made by hashable_argument
+    @return: the rounded argument
+    """
+    if isinstance(key, tuple) and len(key) == 4 and key[0] == "ndarray":
+        return np.array(key[3], dtype=np.dtype(key[1])).reshape(key[2])
+    return key
+
+
+def read_only(value):
+    """
+    read_only: makes the numpy arrays of a cached return value read-only, so a caller can't change the value that later
+        calls get from the cache
+    @param value: a numpy array, a tuple of values or any other value
+    @return: the same value
+    """
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for item in value:
+            read_only(item)
+    return value
+
+
+def np_cache(function: Callable = None, maxsize: int = 4096, decimals: int = 9):
+    """
+    np_cache: memoizes a function of numbers and numpy arrays (as a decorator, @np_cache or @np_cache(maxsize=..., decimals=...))
+    - Numbers and numpy arrays are rounded to decimals places (the tolerance) before the function is called, so every call
+        in a cache entry gets the same result
+    - The least recently used results are evicted once maxsize results are cached
+    - Returned numpy arrays are read-only, copy them before changing them
+    - cache_info() gives the hits, misses, maxsize and currsize of the cache and cache_clear() empties it
+    @param function: the function to cache
+    @param maxsize: maximum number of results cached
+    @param decimals: number of decimal places the numbers (and numpy array values) are rounded to
+    @return: the cached function
+    """
+    if function is None:
+        return lambda function: np_cache(function, maxsize=maxsize, decimals=decimals)
+
+    @lru_cache(maxsize=maxsize)
+    def cached_wrapper(hashable_args, hashable_kwargs):
+        args = [unhashable_argument(key) for key in hashable_args]
+        kwargs = {name: unhashable_argument(key) for name, key in hashable_kwargs}
+        return read_only(function(*args, **kwargs))
 
     @wraps(function)
-    def wrapper(array):
-        return cached_wrapper(tuple(array))
+    def wrapper(*args, **kwargs):
+        hashable_args = tuple(hashable_argument(argument, decimals) for argument in args)
+        hashable_kwargs = tuple(sorted((name, hashable_argument(argument, decimals)) for name, argument in kwargs.items()))
+        return cached_wrapper(hashable_args, hashable_kwargs)
 
     wrapper.cache_info = cached_wrapper.cache_info
     wrapper.cache_clear = cached_wrapper.cache_clear
     return wrapper
 
 # Add your function here so it caches the results
-np_cache(velocity_vector)
-np_cache(vector_projection)
+velocity_vector = np_cache(velocity_vector)
+vector_projection = np_cache(vector_projection)
 
 
 
 
 if __name__ == "__main__":
-    pass
+    import time
+
+    # Benchmark: the velocity of a constant speed simulation (repeated speed, bearing and elevation_angle combinations)
+    rng = np.random.default_rng(0)
+    bearings = rng.choice(np.arange(0, 360, 15), 100000).astype(float)
+    elevation_angles = rng.choice(np.arange(-5, 6), 100000).astype(float)
+
+    t0 = time.perf_counter()
+    for bearing, elevation_angle in zip(bearings, elevation_angles):
+        velocity_vector(20.0, bearing, elevation_angle)
+    t1 = time.perf_counter()
+    for bearing, elevation_angle in zip(bearings, elevation_angles):
+        velocity_vector.__wrapped__(20.0, bearing, elevation_angle)
+    t2 = time.perf_counter()
+    print(f"cached: {t1 - t0:.4f}s ({velocity_vector.cache_info()}), uncached: {t2 - t1:.4f}s")
@@ -1,11 +1,11 @@
-from geographiclib.geodesic import Geodesic
 from pyproj import Geod
-import math
+import numpy as np
 import pandas as pd
 import warnings
 
 
 
+WGS84_GEOD = Geod(ellps="WGS84") # Reused for every batched geodesic calculation
 
 def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd.DataFrame:
     """
@@ -31,60 +31,57 @@ def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd
 
     
     """
-    2) Interpolates each segment into multiple coordinates with the distance between each coordinate less than interval_upper_bound
+    2) Interpolates every segment at once into multiple coordinates with the distance between each coordinate less than 
+        interval_upper_bound. One batched Geod.inv call gives every segment's length and interval count, and one batched 
+        Geod.fwd call places every interpolated point (equally spaced along the segment, same as Geod.npts) into preallocated arrays
     - Requires: polyline_coordinates
-    - Result: segment_cooridnates
-    """
-    segment_cooridnates = []
-    for i, _ in enumerate(polyline_coordinates[1:], start=1):
-        lat_1, long_1 = polyline_coordinates[i-1]
-        lat_2, long_2 = polyline_coordinates[i]
-
-        geo_data = Geodesic.WGS84.Inverse(lat_1, long_1, lat_2, long_2)
-        dist = geo_data['s12'] # https://geographiclib.sourceforge.io/1.52/python/interface.html
-        intervals_num = math.ceil(dist/interval_upper_bound)-1
-        
-        if intervals_num == 0:
-            segment_cooridnates.append([(lat_1, long_1), (lat_2, long_2)])
-        else:
-            g = Geod(ellps="WGS84")
-            longlats = g.npts(long_1, lat_1, long_2, lat_2, intervals_num) # be careful here because the lat and longs order is switched
-            data = [(lat_1, long_1)] + [(lat, long) for long, lat in longlats] + [(lat_2, long_2)]
-            segment_cooridnates.append(data)
+    - Result: latitudes
+    - Result: longitudes
+    - Result: polyline_positions
+    """
+    polyline = np.asarray(polyline_coordinates, dtype=np.float64).reshape(-1, 2)
+    polyline_latitudes = polyline[:, 0]
+    polyline_longitudes = polyline[:, 1]
+
+    # be careful here because pyproj uses (long, lat) order
+    azimuths, _, distances = WGS84_GEOD.inv(polyline_longitudes[:-1], polyline_latitudes[:-1], polyline_longitudes[1:], polyline_latitudes[1:])
+    intervals_num = np.maximum(np.ceil(distances/interval_upper_bound).astype(np.int64) - 1, 0) # points added inside each segment
+    polyline_positions = np.concatenate(([0], np.cumsum(intervals_num + 1))) # index of each polyline point in the route
+    number_of_coordinates = polyline_positions[-1] + 1
+
+    latitudes = np.empty(number_of_coordinates, dtype=np.float64)
+    longitudes = np.empty(number_of_coordinates, dtype=np.float64)
+    latitudes[polyline_positions] = polyline_latitudes
+    longitudes[polyline_positions] = polyline_longitudes
+
+    # Every coordinate but the last is step k of its segment (step 0 being the segment's starting polyline point)
+    segment = np.repeat(np.arange(len(distances)), intervals_num + 1)
+    step = np.arange(number_of_coordinates - 1) - polyline_positions[segment]
+    interpolated = np.flatnonzero(step > 0)
+    if len(interpolated) > 0:
+        segment = segment[interpolated]
+        step_distance = step[interpolated] * distances[segment] / (intervals_num[segment] + 1)
+        longitudes[interpolated], latitudes[interpolated], _ = WGS84_GEOD.fwd(
+            polyline_longitudes[segment], polyline_latitudes[segment], azimuths[segment], step_distance
+            )
 
     
     """
-    3) Formats segment_cooridnates into a long list of coordinates
-    - Requires: segment_cooridnates
+    3) Maps each coordinate to its polygonal chain point index (NaN for interpolated coordinates)
+    - Requires: polyline_positions
     - Result: coordinate_point_index
-    - Result: all_coordinates
     """
-    segment_points = {0:0} # {point, index}
-    all_coordinates = segment_cooridnates[0].copy()
-    for i, segment_coordinate in enumerate(segment_cooridnates[1:], start=1):
-        segment_points[len(all_coordinates)-1] = i
-        all_coordinates += segment_coordinate[1:]
-    segment_points[len(all_coordinates)-1] = len(segment_cooridnates)
-
-    coordinate_point_index = [segment_points[i] if i in segment_points else None for i in range(len(all_coordinates))]
+    coordinate_point_index = np.full(number_of_coordinates, np.nan)
+    coordinate_point_index[polyline_positions] = np.arange(len(polyline_positions))
+    if len(polyline_positions) == number_of_coordinates: # no interpolated coordinates, keep integers like pandas would
+        coordinate_point_index = coordinate_point_index.astype(np.int64)
 
 
     """
-    4) Converts list of coordinates into their lat and long
-    - Requires: all_coordinates
-    - Result: latitudes
-    - Result: longitudes
-    """
-    latitudes = []
-    longitudes = []
-    for _, coordinate in enumerate(all_coordinates):
-        latitudes.append(coordinate[0])
-        longitudes.append(coordinate[1])
-
-    
-    """
-    5) Finds the distance to the next coordinate, the bearing to the next and previous coordinate
-    - Requires: all_coordinates
+    4) Finds the distance to the next coordinate, the bearing to the next and previous coordinate for all coordinates in
+        one batched Geod.inv call
+    - Requires: latitudes
+    - Requires: longitudes
     - Result: dist_to_next_coordinate
     - Result: trip_meters
     - Result: true_bearing_to_next
@@ -92,27 +89,19 @@ def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd
     - Result: bearing_to_next_360
     - Result: bearing_to_prev_360
     """
-    dist_to_next_coordinate = []
-    trip_meters = [0]
-    true_bearing_to_next = []
-    true_bearing_to_prev = [None]
-    for i, _ in enumerate(all_coordinates[:-1]):
-        lat_1, long_1 = all_coordinates[i]
-        lat_2, long_2 = all_coordinates[i+1]
-        geo_data = Geodesic.WGS84.Inverse(lat_1, long_1, lat_2, long_2) # return values: https://geographiclib.sourceforge.io/1.52/python/interface.html
-        dist_to_next_coordinate.append(geo_data["s12"]) # dist between coordinates
-        trip_meters.append(trip_meters[-1] + geo_data["s12"]) # trip dist so far
-        true_bearing_to_next.append(geo_data["azi1"]) # bearing to next
-        true_bearing_to_prev.append(geo_data["azi2"]+180 if geo_data["azi2"]+180 <= 180 else geo_data["azi2"]-180) # bearing to prev
-    dist_to_next_coordinate.append(None)
-    true_bearing_to_next.append(None)
+    # Geod.inv returns the back azimuth (bearing from coordinate i+1 to coordinate i) as its second value
+    azimuth_to_next, azimuth_to_prev, dist = WGS84_GEOD.inv(longitudes[:-1], latitudes[:-1], longitudes[1:], latitudes[1:])
+    trip_meters = np.concatenate(([0.0], np.cumsum(dist)))
 
-    bearing_to_next_360 = [i+360 if (i is not None and i < 0) else i for i in true_bearing_to_next]
-    bearing_to_prev_360 = [i+360 if (i is not None and i < 0) else i for i in true_bearing_to_prev]
+    dist_to_next_coordinate = dist.tolist() + [None]
+    true_bearing_to_next = azimuth_to_next.tolist() + [None]
+    true_bearing_to_prev = [None] + azimuth_to_prev.tolist()
+    bearing_to_next_360 = np.where(azimuth_to_next < 0, azimuth_to_next + 360, azimuth_to_next).tolist() + [None]
+    bearing_to_prev_360 = [None] + np.where(azimuth_to_prev < 0, azimuth_to_prev + 360, azimuth_to_prev).tolist()
 
 
     """
-    6) Finds the general traveling direction at the coordinate
+    5) Finds the general traveling direction at the coordinate
     - Requires: general_travel_direction
     - Result: general_travel_direction
     """
@@ -139,14 +128,14 @@ def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd
 
 
     """
-    7) Determines the type of turn and the turning angle
-    - Requires: all_coordinates
+    6) Determines the type of turn and the turning angle
+    - Requires: true_bearing_to_next
     - Result: turn_bearings
     - Result: turn_type
     - Result: relative_turn_angle
     """
     turn_bearings = [None]
-    for i, _ in enumerate(all_coordinates[1:-1], start=1):
+    for i in range(1, number_of_coordinates-1):
         bearing1 = true_bearing_to_next[i-1]
         bearing2 = true_bearing_to_next[i]
         if bearing2-bearing1 > 180:
@@ -174,7 +163,7 @@ def get_coordinates(polyline_coordinates: list, interval_upper_bound: int) -> pd
 
 
     """
-    8) Builds Pandas DataFrame to return
+    7) Builds Pandas DataFrame to return
     - Requires: coordinate_point_index
     - Requires: latitudes
     - Requires: longitudes
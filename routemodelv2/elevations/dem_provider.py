@@ -0,0 +1,188 @@
+import os
+import re
+import numpy as np
+
+
+
+
+HGT_NODATA = -32768 # SRTM void value
+HGT_FILENAME_PATTERN = re.compile(r"([NS])(\d{2})([EW])(\d{3})", re.IGNORECASE)
+
+
+class DEMTile():
+
+
+    def __init__(self, filepath: str, north: float, west: float, rows: int, columns: int, cell_size: float,
+                 dtype: str = ">i2", nodata: float = HGT_NODATA):
+        """
+        DEMTile is a raw grid of elevations in a file (rows from north to south, columns from west to east, no header). The
+            file is memory-mapped the first time it is read, so only the pages around the looked up coordinates are loaded
+        @param filepath: path of the grid file
+        @param north: latitude of the first row
+        @param west: longitude of the first column
+        @param rows: number of rows in the grid
+        @param columns: number of columns in the grid
+        @param cell_size: distance (in degrees) between 2 rows or 2 columns
+        @param dtype: numpy dtype of the grid values (big-endian 16 bit integers for SRTM)
+        @param nodata: grid value used for voids (their elevation is nan)
+        @return: DEMTile object
+        """
+        self.filepath = filepath
+        self.north = north
+        self.west = west
+        self.rows = rows
+        self.columns = columns
+        self.cell_size = cell_size
+        self.south = north - (rows - 1) * cell_size
+        self.east = west + (columns - 1) * cell_size
+        self._dtype = dtype
+        self._nodata = nodata
+        self._grid = None
+
+
+    @classmethod
+    def from_hgt(cls, filepath: str):
+        """
+        from_hgt builds the DEMTile of an SRTM .hgt file. The tile's position comes from the filename (e.g. N43W081.hgt is
+            the tile from 43N to 44N and from 81W to 80W) and the resolution from the file size (1201x1201 for SRTM3,
+            3601x3601 for SRTM1)
+        @param filepath: path of the .hgt file
+        @return: DEMTile object
+        """
+        match = HGT_FILENAME_PATTERN.search(os.path.basename(filepath))
+        if match is None:
+            raise ValueError(f"{filepath} is not named like an SRTM tile (e.g. N43W081.hgt)")
+        south = int(match.group(2)) * (1 if match.group(1).upper() == "N" else -1)
+        west = int(match.group(4)) * (1 if match.group(3).upper() == "E" else -1)
+
+        size = int(round((os.path.getsize(filepath) / 2) ** 0.5))
+        if size * size * 2 != os.path.getsize(filepath):
+            raise ValueError(f"{filepath} is not a square grid of 16 bit elevations")
+        return cls(filepath, north=south + 1, west=west, rows=size, columns=size, cell_size=1 / (size - 1))
+
+
+    def grid(self):
+        """
+        grid is a method that returns the (read only) memory-mapped grid of the tile
+        @return: np.memmap of shape (rows, columns)
+        """
+        if self._grid is None:
+            self._grid = np.memmap(self.filepath, dtype=self._dtype, mode="r", shape=(self.rows, self.columns))
+        return self._grid
+
+
+    def contains(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """
+        contains is a method that checks which coordinates are inside the tile
+        @param latitudes: np.array of latitudes
+        @param longitudes: np.array of longitudes
+        @return: np.array of booleans
+        """
+        return (latitudes >= self.south) & (latitudes <= self.north) & (longitudes >= self.west) & (longitudes <= self.east)
+
+
+    def interpolate(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """
+        interpolate is a method that bilinearly interpolates the elevation of coordinates inside the tile
+        @param latitudes: np.array of latitudes
+        @param longitudes: np.array of longitudes
+        @return: np.array of the elevation of each coordinate (nan if any of the 4 surrounding grid points is a void)
+        """
+        rows = (self.north - latitudes) / self.cell_size
+        columns = (longitudes - self.west) / self.cell_size
+        row0 = np.clip(np.floor(rows).astype(np.int64), 0, self.rows - 2)
+        column0 = np.clip(np.floor(columns).astype(np.int64), 0, self.columns - 2)
+        row_weight = rows - row0
+        column_weight = columns - column0
+
+        grid = self.grid()
+        corners = [grid[row0, column0], grid[row0, column0 + 1], grid[row0 + 1, column0], grid[row0 + 1, column0 + 1]]
+        corners = [np.where(corner == self._nodata, np.nan, corner.astype(np.float64)) for corner in corners]
+        north_elevations = corners[0] * (1 - column_weight) + corners[1] * column_weight
+        south_elevations = corners[2] * (1 - column_weight) + corners[3] * column_weight
+        return north_elevations * (1 - row_weight) + south_elevations * row_weight
+
+
+class DEMElevationProvider():
+
+
+    def __init__(self, tiles: list):
+        """
+        DEMElevationProvider looks up elevations offline in local digital elevation model tiles. It has the same fetch method
+            as ElevationFetcher, so it can be passed to get_elevations as the fetcher
+        - Note: SRTM elevations are heights above sea level (EGM96 geoid) while get_elevations requests ellipsoid heights from
+            Bing Maps, so the 2 backends differ by the geoid height (about -35m in southern Ontario)
+        @param tiles: list of DEMTile (a coordinate covered by several tiles uses the first one)
+        @return: DEMElevationProvider object
+        """
+        if len(tiles) == 0:
+            raise ValueError("DEMElevationProvider requires at least 1 tile")
+        self.tiles = tiles
+
+
+    @classmethod
+    def from_directory(cls, directory: str):
+        """
+        from_directory builds a DEMElevationProvider from every SRTM .hgt file in a directory
+        @param directory: path of the directory with the .hgt files
+        @return: DEMElevationProvider object
+        """
+        filenames = sorted(filename for filename in os.listdir(directory) if filename.lower().endswith(".hgt"))
+        return cls([DEMTile.from_hgt(os.path.join(directory, filename)) for filename in filenames])
+
+
+    def get(self, latitudes, longitudes):
+        """
+        get is a method that looks up the elevation of arrays of coordinates
+        @param latitudes: array of latitudes
+        @param longitudes: array of longitudes
+        @return: np.array of the elevation of each coordinate (nan for voids)
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        elevations = np.full(len(latitudes), np.nan)
+        remaining = np.ones(len(latitudes), dtype=bool)
+
+        for tile in self.tiles:
+            inside = remaining & tile.contains(latitudes, longitudes)
+            if inside.any():
+                elevations[inside] = tile.interpolate(latitudes[inside], longitudes[inside])
+                remaining &= ~inside
+
+        if remaining.any():
+            first = np.flatnonzero(remaining)[0]
+            raise ValueError(f"{remaining.sum()} coordinates are not covered by any tile, e.g. ({latitudes[first]}, {longitudes[first]})")
+        return elevations
+
+
+    def fetch(self, coordinates: list) -> list:
+        """
+        fetch is a method that looks up the elevation of every coordinate (same interface as ElevationFetcher.fetch)
+        @param coordinates: a list of coordinate tuples
+        @return: a list of the elevation of each coordinate
+        """
+        if len(coordinates) == 0:
+            return []
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return self.get(coordinates[:, 0], coordinates[:, 1]).tolist()
+
+
+
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    # Benchmark: 150k route points on a synthetic SRTM1 (3601x3601) tile
+    with tempfile.TemporaryDirectory() as directory:
+        size = 3601
+        grid = np.add.outer(np.arange(size), np.arange(size)) % 500
+        grid.astype(">i2").tofile(os.path.join(directory, "N43W081.hgt"))
+
+        provider = DEMElevationProvider.from_directory(directory)
+        latitudes = np.linspace(43.1, 43.9, 150000)
+        longitudes = np.linspace(-80.9, -80.1, 150000)
+
+        t0 = time.perf_counter()
+        elevations = provider.get(latitudes, longitudes)
+        print(f"{len(elevations)} elevations in {time.perf_counter() - t0:.4f}s")
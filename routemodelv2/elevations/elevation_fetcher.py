@@ -0,0 +1,186 @@
+import json
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from elevations.point_compression import compress_coordinates, plan_chunks
+
+
+
+
+BING_ELEVATION_URL = "http://dev.virtualearth.net/REST/v1/Elevation/List"
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+class TokenBucket():
+
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        TokenBucket is a thread-safe token bucket rate limiter. Tokens refill at rate per second up to capacity, and every
+            request takes 1 token (waiting for one if the bucket is empty)
+        @param rate: number of tokens added per second
+        @param capacity: maximum number of tokens, which is the largest burst of requests allowed at once
+        @return: TokenBucket object
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def acquire(self):
+        """
+        acquire is a method that takes 1 token, blocking until one is available
+        @return: None
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+class ElevationFetcher():
+
+
+    def __init__(self, BING_MAPS_API_KEY: str, max_url_length: int = 2048, max_points: int = 1024, max_workers: int = 8,
+                 requests_per_second: float = 5, burst: int = 1, max_retries: int = 5, backoff: float = 0.5, timeout: float = 10,
+                 encoder = compress_coordinates, session: requests.Session = None, url: str = BING_ELEVATION_URL,
+                 debug: bool = False):
+        """
+        ElevationFetcher requests the elevations of a list of coordinates from the Bing Maps API. The coordinates are split
+            into as few chunks as fit in the url length limit, which are requested concurrently over a pooled session, rate
+            limited by a token bucket and retried with exponential backoff, and the chunk results are put back together in
+            the order of the coordinates
+        @param BING_MAPS_API_KEY: your bing maps api key (as a string)
+        @param max_url_length: maximum length of a request url (the chunks are planned from the compressed length of each
+            coordinate). Lower it if there's an API (url) size issue
+        @param max_points: maximum number of coordinates per request (1024 for the Bing Maps API)
+        @param max_workers: maximum number of requests in flight at once
+        @param requests_per_second: rate limit of the requests (including retries), None for no limit
+        @param burst: number of requests that can be sent at once before the rate limit applies
+        @param max_retries: number of times a failed request is retried before raising the error
+        @param backoff: seconds waited before the first retry, doubled on every retry after that
+        @param timeout: seconds to wait for the server to connect and to answer each request before retrying it (the timeout
+            of requests, so also a (connect, read) tuple), None to wait forever
+        @param encoder: function that compresses a list of coordinate tuples into the points query string
+        @param session: requests.Session (or any object with a compatible post method) used for the requests. A pooled
+            requests.Session is created if None
+        @param url: url of the elevation list API
+        @param debug: Set to True to print the planned number of requests before fetching. Else, False
+        @return: ElevationFetcher object
+        """
+        self.BING_MAPS_API_KEY = BING_MAPS_API_KEY
+        self.max_url_length = max_url_length
+        self.max_points = max_points
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.encoder = encoder
+        self.url = url
+        self.debug = debug
+        self._rate_limiter = TokenBucket(requests_per_second, burst) if requests_per_second is not None else None
+
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.session = session
+
+
+    def fetch(self, coordinates: list) -> list:
+        """
+        fetch is a method that requests the elevation of every coordinate
+        @param coordinates: a list of coordinate tuples
+        @return: a list of the elevation of each coordinate (in the same order as coordinates)
+        """
+        chunks = [coordinates[start:end] for start, end in self.plan(coordinates)]
+        if self.debug == True:
+            print("\n-> Planned Requests\n", f"{len(chunks)} requests for {len(coordinates)} coordinates")
+        if len(chunks) == 0:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            chunk_elevations = executor.map(self.fetch_chunk, chunks) # map keeps the results in the order of the chunks
+
+        elevations = []
+        for elevations_data in chunk_elevations:
+            elevations.extend(elevations_data)
+        return elevations
+
+
+    def plan(self, coordinates: list) -> list:
+        """
+        plan is a method that splits the coordinates into the chunks that fetch requests, without requesting anything (the
+            number of chunks is the number of requests fetch will make, not counting retries)
+        @param coordinates: a list of coordinate tuples
+        @return: list of the (start, end) coordinate indexes of each chunk (end excluded)
+        """
+        if len(coordinates) == 0:
+            return []
+        max_length = self.max_url_length - len(self.query_string(""))
+        return plan_chunks(coordinates, max_length=max_length, max_points=self.max_points)
+
+
+    def query_string(self, compressed_coordinates: str) -> str:
+        """
+        query_string is a method that builds the request url of a compressed coordinates string
+        @param compressed_coordinates: the compressed coordinates string
+        @return: the request url
+        """
+        return f"{self.url}?points={compressed_coordinates}&heights=ellipsoid&key={self.BING_MAPS_API_KEY}"
+
+
+    def fetch_chunk(self, coordinates: list) -> list:
+        """
+        fetch_chunk is a method that requests the elevations of 1 chunk of coordinates (retrying failed requests)
+        @param coordinates: a list of coordinate tuples
+        @return: a list of the elevation of each coordinate
+        """
+        compressed_coordinates = self.encoder(coordinates)
+        API_query_string = self.query_string(compressed_coordinates)
+
+        for attempt in range(self.max_retries + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+
+            try:
+                response = self.session.post(API_query_string, timeout=self.timeout)
+                retry = response.status_code in RETRY_STATUS_CODES
+                # Bing Maps answers rate limited requests with empty results and this header instead of an error
+                retry = retry or response.headers.get("X-MS-BM-WS-INFO") == "1"
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                retry = True
+
+            if not retry:
+                break
+            if attempt == self.max_retries:
+                raise ValueError(f"Bing Maps API request failed after {self.max_retries} retries (status code {response.status_code})")
+            time.sleep(self.backoff * 2 ** attempt)
+
+        response = response.json()
+        if response["statusCode"] != 200:
+            print("\n-> API Response\n", json.dumps(response, indent=2))
+            raise ValueError(f"Bing Maps API request error {response['statusCode']}: {response['statusDescription']}")
+
+        elevations_data = response["resourceSets"][0]["resources"][0]["elevations"]
+        if len(elevations_data) != len(coordinates):
+            raise ValueError(f"Bing Maps API returned {len(elevations_data)} elevations for {len(coordinates)} coordinates")
+        return elevations_data
+
+
+
+
+if __name__ == "__main__":
+    pass
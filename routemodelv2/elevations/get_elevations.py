@@ -1,79 +1,58 @@
-import requests
-import json
+import numpy as np
 import pandas as pd
+from elevations.elevation_cache import ElevationCache
+from elevations.elevation_fetcher import ElevationFetcher
 
-# todo: add calculation of car elevation angle
+# The grade and car elevation angle between coordinates are calculated from these elevations by get_grades (get_grades.py)
 
 
-def get_elevations(coordinates: list, BING_MAPS_API_KEY: str) -> pd.DataFrame:
+def get_elevations(coordinates: list, BING_MAPS_API_KEY: str, cache: ElevationCache = None, fetcher: ElevationFetcher = None) -> pd.DataFrame:
     """
     get_elevations is a function that consumes a list of coordinates and bing maps API key and returns a pandas 
         dataframe containing the elevation of each coordinate and relative elevation gain (from to next coordinate)
     @param coordinates: a list of coordinate tuples
     @param BING_MAPS_API_KEY: your bing maps api key (as a string)
+    @param cache (optional): ElevationCache to look elevations up in first. Only the coordinates missing from the cache are
+        requested from the API (and then saved into the cache), so no request is made when every coordinate is cached
+    @param fetcher (optional): elevation backend with a fetch(coordinates) method. Either an ElevationFetcher (Bing Maps) to
+        configure the concurrency, rate limit, retries, encoder or http client, or a DEMElevationProvider to look elevations up
+        offline in local tiles. A default ElevationFetcher is used if None
     @return pandas dataframe with data on coordinates, coordinates_elevations_data, relative_elevation_gains
     """
 
 
     """
-    1) "Chunk" coordinates into lists of length 10000. Change list_len if there's an API size issue
-    2) Compresses each coordinate chunk into 1 compressed query string for Bing Maps API
-    - https://learn.microsoft.com/en-us/bingmaps/rest-services/elevations/point-compression-algorithm
+    0) Looks up the coordinates in the cache (if there is one) so only the cache misses are requested
     - Requires: coordinates
-    - Result: compressed_coordinates_lst
+    - Result: cached_elevations, query_coordinates
     """
-    list_len = 100
-    split_coordinates = [coordinates[i:min(i+list_len, len(coordinates))] for i in range(0, len(coordinates), list_len)]
-    compressed_coordinates_lst = []
-
-    for coordinate_lst in split_coordinates:
-        latitude = 0
-        longitude = 0
-        compressed_coordinates = ""
-
-        for coordinate in coordinate_lst:
-            newLatitude = round(coordinate[0] * 100000)
-            newLongitude = round(coordinate[1] * 100000)
-
-            dy = newLatitude - latitude
-            dx = newLongitude - longitude
-            latitude = newLatitude
-            longitude = newLongitude
-
-            dy = (dy << 1) ^ (dy >> 31)
-            dx = (dx << 1) ^ (dx >> 31)
-
-            index = int(((dy + dx) * (dy + dx + 1) / 2) + dy)
-            while index > 0:
-                rem = index & 31
-                index = int((index - rem) / 32)
-                if index > 0:
-                    rem += 32
-                compressed_coordinates += "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"[rem]
-
-        compressed_coordinates_lst.append(compressed_coordinates)
+    cached_elevations = None
+    query_coordinates = coordinates
+    if cache is not None:
+        cached_elevations = cache.get(coordinates)
+        query_coordinates = [coordinates[i] for i in np.flatnonzero(np.isnan(cached_elevations))]
 
 
     """
-    3) Requests the elevation for all the coordinates using our compressed coordinate query string and saves it into a list
-    - Requires: compressed_coordinates_lst
+    1) Requests the elevation for all the (uncached) coordinates. The fetcher splits them into chunks, compresses each chunk
+        into 1 query string for Bing Maps API and requests the chunks concurrently, returning the elevations in order (or
+        looks them up in local tiles for a DEMElevationProvider)
+    - https://learn.microsoft.com/en-us/bingmaps/rest-services/elevations/point-compression-algorithm
+    - Requires: query_coordinates
     - Result: coordinates_elevations_data
     """
-    coordinates_elevations_data = []
-    for compressed_coordinates in compressed_coordinates_lst:
-        API_query_string = f"http://dev.virtualearth.net/REST/v1/Elevation/List?points={compressed_coordinates}&heights=ellipsoid&key={BING_MAPS_API_KEY}"
-        response = requests.post(API_query_string).json()
-
-        if response["statusCode"] != 200:
-            print("\n-> API Response\n", json.dumps(response, indent=2))
-            raise ValueError(f"Bing Maps API request error {response['statusCode']}: {response['statusDescription']}")
+    if fetcher is None:
+        fetcher = ElevationFetcher(BING_MAPS_API_KEY)
+    coordinates_elevations_data = fetcher.fetch(query_coordinates)
 
-        elevations_data = response["resourceSets"][0]["resources"][0]["elevations"]
-        coordinates_elevations_data.extend(elevations_data)
+    if cache is not None:
+        cache.put(query_coordinates, coordinates_elevations_data)
+        cached_elevations[np.isnan(cached_elevations)] = coordinates_elevations_data
+        coordinates_elevations_data = cached_elevations.tolist()
 
 
     """
-    4) Calculates the elevation change between the i and i+1 elevation in a list of elevations
+    2) Calculates the elevation change between the i and i+1 elevation in a list of elevations
     - Requires: coordinates_elevations_data
     - Result: relative_elevation_gains
     """
@@ -86,7 +65,7 @@ def get_elevations(coordinates: list, BING_MAPS_API_KEY: str) -> pd.DataFrame:
 
 
     """
-    5) Build the coordinates, elevation, and relative_elevation_gains values in a dataframe for the user to use
+    3) Build the coordinates, elevation, and relative_elevation_gains values in a dataframe for the user to use
     - Requires: coordinates
     - Requires: coordinates_elevations_data
     - Requires: relative_elevation_gains
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import savgol_filter
+
+
+
+
+SMOOTHING_METHODS = ["savgol", "moving_average", None]
+
+
+def smooth_elevations(elevations: np.ndarray, method: str = "savgol", window_length: int = 9, polyorder: int = 2) -> np.ndarray:
+    """
+    smooth_elevations is a function that smooths an elevation profile to suppress the noise of the elevation data (which
+        becomes large errors in the grade over short distances). Missing (nan) elevations are linearly interpolated first
+    @param elevations: np.array of the elevation of each coordinate
+    @param method: "savgol" (Savitzky-Golay filter, keeps the shape of hills), "moving_average" or None (no smoothing)
+    @param window_length: number of coordinates in the smoothing window (odd, shrunk for routes shorter than the window)
+    @param polyorder: order of the polynomial fitted in each window (savgol only)
+    @return: np.array of the smoothed elevation of each coordinate
+    """
+    if method not in SMOOTHING_METHODS:
+        raise ValueError(f"method must be one of {SMOOTHING_METHODS}")
+
+    elevations = np.array(elevations, dtype=np.float64)
+    missing = np.isnan(elevations)
+    if missing.all():
+        raise ValueError("smooth_elevations requires at least 1 elevation")
+    if missing.any():
+        positions = np.arange(len(elevations))
+        elevations[missing] = np.interp(positions[missing], positions[~missing], elevations[~missing])
+
+    window_length = min(window_length, len(elevations))
+    window_length -= 1 - window_length % 2 # the window is centered on each coordinate so it must be odd
+    if method is None or window_length < 3:
+        return elevations
+
+    if method == "savgol":
+        if window_length <= polyorder:
+            return elevations
+        return savgol_filter(elevations, window_length=window_length, polyorder=polyorder, mode="interp")
+
+    # Moving average, the ends of the route are padded with a point reflection so a constant grade stays the same up to the ends
+    padded = np.pad(elevations, window_length // 2, mode="reflect", reflect_type="odd")
+    return np.convolve(padded, np.ones(window_length) / window_length, mode="valid")
+
+
+def get_grades(elevations: list, distances_to_next: list, method: str = "savgol", window_length: int = 9,
+               polyorder: int = 2) -> pd.DataFrame:
+    """
+    get_grades is a function that consumes the elevation of each coordinate and the distance between coordinates and returns
+        a pandas dataframe containing the (smoothed) grade and elevation angle from each coordinate to the next one
+    - The elevation angle is in degrees (+ve is going up, -ve is going down), the same as the elevation_angle of carforces
+    - The grade and elevation angle of the last coordinate (no next coordinate) are nan, and 0 for coordinates 0m apart
+    @param elevations: a list of the elevation (in meters) of each coordinate (the "elevation(m)" column of get_elevations)
+    @param distances_to_next: a list of the distance (in meters) to the next coordinate (the "dist_to_next_coordinate(m)"
+        column of get_coordinates)
+    @param method: smoothing of the elevations, "savgol" (Savitzky-Golay filter), "moving_average" or None
+    @param window_length: number of coordinates in the smoothing window
+    @param polyorder: order of the polynomial fitted in each window (savgol only)
+    @return: pandas dataframe with data on smoothed_elevation, grade_to_next, elevation_angle_to_next
+    """
+    distances_to_next = np.array(distances_to_next, dtype=np.float64)
+    if len(elevations) != len(distances_to_next):
+        raise ValueError("get_grades requires 1 distance to the next coordinate per elevation")
+
+    smoothed_elevations = smooth_elevations(elevations, method=method, window_length=window_length, polyorder=polyorder)
+
+    elevation_gains_to_next = np.append(np.diff(smoothed_elevations), np.nan)
+    distances_to_next[-1] = np.nan
+    moving = distances_to_next > 0
+    grades_to_next = np.divide(elevation_gains_to_next, distances_to_next, out=np.zeros(len(distances_to_next)), where=moving)
+    elevation_angles_to_next = np.degrees(np.arctan(grades_to_next))
+    grades_to_next[-1] = elevation_angles_to_next[-1] = np.nan
+
+    return pd.DataFrame({
+        "smoothed_elevation(m)": smoothed_elevations,
+        "grade_to_next(%)": grades_to_next * 100,
+        "elevation_angle_to_next(deg)": elevation_angles_to_next,
+    })
+
+
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,209 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import numpy as np
+import pandas as pd
+
+from carforces.carforces import (
+    x_force_gravity, x_force_friction,
+    EARTH_GRAVITY, ROLLING_RESISTANCE_COEFFICIENT, DRAG_COEFFICIENT, AIR_DENSITY,
+    )
+from tools.tools import velocity_vectors
+
+
+
+
+# Column names looked up in the route data, in order of preference (RouteClass names first, then RouteModel names)
+DISTANCE_COLUMNS = ["dist_to_next_coordinate(m)", "dist_to_next_coordinate"]
+BEARING_COLUMNS = ["bearing_to_next_360"]
+ELEVATION_ANGLE_COLUMNS = ["elevation_angle_to_next(deg)"]
+ELEVATION_GAIN_COLUMNS = ["elevation_gains_to_next(m)"]
+WIND_SPEED_COLUMNS = ["wind_speed(m/s)"]
+WIND_DIRECTION_COLUMNS = ["wind_direction_360"]
+
+
+def find_column(data: pd.DataFrame, column_names: list):
+    """
+    find_column is a function that gets the first of column_names that is in the route data
+    @param data: pandas dataframe of the route data
+    @param column_names: list of the names the column can have
+    @return: np.array of the column's data (as floats), None if the route data has none of the columns
+    """
+    for column_name in column_names:
+        if column_name in data.columns:
+            return data[column_name].to_numpy(dtype=np.float64)
+    return None
+
+
+class EnergyModel():
+
+
+    def __init__(self, route, car_mass: float, car_cross_sectional_area: float, drag_coefficent: float = DRAG_COEFFICIENT,
+                 coef_resistance: float = ROLLING_RESISTANCE_COEFFICIENT, fluid_density: float = AIR_DENSITY,
+                 gravity: float = EARTH_GRAVITY):
+        """
+        EnergyModel simulates the tractive energy the car needs to drive a route at a speed profile. Everything that does not
+            depend on the speed (the segment lengths, the gravity and rolling resistance forces and the wind along the
+            direction of travel) is calculated once here, so simulating a speed profile (or many at once) is a few array
+            operations over the route segments
+        - Segment i goes from coordinate i to coordinate i + 1 and is driven at speeds[i]
+        - The route data needs a distance to the next coordinate column ("dist_to_next_coordinate(m)" from RouteClass or
+            "dist_to_next_coordinate" from RouteModel). The slope is taken from "elevation_angle_to_next(deg)" (see
+            elevations/get_grades) or else "elevation_gains_to_next(m)", and the route is flat if it has neither
+        - Wind is taken from the "wind_speed(m/s)" and "wind_direction_360" (the bearing the wind blows from, as in weather
+            forecasts) columns with the "bearing_to_next_360" column, and there is no wind if they are missing
+        @param route: RouteClass object or pandas dataframe of the route data (e.g. RouteClass.data() or RouteModel.get_data())
+        @param car_mass: mass of the car
+        @param car_cross_sectional_area: the cross sectional area of the car when looking directly at the front of the car
+        @param drag_coefficent: the drag coefficent of the car
+        @param coef_resistance: the rolling resistance coefficient of the car
+        @param fluid_density: the fluid density (air density)
+        @param gravity: gravitational acceleration on earth
+        @return: EnergyModel object
+        """
+        data = route.data() if callable(getattr(route, "data", None)) else route
+
+        distances_to_next = find_column(data, DISTANCE_COLUMNS)
+        if distances_to_next is None:
+            raise ValueError(f"the route data requires 1 of the {DISTANCE_COLUMNS} columns")
+        if len(distances_to_next) < 2:
+            raise ValueError("the route data requires at least 2 coordinates")
+        self.number_of_coordinates = len(distances_to_next)
+        self.distances = np.nan_to_num(distances_to_next[:-1]) # 1 per segment, the last coordinate has no next coordinate
+
+        elevation_angles = find_column(data, ELEVATION_ANGLE_COLUMNS)
+        if elevation_angles is None:
+            elevation_gains = find_column(data, ELEVATION_GAIN_COLUMNS)
+            elevation_gains = np.zeros(len(distances_to_next)) if elevation_gains is None else elevation_gains
+            elevation_angles = np.degrees(np.arctan2(elevation_gains, distances_to_next))
+        self.elevation_angles = np.nan_to_num(elevation_angles[:-1])
+
+        # The force the car must overcome at a constant speed without wind: gravity (x-direction) and rolling resistance
+        rolling_resistance = np.abs(x_force_friction(car_mass, self.elevation_angles, coef_resistance, gravity))
+        self.grade_resistances = rolling_resistance - x_force_gravity(car_mass, self.elevation_angles, gravity)
+
+        # Wind along the direction of travel (+ve is a tailwind), only the wind projected onto each segment changes the drag
+        self.wind_along = np.zeros(len(self.distances))
+        wind_speeds, wind_directions = find_column(data, WIND_SPEED_COLUMNS), find_column(data, WIND_DIRECTION_COLUMNS)
+        bearings = find_column(data, BEARING_COLUMNS)
+        if wind_speeds is not None and wind_directions is not None and bearings is not None:
+            directions = velocity_vectors(1, np.nan_to_num(bearings[:-1]), self.elevation_angles)
+            wind_velocity_vectors = velocity_vectors(np.nan_to_num(wind_speeds[:-1]), (np.nan_to_num(wind_directions[:-1]) + 180) % 360, 0)
+            self.wind_along = np.einsum("ij,ij->i", directions, wind_velocity_vectors)
+
+        self.car_mass = car_mass
+        self.drag_factor = 0.5 * fluid_density * drag_coefficent * car_cross_sectional_area
+
+
+    def simulate(self, speeds, initial_speed: float = None) -> dict:
+        """
+        simulate is a method that calculates the tractive energy and power of every segment of the route at a speed profile
+        - The drag is the drag equation of carforces.x_forces_drag (0.5 * fluid density * drag coefficent * area * airspeed^2)
+            with the airspeed along the direction of travel (the car speed minus the wind along the segment) instead of the
+            3d wind vectors, so it broadcasts over many speed profiles and pushes the car forward in a tailwind faster than
+            the car
+        - The speed changes from speeds[i - 1] to speeds[i] at the start of segment i, which takes the change in kinetic
+            energy (the applied force of carforces.x_force_applied over the segment)
+        - The energy is -ve where the car can coast (e.g. downhill) and regenerative braking is not counted separately
+        @param speeds: np.array of the speed (m/s, > 0) of each segment (a column with 1 speed per coordinate also works, the
+            last speed is not used). A 2d array of shape (number of profiles, number of segments) simulates every profile at once
+        @param initial_speed (optional): speed of the car before the first segment, speeds[0] if None (no initial acceleration)
+        @return: dict of np.arrays (with the shape of speeds) of the "time(s)", "tractive_force(N)", "tractive_energy(J)",
+            "cumulative_energy(J)" (at the end of each segment) and "power(W)" of each segment
+        """
+        speeds = np.asarray(speeds, dtype=np.float64)
+        if speeds.shape[-1] == self.number_of_coordinates:
+            speeds = speeds[..., :-1]
+        if speeds.shape[-1] != len(self.distances):
+            raise ValueError(f"speeds requires 1 speed per segment ({len(self.distances)}) or per coordinate ({self.number_of_coordinates})")
+        if not np.all(speeds > 0):
+            raise ValueError("speeds must be greater than 0")
+
+        airspeeds = speeds - self.wind_along
+        drag_resistances = self.drag_factor * airspeeds * np.abs(airspeeds)
+
+        previous_speeds = np.empty_like(speeds)
+        previous_speeds[..., 0] = speeds[..., 0] if initial_speed is None else initial_speed
+        previous_speeds[..., 1:] = speeds[..., :-1]
+        kinetic_energies = 0.5 * self.car_mass * (np.square(speeds) - np.square(previous_speeds))
+
+        tractive_energies = (self.grade_resistances + drag_resistances) * self.distances + kinetic_energies
+        times = self.distances / speeds
+        moving = self.distances > 0
+        tractive_forces = np.divide(tractive_energies, self.distances, out=self.grade_resistances + drag_resistances, where=moving)
+        powers = np.divide(tractive_energies, times, out=np.zeros(tractive_energies.shape), where=moving)
+
+        return {
+            "time(s)": times,
+            "tractive_force(N)": tractive_forces,
+            "tractive_energy(J)": tractive_energies,
+            "cumulative_energy(J)": np.cumsum(tractive_energies, axis=-1),
+            "power(W)": powers,
+        }
+
+
+    def total_energy(self, speeds, initial_speed: float = None):
+        """
+        total_energy is a method that calculates the tractive energy of the whole route at 1 or many speed profiles
+        @param speeds: np.array of the speed of each segment, or a 2d array with 1 speed profile per row (see simulate)
+        @param initial_speed (optional): speed of the car before the first segment, speeds[0] if None
+        @return: the total tractive energy (J) of the route, 1 per speed profile for a 2d speeds array
+        """
+        return self.simulate(speeds, initial_speed)["cumulative_energy(J)"][..., -1]
+
+
+def get_energy(route, speeds, car_mass: float, car_cross_sectional_area: float, initial_speed: float = None,
+               **car_parameters) -> pd.DataFrame:
+    """
+    get_energy is a function that simulates the tractive energy of a route at 1 speed profile and returns it as a pandas
+        dataframe with 1 row per coordinate, to append to RouteClass (see EnergyModel for the route data columns used)
+    - The values "to_next" are for the segment from each coordinate to the next one, and nan for the last coordinate
+    - The cumulative energy is the energy used from the start of the route to each coordinate (0 at the first one)
+    @param route: RouteClass object or pandas dataframe of the route data
+    @param speeds: list of the speed (m/s) of each segment, or of each coordinate (the last speed is not used)
+    @param car_mass: mass of the car
+    @param car_cross_sectional_area: the cross sectional area of the car when looking directly at the front of the car
+    @param initial_speed (optional): speed of the car before the first segment, speeds[0] if None
+    @param car_parameters (optional): drag_coefficent, coef_resistance, fluid_density and gravity (see EnergyModel)
+    @return: pandas dataframe with data on time_to_next, tractive_force_to_next, tractive_energy_to_next, power_to_next,
+        cumulative_energy
+    """
+    energy_model = EnergyModel(route, car_mass, car_cross_sectional_area, **car_parameters)
+    segments = energy_model.simulate(speeds, initial_speed)
+
+    return pd.DataFrame({
+        "time_to_next(s)": np.append(segments["time(s)"], np.nan),
+        "tractive_force_to_next(N)": np.append(segments["tractive_force(N)"], np.nan),
+        "tractive_energy_to_next(J)": np.append(segments["tractive_energy(J)"], np.nan),
+        "power_to_next(W)": np.append(segments["power(W)"], np.nan),
+        "cumulative_energy(J)": np.append(0, segments["cumulative_energy(J)"]),
+    })
+
+
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark: a 150k point (~3750km) route with hills and wind, 1 speed profile then 100 candidate profiles at once
+    rng = np.random.default_rng(0)
+    number_of_coordinates = 150000
+    trip = np.arange(number_of_coordinates) * 25.0
+    route_data = pd.DataFrame({
+        "dist_to_next_coordinate(m)": np.append(np.full(number_of_coordinates - 1, 25.0), np.nan),
+        "bearing_to_next_360": rng.uniform(0, 360, number_of_coordinates),
+        "elevation_angle_to_next(deg)": 2 * np.sin(trip / 5000),
+        "wind_speed(m/s)": rng.uniform(0, 8, number_of_coordinates),
+        "wind_direction_360": rng.uniform(0, 360, number_of_coordinates),
+    })
+    energy_model = EnergyModel(route_data, car_mass=300, car_cross_sectional_area=1.2, drag_coefficent=0.13, coef_resistance=0.0045)
+    speeds = rng.uniform(15, 25, number_of_coordinates - 1)
+    candidate_speeds = rng.uniform(15, 25, (100, number_of_coordinates - 1))
+
+    t0 = time.perf_counter()
+    energy_model.simulate(speeds)
+    t1 = time.perf_counter()
+    energy_model.total_energy(candidate_speeds)
+    t2 = time.perf_counter()
+    print(f"1 speed profile: {t1 - t0:.4f}s, 100 speed profiles: {t2 - t1:.4f}s")
@@ -6,6 +6,8 @@ import pandas as pd
 from RouteClass import RouteClass
 from coordinates.get_coordinates import get_coordinates
 from elevations.get_elevations import get_elevations
+from elevations.elevation_cache import ElevationCache
+from elevations.get_grades import get_grades
 from routebook.map_routebook_data import map_routebook_data
 import time
 t0 = time.time()
@@ -96,12 +98,20 @@ route.append_data(coordinates)
 
 
 """
-Step 3: Get elevation info for our route
+Step 3: Get elevation info (and the smoothed grade/elevation angle between coordinates) for our route
 """
 coordinates = route.coordinate_list()
-elevations = get_elevations(coordinates=coordinates, BING_MAPS_API_KEY=BING_MAPS_API_KEY)
+elevation_cache = ElevationCache("elevation_cache.sqlite") # re-runs only request elevations for new coordinates
+# elevation_cache.import_snapshot("elevation_snapshot.sqlite") # load a snapshot to run fully offline
+elevations = get_elevations(coordinates=coordinates, BING_MAPS_API_KEY=BING_MAPS_API_KEY, cache=elevation_cache)
 
 route.append_data(elevations)
+
+elevation_list = route.listdata("elevation(m)")
+dist_to_next_coordinate_list = route.listdata("dist_to_next_coordinate(m)")
+grades = get_grades(elevations=elevation_list, distances_to_next=dist_to_next_coordinate_list, method="savgol", window_length=9)
+
+route.append_data(grades)
 # print(route.data())
 # route.get_csv("sample_route_step3")
 # route.to_database(table_name="sample_route_step3")
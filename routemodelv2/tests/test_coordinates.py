@@ -2,8 +2,12 @@ import sys
 import os.path
 sys.path.append(os.path.dirname(sys.path[0]))
 
+import math
 import pytest
+import numpy as np
 import pandas as pd
+from geographiclib.geodesic import Geodesic
+from pyproj import Geod
 from coordinates.get_coordinates import get_coordinates
 
 
@@ -99,3 +103,57 @@ class Test_get_coordinates():
         correct_relative_turn_angle = pd.DataFrame({"relative_turn_angle": [None, 22.650377, None]})
         pd.testing.assert_frame_equal(relative_turn_angle, correct_relative_turn_angle)
 
+
+
+def per_segment_coordinates(polyline_coordinates, interval_upper_bound):
+    """
+    The interpolation, distances and bearings of get_coordinates 1 segment and 1 coordinate at a time (as get_coordinates
+        did before it was batched), to compare the batched result against
+    """
+    segment_coordinates = []
+    for (lat_1, long_1), (lat_2, long_2) in zip(polyline_coordinates[:-1], polyline_coordinates[1:]):
+        intervals_num = math.ceil(Geodesic.WGS84.Inverse(lat_1, long_1, lat_2, long_2)["s12"]/interval_upper_bound) - 1
+        longlats = Geod(ellps="WGS84").npts(long_1, lat_1, long_2, lat_2, intervals_num) if intervals_num > 0 else []
+        segment_coordinates.append([(lat_1, long_1)] + [(lat, long) for long, lat in longlats] + [(lat_2, long_2)])
+
+    all_coordinates = segment_coordinates[0].copy()
+    polyline_point_index = [0] + [np.nan] * (len(all_coordinates) - 2)
+    for i, segment_coordinate in enumerate(segment_coordinates[1:], start=1):
+        polyline_point_index += [i] + [np.nan] * (len(segment_coordinate) - 2)
+        all_coordinates += segment_coordinate[1:]
+    polyline_point_index.append(len(segment_coordinates))
+
+    geo_data = [Geodesic.WGS84.Inverse(*coordinate_1, *coordinate_2) for coordinate_1, coordinate_2 in zip(all_coordinates[:-1], all_coordinates[1:])]
+    return pd.DataFrame({
+        "polyline_point_index": polyline_point_index,
+        "latitude": [coordinate[0] for coordinate in all_coordinates],
+        "longitude": [coordinate[1] for coordinate in all_coordinates],
+        "trip(m)": np.concatenate(([0], np.cumsum([data["s12"] for data in geo_data]))),
+        "dist_to_next_coordinate(m)": [data["s12"] for data in geo_data] + [np.nan],
+        "true_bearing_to_next": [data["azi1"] for data in geo_data] + [np.nan],
+        "true_bearing_to_prev": [np.nan] + [data["azi2"]+180 if data["azi2"]+180 <= 180 else data["azi2"]-180 for data in geo_data],
+    })
+
+
+# The batched interpolation gives the same route as interpolating 1 segment at a time, including a repeated vertex (a
+# 0m segment) and segments short enough to not be interpolated
+def test_get_coordinates_matches_per_segment():
+    polyline_coordinates = [
+        (43.81857948416717, -79.40101625627213),
+        (43.82045746557804, -79.3901457521166),
+        (43.82045746557804, -79.3901457521166),
+        (43.81990512423598, -79.38545051088512),
+        (43.81995, -79.38540),
+        (43.79012, -79.35021),
+        ]
+    for interval_upper_bound in [50, 120, 1000]:
+        data = get_coordinates(polyline_coordinates, interval_upper_bound)
+        expected = per_segment_coordinates(polyline_coordinates, interval_upper_bound)
+        assert len(data) == len(expected)
+        assert len(data) > len(polyline_coordinates)
+
+        pd.testing.assert_series_equal(data["polyline_point_index"].astype(np.float64), expected["polyline_point_index"])
+        # Bearings between coordinates 50m apart amplify the ~1e-12 degree differences of the interpolated coordinates
+        for column, tolerance in [("latitude", 1e-9), ("longitude", 1e-9), ("true_bearing_to_next", 1e-7), ("true_bearing_to_prev", 1e-7),
+                                  ("trip(m)", 1e-6), ("dist_to_next_coordinate(m)", 1e-6)]:
+            np.testing.assert_allclose(data[column].to_numpy(dtype=np.float64), expected[column], rtol=0, atol=tolerance, err_msg=column)
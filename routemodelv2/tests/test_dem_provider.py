@@ -0,0 +1,62 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+from elevations.get_elevations import get_elevations
+from elevations.dem_provider import DEMTile, DEMElevationProvider
+
+
+
+
+SIZE = 121 # 30 arc-second grid
+
+
+def plane(latitudes, longitudes):
+    return 1200 * (np.asarray(latitudes) - 43) + 600 * (np.asarray(longitudes) + 81) + 100
+
+
+@pytest.fixture
+def tile_directory(tmp_path):
+    """
+    Synthetic SRTM tile N43W081.hgt of a plane (which bilinear interpolation reproduces exactly) with 1 void
+    """
+    latitudes = np.linspace(44, 43, SIZE)
+    longitudes = np.linspace(-81, -80, SIZE)
+    grid = np.round(plane(latitudes[:, None], longitudes[None, :]))
+    grid[60, 60] = -32768
+    grid.astype(">i2").tofile(str(tmp_path / "N43W081.hgt"))
+    return str(tmp_path)
+
+
+def test_from_hgt(tile_directory):
+    tile = DEMTile.from_hgt(os.path.join(tile_directory, "N43W081.hgt"))
+    assert (tile.south, tile.north, tile.west, tile.east) == pytest.approx((43, 44, -81, -80))
+    assert isinstance(tile.grid(), np.memmap)
+    assert tile.grid().shape == (SIZE, SIZE)
+
+
+def test_bilinear_interpolation(tile_directory):
+    provider = DEMElevationProvider.from_directory(tile_directory)
+    latitudes = np.array([43.0, 43.123, 43.25, 43.9999, 44.0])
+    longitudes = np.array([-81.0, -80.876, -80.2, -80.0001, -80.0])
+    np.testing.assert_allclose(provider.get(latitudes, longitudes), plane(latitudes, longitudes), atol=1e-6)
+
+
+def test_voids_and_coverage(tile_directory):
+    provider = DEMElevationProvider.from_directory(tile_directory)
+    elevations = provider.get([43.5, 43.5 + 1 / 240], [-80.5, -80.5 + 1 / 240])
+    assert np.isnan(elevations).all() # both coordinates are next to the void grid point
+
+    with pytest.raises(ValueError):
+        provider.get([45.1], [-80.5])
+
+
+def test_get_elevations_backend(tile_directory):
+    coordinates = [(43.467879339595996, -80.56616840836313), (43.47883157462026, -80.53538493288134), (43.473830662244815, -80.53170344584917)]
+    data = get_elevations(coordinates=coordinates, BING_MAPS_API_KEY="", fetcher=DEMElevationProvider.from_directory(tile_directory))
+
+    correct_elevations = plane([lat for lat, _ in coordinates], [lon for _, lon in coordinates])
+    np.testing.assert_allclose(data["elevation(m)"], correct_elevations, atol=1e-6)
+    np.testing.assert_allclose(data["elevation_gains_to_next(m)"][:-1], np.diff(correct_elevations), atol=1e-6)
@@ -0,0 +1,104 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+from elevations.get_elevations import get_elevations
+from elevations.elevation_fetcher import ElevationFetcher
+from elevations.elevation_cache import ElevationCache, quantize_coordinates
+
+
+
+
+coordinates = [
+    (44.0104111274582, -79.67866520101909),
+    (44.028996763626, -79.59455210533561),
+    (44.037352902093524, -79.596693165953),
+    (44.067688969642624, -79.62238589336177),
+    (44.07494094439971, -79.62452695397917),
+    (44.05647962446555, -79.70741658645272)
+    ]
+correct_elevations = [195, 207, 183, 189, 190, 207]
+
+
+class FakeResponse():
+    status_code = 200
+    headers = {}
+
+    def __init__(self, elevations):
+        self._elevations = elevations
+
+    def json(self):
+        return {"statusCode": 200, "resourceSets": [{"resources": [{"elevations": self._elevations, "zoomLevel": 14}]}]}
+
+
+def test_quantize_coordinates():
+    latitudes, longitudes = quantize_coordinates([(44.000004, -79.000006), (44.000006, -79.000004)])
+    assert latitudes.tolist() == [4400000, 4400001]
+    assert longitudes.tolist() == [-7900001, -7900000]
+
+
+def test_cache_get_put():
+    cache = ElevationCache(":memory:")
+    cache.put(coordinates[:3], correct_elevations[:3])
+    cached = cache.get(coordinates)
+
+    assert len(cache) == 3
+    np.testing.assert_array_equal(cached[:3], correct_elevations[:3])
+    assert np.isnan(cached[3:]).all()
+
+    # Coordinates within the same 1e-5 degree cell share a cache entry
+    nearby = [(lat + 0.000001, lon - 0.000001) for lat, lon in coordinates[:3]]
+    np.testing.assert_array_equal(cache.get(nearby), correct_elevations[:3])
+
+
+def test_cache_persists(tmp_path):
+    filepath = str(tmp_path / "elevations.sqlite")
+    cache = ElevationCache(filepath)
+    cache.put(coordinates, correct_elevations)
+    cache.close()
+
+    reopened = ElevationCache(filepath)
+    np.testing.assert_array_equal(reopened.get(coordinates), correct_elevations)
+
+
+@pytest.mark.parametrize("snapshot_name", ["snapshot.sqlite", "snapshot.csv"])
+def test_snapshot_round_trip(tmp_path, snapshot_name):
+    cache = ElevationCache(":memory:")
+    cache.put(coordinates, correct_elevations)
+    assert cache.export_snapshot(str(tmp_path / snapshot_name)) == len(coordinates)
+
+    offline_cache = ElevationCache(":memory:")
+    assert offline_cache.import_snapshot(str(tmp_path / snapshot_name)) == len(coordinates)
+    np.testing.assert_array_equal(offline_cache.get(coordinates), correct_elevations)
+
+
+class FakeSession():
+    def __init__(self, elevations):
+        self.requested = []
+        self._elevations = elevations
+
+    def post(self, url, timeout=None):
+        self.requested.append(url)
+        return FakeResponse(self._elevations)
+
+
+def test_get_elevations_only_requests_misses():
+    session = FakeSession(correct_elevations[1::2])
+    fetcher = ElevationFetcher("", requests_per_second=None, session=session)
+    requested = session.requested
+
+    cache = ElevationCache(":memory:")
+    cache.put(coordinates[::2], correct_elevations[::2])
+    data = get_elevations(coordinates=coordinates, BING_MAPS_API_KEY="", cache=cache, fetcher=fetcher)
+
+    assert len(requested) == 1
+    assert len(cache) == len(coordinates)
+    assert data["elevation(m)"].tolist() == correct_elevations
+    assert data["elevation_gains_to_next(m)"].tolist()[:-1] == [12, -24, 6, 1, 17]
+
+    # Every coordinate is cached now, so the same route is built without any request
+    data = get_elevations(coordinates=coordinates, BING_MAPS_API_KEY="", cache=cache, fetcher=fetcher)
+    assert len(requested) == 1
+    assert data["elevation(m)"].tolist() == correct_elevations
@@ -0,0 +1,148 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import json
+import time
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from elevations.elevation_fetcher import ElevationFetcher, TokenBucket
+from elevations.point_compression import compress_coordinates, decompress_coordinates
+
+
+
+
+def stand_in_elevation(coordinate):
+    return round(coordinate[0] * 100000) % 1000
+
+
+class StandInBingMaps(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the Bing Maps elevation list API. Decodes the points and answers with stand_in_elevation of each
+        point, after not answering the first hangs requests (for hang seconds) and failing the next failures requests with
+        a 503
+    """
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            hang = server.requests <= server.hangs
+            fail = server.requests - server.hangs <= server.failures
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.hang if hang else server.delay)
+
+        if hang:
+            pass
+        elif fail:
+            self.send_response(503)
+            self.end_headers()
+        else:
+            points = parse_qs(urlparse(self.path).query)["points"][0]
+            body = {"statusCode": 200, "resourceSets": [{"resources": [{
+                "elevations": [stand_in_elevation(coordinate) for coordinate in decompress_coordinates(points)], "zoomLevel": 14
+                }]}]}
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+
+        with server.lock:
+            server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInBingMaps)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.failures = 0
+    server.hangs = 0
+    server.hang = 0.5
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/REST/v1/Elevation/List"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+coordinates = [(43.4 + i * 0.0011, -80.5 - i * 0.0007) for i in range(1050)]
+
+
+def test_fetch_in_order(server):
+    server.delay = 0.02
+    fetcher = ElevationFetcher("", max_points=100, max_workers=4, requests_per_second=None, url=server.url)
+    elevations = fetcher.fetch(coordinates)
+
+    assert elevations == [stand_in_elevation(coordinate) for coordinate in coordinates]
+    assert server.requests == 11
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_fetch_planned_requests(server):
+    fetcher = ElevationFetcher("", max_url_length=1000, requests_per_second=None, url=server.url)
+    chunks = fetcher.plan(coordinates)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(coordinates)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks[:-1], chunks[1:]))
+
+    # Every planned url fits in max_url_length, and could not take the next coordinate
+    for start, end in chunks:
+        assert len(fetcher.query_string(compress_coordinates(coordinates[start:end]))) <= 1000
+        if end < len(coordinates):
+            assert len(fetcher.query_string(compress_coordinates(coordinates[start:end+1]))) > 1000
+
+    assert fetcher.fetch(coordinates) == [stand_in_elevation(coordinate) for coordinate in coordinates]
+    assert server.requests == len(chunks)
+    assert len(chunks) < len(coordinates) / 100
+
+
+def test_fetch_retries(server):
+    server.failures = 2
+    fetcher = ElevationFetcher("", max_url_length=100000, max_points=500, max_workers=1, requests_per_second=None, backoff=0.01, url=server.url)
+    assert fetcher.fetch(coordinates) == [stand_in_elevation(coordinate) for coordinate in coordinates]
+    assert server.requests == 3 + 2
+
+    server.requests = 0
+    server.failures = 10
+    fetcher = ElevationFetcher("", max_url_length=100000, max_points=500, max_workers=1, requests_per_second=None, max_retries=2, backoff=0.01, url=server.url)
+    with pytest.raises(ValueError):
+        fetcher.fetch(coordinates[:500])
+    assert server.requests == 3
+
+
+def test_fetch_timeout(server):
+    server.hangs = 2
+    fetcher = ElevationFetcher("", max_url_length=100000, max_points=500, max_workers=1, requests_per_second=None, backoff=0.01, timeout=0.1, url=server.url)
+    start = time.monotonic()
+    assert fetcher.fetch(coordinates[:500]) == [stand_in_elevation(coordinate) for coordinate in coordinates[:500]]
+    assert server.requests == 3
+    assert time.monotonic() - start < server.hang * 2
+
+    server.requests = 0
+    server.hangs = 10
+    fetcher = ElevationFetcher("", max_url_length=100000, max_points=500, max_workers=1, requests_per_second=None, max_retries=2, backoff=0.01, timeout=0.1, url=server.url)
+    with pytest.raises(requests.Timeout):
+        fetcher.fetch(coordinates[:500])
+    assert server.requests == 3
+
+
+def test_fetch_empty():
+    assert ElevationFetcher("").fetch([]) == []
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
@@ -0,0 +1,117 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+import pandas as pd
+from energy.energy import EnergyModel, get_energy
+from carforces.carforces import x_force_gravity, x_forces_drag
+from tools.tools import velocity_vectors
+
+
+
+
+number_of_coordinates = 200
+rng = np.random.default_rng(0)
+distances = np.append(rng.uniform(10, 25, number_of_coordinates - 1), np.nan)
+car = {"car_mass": 300, "car_cross_sectional_area": 1.2, "drag_coefficent": 0.13, "coef_resistance": 0.0045}
+
+
+def route_data(**columns):
+    return pd.DataFrame({"dist_to_next_coordinate(m)": distances, **columns})
+
+
+def test_flat_constant_speed():
+    energy_model = EnergyModel(route_data(), **car)
+    segments = energy_model.simulate(np.full(number_of_coordinates - 1, 20.0))
+
+    force = 0.0045 * 300 * 9.80665 + 0.5 * 1.204 * 0.13 * 1.2 * 20 ** 2
+    np.testing.assert_allclose(segments["tractive_force(N)"], force)
+    np.testing.assert_allclose(segments["tractive_energy(J)"], force * distances[:-1])
+    np.testing.assert_allclose(segments["cumulative_energy(J)"], np.cumsum(force * distances[:-1]))
+    np.testing.assert_allclose(segments["time(s)"], distances[:-1] / 20)
+    np.testing.assert_allclose(segments["power(W)"], force * 20)
+
+
+def test_gravity():
+    elevation_angles = rng.uniform(-5, 5, number_of_coordinates)
+    energy_model = EnergyModel(route_data(**{"elevation_angle_to_next(deg)": elevation_angles}), car_mass=300,
+                               car_cross_sectional_area=1.2, drag_coefficent=0, coef_resistance=0)
+    energies = energy_model.simulate(np.full(number_of_coordinates, 20.0))["tractive_energy(J)"]
+    np.testing.assert_allclose(energies, -x_force_gravity(300, elevation_angles[:-1]) * distances[:-1])
+
+    # Without elevation angles, the slope comes from the elevation gains
+    elevation_gains = distances * np.tan(np.radians(elevation_angles))
+    energy_model = EnergyModel(route_data(**{"elevation_gains_to_next(m)": elevation_gains}), car_mass=300,
+                               car_cross_sectional_area=1.2, drag_coefficent=0, coef_resistance=0)
+    np.testing.assert_allclose(energy_model.simulate(np.full(number_of_coordinates, 20.0))["tractive_energy(J)"], energies)
+
+
+def test_wind_drag_matches_carforces():
+    bearings = rng.uniform(0, 360, number_of_coordinates)
+    wind_speeds = rng.uniform(0, 8, number_of_coordinates)
+    wind_directions = rng.uniform(0, 360, number_of_coordinates)
+    data = route_data(**{"bearing_to_next_360": bearings, "wind_speed(m/s)": wind_speeds, "wind_direction_360": wind_directions})
+    energy_model = EnergyModel(data, car_mass=300, car_cross_sectional_area=1.2, drag_coefficent=0.13, coef_resistance=0)
+    speeds = np.full(number_of_coordinates - 1, 20.0) # constant speed so the force is only the drag
+    forces = energy_model.simulate(speeds)["tractive_force(N)"]
+
+    # The drag is x_forces_drag of the air velocity relative to the car (the wind blows towards wind_direction + 180)
+    car_velocity_vectors = velocity_vectors(speeds, bearings[:-1], 0)
+    wind_velocity_vectors = velocity_vectors(wind_speeds[:-1], (wind_directions[:-1] + 180) % 360, 0)
+    drag_forces = x_forces_drag(car_velocity_vectors, car_velocity_vectors - wind_velocity_vectors, 1.2, drag_coefficent=0.13)
+    np.testing.assert_allclose(forces, -drag_forces)
+
+
+def test_tailwind_faster_than_car():
+    data = route_data(**{"bearing_to_next_360": np.zeros(number_of_coordinates), "wind_speed(m/s)": np.full(number_of_coordinates, 10.0),
+                         "wind_direction_360": np.full(number_of_coordinates, 180.0)})
+    energy_model = EnergyModel(data, car_mass=300, car_cross_sectional_area=1.2, drag_coefficent=0.13, coef_resistance=0)
+    forces = energy_model.simulate(np.full(number_of_coordinates, 5.0))["tractive_force(N)"]
+    np.testing.assert_allclose(forces, -0.5 * 1.204 * 0.13 * 1.2 * 5 ** 2)
+
+
+def test_acceleration():
+    energy_model = EnergyModel(route_data(), car_mass=300, car_cross_sectional_area=1.2, drag_coefficent=0, coef_resistance=0)
+    speeds = rng.uniform(5, 25, number_of_coordinates - 1)
+    total_energy = energy_model.total_energy(speeds, initial_speed=0)
+    np.testing.assert_allclose(total_energy, 0.5 * 300 * speeds[-1] ** 2)
+    np.testing.assert_allclose(energy_model.total_energy(speeds), 0.5 * 300 * (speeds[-1] ** 2 - speeds[0] ** 2))
+
+
+def test_many_speed_profiles():
+    elevation_angles = rng.uniform(-5, 5, number_of_coordinates)
+    energy_model = EnergyModel(route_data(**{"elevation_angle_to_next(deg)": elevation_angles}), **car)
+    candidate_speeds = rng.uniform(15, 25, (10, number_of_coordinates - 1))
+
+    segments = energy_model.simulate(candidate_speeds, initial_speed=0)
+    for profile, speeds in enumerate(candidate_speeds):
+        single = energy_model.simulate(speeds, initial_speed=0)
+        for name, values in single.items():
+            np.testing.assert_allclose(segments[name][profile], values)
+    np.testing.assert_allclose(energy_model.total_energy(candidate_speeds, initial_speed=0), segments["cumulative_energy(J)"][:, -1])
+
+
+def test_get_energy():
+    class Route():
+        def data(self):
+            return route_data()
+
+    speeds = np.full(number_of_coordinates, 20.0)
+    energy = get_energy(Route(), speeds, **car)
+    assert len(energy) == number_of_coordinates
+    assert energy["cumulative_energy(J)"].iloc[0] == 0
+    for column in ["time_to_next(s)", "tractive_force_to_next(N)", "tractive_energy_to_next(J)", "power_to_next(W)"]:
+        assert np.isnan(energy[column].iloc[-1])
+    np.testing.assert_allclose(energy["cumulative_energy(J)"].iloc[-1], energy["tractive_energy_to_next(J)"].sum())
+
+
+def test_invalid_inputs():
+    energy_model = EnergyModel(route_data(), **car)
+    with pytest.raises(ValueError):
+        energy_model.simulate(np.full(10, 20.0))
+    with pytest.raises(ValueError):
+        energy_model.simulate(np.zeros(number_of_coordinates - 1))
+    with pytest.raises(ValueError):
+        EnergyModel(pd.DataFrame({"trip(m)": distances}), **car)
@@ -0,0 +1,49 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+import pandas as pd
+from elevations.get_grades import get_grades, smooth_elevations
+
+
+
+
+distances = [25.0] * 199 + [None]
+trip = np.arange(200) * 25.0
+
+
+def test_constant_grade():
+    elevations = 100 + 0.05 * trip
+    for method in ["savgol", "moving_average", None]:
+        data = get_grades(elevations=elevations.tolist(), distances_to_next=distances, method=method)
+        np.testing.assert_allclose(data["grade_to_next(%)"][:-1], 5)
+        np.testing.assert_allclose(data["elevation_angle_to_next(deg)"][:-1], np.degrees(np.arctan(0.05)))
+        assert np.isnan(data["grade_to_next(%)"].iloc[-1]) and np.isnan(data["elevation_angle_to_next(deg)"].iloc[-1])
+
+
+def test_smoothing_suppresses_noise():
+    elevations = 100 + 0.03 * trip + np.random.default_rng(0).normal(0, 1.5, len(trip))
+    raw = get_grades(elevations=elevations.tolist(), distances_to_next=distances, method=None)
+    smoothed = get_grades(elevations=elevations.tolist(), distances_to_next=distances, method="savgol", window_length=15)
+    assert np.nanstd(smoothed["grade_to_next(%)"] - 3) < np.nanstd(raw["grade_to_next(%)"] - 3) / 4
+
+    # A hill keeps its shape
+    hill = 100 + 20 * np.exp(-((trip - 2500) / 400) ** 2)
+    np.testing.assert_allclose(smooth_elevations(hill, method="savgol", window_length=9), hill, atol=0.05)
+
+
+def test_edge_cases():
+    # Missing elevations are interpolated and coordinates 0m apart have a grade of 0
+    data = get_grades(elevations=[100, np.nan, 102, 102], distances_to_next=[10, 0, 20, None], method=None)
+    pd.testing.assert_series_equal(data["smoothed_elevation(m)"], pd.Series([100.0, 101, 102, 102], name="smoothed_elevation(m)"))
+    np.testing.assert_allclose(data["grade_to_next(%)"], [10, 0, 0, np.nan])
+
+    # Routes shorter than the window
+    assert len(get_grades(elevations=[100, 101], distances_to_next=[10, None])) == 2
+
+    with pytest.raises(ValueError):
+        get_grades(elevations=[100, 101], distances_to_next=[10])
+    with pytest.raises(ValueError):
+        smooth_elevations([100, 101], method="median")
@@ -0,0 +1,67 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import pytest
+import numpy as np
+from elevations.point_compression import compress_coordinates, decompress_coordinates, compress_coordinates_reference, encoded_lengths, plan_chunks
+
+
+
+
+# Example from the Bing Maps point compression algorithm documentation
+documented_coordinates = [(35.89431, -110.72522), (35.89393, -110.72578), (35.89374, -110.72606), (35.89337, -110.72662)]
+route_coordinates = [(43.4 + i * 0.0011, -80.5 - i * 0.0007 * (-1) ** i) for i in range(1050)]
+
+
+def test_documented_example():
+    assert compress_coordinates(documented_coordinates) == "vx1vilihnM6hR7mEl2Q"
+    assert compress_coordinates_reference(documented_coordinates) == "vx1vilihnM6hR7mEl2Q"
+    assert decompress_coordinates("vx1vilihnM6hR7mEl2Q") == documented_coordinates
+
+
+def test_matches_reference():
+    assert compress_coordinates(route_coordinates) == compress_coordinates_reference(route_coordinates)
+    assert compress_coordinates(np.array(route_coordinates)) == compress_coordinates_reference(route_coordinates)
+    extreme_coordinates = [(-89.99999, 179.99999), (89.99999, -179.99999), (0.00001, -0.00001)]
+    assert compress_coordinates(extreme_coordinates) == compress_coordinates_reference(extreme_coordinates)
+
+
+def test_round_trip():
+    decoded_coordinates = decompress_coordinates(compress_coordinates(route_coordinates))
+    np.testing.assert_allclose(decoded_coordinates, route_coordinates, atol=0.000005)
+
+    # Repeated coordinates are encoded as "A" so they are not lost
+    repeated_coordinates = [(0.0, 0.0), (43.5, -80.5), (43.5, -80.5), (-89.9, 179.9), (89.9, -179.9)]
+    assert decompress_coordinates(compress_coordinates(repeated_coordinates)) == repeated_coordinates
+
+    assert compress_coordinates([]) == ""
+    assert decompress_coordinates("") == []
+
+
+def test_invalid_strings():
+    with pytest.raises(ValueError):
+        decompress_coordinates("vx1v!")
+    with pytest.raises(ValueError):
+        decompress_coordinates("vx1vi") # ends with a continuation digit
+
+
+def test_encoded_lengths():
+    delta_lengths, absolute_lengths = encoded_lengths(route_coordinates)
+    assert delta_lengths.sum() == len(compress_coordinates(route_coordinates))
+    assert absolute_lengths[0] == delta_lengths[0]
+    assert all(absolute_lengths[i] == len(compress_coordinates(route_coordinates[i:i+1])) for i in range(0, len(route_coordinates), 97))
+
+
+def test_plan_chunks():
+    chunks = plan_chunks(route_coordinates, max_length=300, max_points=200)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(route_coordinates)
+    for start, end in chunks:
+        assert len(compress_coordinates(route_coordinates[start:end])) <= 300
+        assert end - start <= 200
+        if end < len(route_coordinates) and end - start < 200:
+            assert len(compress_coordinates(route_coordinates[start:end+1])) > 300
+
+    assert [end - start for start, end in plan_chunks(route_coordinates, max_length=10000, max_points=200)] == [200] * 5 + [50]
+    with pytest.raises(ValueError):
+        plan_chunks(route_coordinates, max_length=5)
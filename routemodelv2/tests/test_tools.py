@@ -32,4 +32,75 @@ def test_vector_projection():
     correct_projection_34 = np.array([0.5, 0, 1.5])
     np.testing.assert_array_almost_equal(projection_34, correct_projection_34)
     
-    
\ No newline at end of file
+    
+
+def test_velocity_vectors():
+    speeds = np.array([10, 10, 3, 0])
+    bearings = np.array([45, 90, 200, 10])
+    elevation_angles = np.array([45, -90, 3, 0])
+    vectors = velocity_vectors(speeds, bearings, elevation_angles)
+    assert vectors.shape == (4, 3)
+    for vector, speed, bearing, elevation_angle in zip(vectors[:3], speeds, bearings, elevation_angles):
+        np.testing.assert_array_almost_equal(vector, velocity_vector(speed, bearing, elevation_angle))
+    np.testing.assert_array_equal(vectors[3], [0, 0, 0])
+
+    # Scalars are broadcast to every row
+    np.testing.assert_array_almost_equal(velocity_vectors(10, bearings, 0)[0], velocity_vector(10, 45, 0))
+
+
+def test_vector_projections():
+    vectors_1 = np.array([[10, 0, 0], [1, 0, 3], [0, 0, 0]])
+    vectors_2 = np.array([[-10, 10, 10], [-1, 4, 2], [1, 2, 3]])
+    projections = vector_projections(vectors_1, vectors_2)
+    correct_projections = np.array([[-10, 0, 0], [0.5, 0, 1.5], [0, 0, 0]])
+    np.testing.assert_array_almost_equal(projections, correct_projections)
+
+
+def test_np_cache_velocity_vector():
+    velocity_vector.cache_clear()
+    vector_1 = velocity_vector(10, 45, 45)
+    vector_2 = velocity_vector(10.0, 45.0000000001, 45) # within the tolerance, so it is a hit
+    assert vector_2 is vector_1
+    info = velocity_vector.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+    velocity_vector(10, 46, 45)
+    assert velocity_vector.cache_info().misses == 2
+
+
+def test_np_cache_read_only():
+    vector = velocity_vector(10, 45, 45)
+    with pytest.raises(ValueError):
+        vector[0] = 0
+    projection = vector_projection(np.array([1, 0, 3]), np.array([-1, 4, 2]))
+    with pytest.raises(ValueError):
+        projection[0] = 0
+
+
+def test_np_cache_bounded_lru():
+    calls = []
+
+    @np_cache(maxsize=2, decimals=3)
+    def scaled(array, scale=1.0):
+        calls.append(scale)
+        return array * scale
+
+    array = np.array([1.0, 2.0])
+    np.testing.assert_array_equal(scaled(array, scale=2.0), [2, 4])
+    np.testing.assert_array_equal(scaled(array + 0.0001, scale=2.0), [2, 4]) # rounded to the same key
+    scaled(array, scale=3.0)
+    scaled(array, scale=4.0) # evicts scale=2.0
+    scaled(array, scale=2.0)
+    assert calls == [2.0, 3.0, 4.0, 2.0]
+    info = scaled.cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 4, 2, 2)
+
+    scaled.cache_clear()
+    assert scaled.cache_info().currsize == 0
+
+
+def test_np_cache_errors_are_not_cached():
+    with pytest.raises(AssertionError):
+        velocity_vector(-1, 45, 45)
+    with pytest.raises(AssertionError):
+        velocity_vector(-1, 45, 45)
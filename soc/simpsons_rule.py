@@ -1,22 +1,44 @@
 import time
 import numpy as np
 from scipy import integrate
+from streaming_integrator import StreamingIntegrator
 
 
+# Running Simpson's rule of every sample passed to simpsons_rule (even="avg" is the scipy.integrate.simpson default)
+integrator = StreamingIntegrator(method="simpson", even="avg")
+result = 0
+
 # Use np.array for better performance with scipy
 nparray_x = np.array([], dtype="f")
 nparray_y = np.array([], dtype="f")
-result = 0
+result_reference = 0
 
 
 # https://en.wikipedia.org/wiki/Simpson%27s_rule
 # https://docs.scipy.org/doc/scipy/reference/generated/scipy.integrate.simpson.html
 def simpsons_rule(x, y):
-    global nparray_x, nparray_y, result
+    """
+    simpsons_rule adds 1 sample to the module's integrator and returns the integral of every sample so far, in O(1) per
+        call. Use your own StreamingIntegrator objects to integrate more than 1 signal at once
+    @param x: x-value (timestamp) of the sample, greater than the one before it
+    @param y: y-value of the sample
+    @return: the integral from the first sample to this one
+    """
+    global result
+    result = integrator.add(x, y)
+    return result
+
+
+def simpsons_rule_reference(x, y):
+    """
+    simpsons_rule_reference is the original implementation of simpsons_rule, which integrates the whole history on every
+        call (O(n) per call). It is kept as a reference for the benchmark
+    """
+    global nparray_x, nparray_y, result_reference
     nparray_x = np.append(nparray_x, x)
     nparray_y = np.append(nparray_y, y)
-    result = integrate.simpson(nparray_y, nparray_x)
-    return result
+    result_reference = integrate.simpson(nparray_y, nparray_x)
+    return result_reference
 
 
 if __name__ == "__main__":
@@ -28,8 +50,11 @@ if __name__ == "__main__":
     start = time.time()
     for i in range(arr_len):
         simpsons_rule(sin_x[i], sin_y[i])
+    middle = time.time()
+    for i in range(arr_len):
+        simpsons_rule_reference(sin_x[i], sin_y[i])
 
     # Compute time (Forcing it to stress test with n function calls)
-    print("Time", time.time() - start)
+    print("Time", middle - start, "Reference time", time.time() - middle)
     # Result should be around 1 (Integrated sin from 0 to pi/2)
-    print("Result", result)
+    print("Result", result, "Reference result", result_reference)
@@ -0,0 +1,234 @@
+import numpy as np
+
+
+
+
+INTEGRATION_METHODS = ["simpson", "trapezoid"]
+EVEN_METHODS = ["simpson", "avg", "first", "last"]
+
+
+def simpson_pair(x0: float, x1: float, x2: float, y0: float, y1: float, y2: float) -> float:
+    """
+    simpson_pair is a function that integrates the parabola through 3 samples over the 2 intervals between them (Simpson's
+        rule for irregular intervals)
+    - https://en.wikipedia.org/wiki/Simpson%27s_rule#Composite_Simpson's_rule_for_irregularly_spaced_data
+    @param x0, x1, x2: increasing x-values (timestamps) of the samples
+    @param y0, y1, y2: y-values of the samples
+    @return: the integral from x0 to x2
+    """
+    h0, h1 = x1 - x0, x2 - x1
+    return (h0 + h1) / 6 * ((2 - h1 / h0) * y0 + (h0 + h1) ** 2 / (h0 * h1) * y1 + (2 - h0 / h1) * y2)
+
+
+def simpson_last_interval(x0: float, x1: float, x2: float, y0: float, y1: float, y2: float) -> float:
+    """
+    simpson_last_interval is a function that integrates the parabola through 3 samples over the last interval only (Cartwright's
+        correction, used by Simpson's rule for an odd number of intervals)
+    @param x0, x1, x2: increasing x-values (timestamps) of the samples
+    @param y0, y1, y2: y-values of the samples
+    @return: the integral from x1 to x2
+    """
+    h0, h1 = x1 - x0, x2 - x1
+    alpha = (2 * h1 ** 2 + 3 * h0 * h1) / (6 * (h0 + h1))
+    beta = (h1 ** 2 + 3 * h0 * h1) / (6 * h0)
+    eta = h1 ** 3 / (6 * h0 * (h0 + h1))
+    return alpha * y2 + beta * y1 - eta * y0
+
+
+class StreamingIntegrator():
+
+    STATE_KEYS = ["number_of_samples", "first_samples", "last_samples", "even_pairs", "odd_pairs", "trapezoid"]
+
+
+    def __init__(self, method: str = "simpson", even: str = "simpson"):
+        """
+        StreamingIntegrator integrates samples (e.g. current over time) as they arrive. It keeps running sums instead of the
+            sample history, so adding a sample is O(1) no matter how long it has been running, and each instance is
+            independent (e.g. 1 for the pack current and 1 per string current)
+        - The samples can be irregularly spaced, but their x-values (timestamps) must be increasing
+        - Simpson's rule needs an even number of intervals, so for an odd number of intervals the even parameter picks what
+            is done with the extra interval, the same as the even parameter of scipy.integrate.simpson
+        @param method: "simpson" (Simpson's rule) or "trapezoid" (trapezoidal rule)
+        @param even: for an odd number of intervals (Simpson's rule only), "simpson" (the parabola through the last 3 samples
+            over the last interval), "avg" (the average of "first" and "last", the default of scipy 1.10), "first" (Simpson's
+            rule on all but the last interval and the trapezoidal rule on the last one) or "last" (the trapezoidal rule on
+            the first interval and Simpson's rule on the rest)
+        @return: StreamingIntegrator object
+        """
+        if method not in INTEGRATION_METHODS:
+            raise ValueError(f"method must be one of {INTEGRATION_METHODS}")
+        if even not in EVEN_METHODS:
+            raise ValueError(f"even must be one of {EVEN_METHODS}")
+
+        self.method = method
+        self.even = even
+        self.reset()
+
+
+    def reset(self):
+        """
+        reset is a method that removes every sample (the integral goes back to 0)
+        @return: None
+        """
+        self.number_of_samples = 0
+        self._first_samples = [] # (x, y) of the first 2 samples, for the trapezoid on the first interval
+        self._last_samples = [] # (x, y) of the last 3 samples
+        self._even_pairs = 0.0 # Simpson's rule over the interval pairs starting at even samples (0-2, 2-4, ...)
+        self._odd_pairs = 0.0 # Simpson's rule over the interval pairs starting at odd samples (1-3, 3-5, ...)
+        self._trapezoid = 0.0 # trapezoidal rule over every interval
+
+
+    def add(self, x: float, y: float) -> float:
+        """
+        add is a method that adds 1 sample and updates the integral in O(1)
+        @param x: x-value (timestamp) of the sample, greater than the x-value of the sample before it
+        @param y: y-value of the sample
+        @return: the integral from the first sample to this one
+        """
+        x, y = float(x), float(y)
+        if self.number_of_samples > 0 and not x > self._last_samples[-1][0]:
+            raise ValueError(f"x-values must be increasing ({x} after {self._last_samples[-1][0]})")
+
+        self._last_samples.append((x, y))
+        if len(self._last_samples) > 3:
+            del self._last_samples[0]
+        if self.number_of_samples < 2:
+            self._first_samples.append((x, y))
+
+        if self.number_of_samples >= 1:
+            (x1, y1), (x2, y2) = self._last_samples[-2:]
+            self._trapezoid += (x2 - x1) * (y1 + y2) / 2
+        if self.number_of_samples >= 2:
+            (x0, y0), (x1, y1), (x2, y2) = self._last_samples
+            if self.number_of_samples % 2 == 0:
+                self._even_pairs += simpson_pair(x0, x1, x2, y0, y1, y2)
+            else:
+                self._odd_pairs += simpson_pair(x0, x1, x2, y0, y1, y2)
+
+        self.number_of_samples += 1
+        return self.result()
+
+
+    def extend(self, x: np.ndarray, y: np.ndarray) -> float:
+        """
+        extend is a method that adds a chunk of samples at once with vectorized rules (the same integral as calling add for
+            every sample). The last samples of the chunk before are carried over, so the intervals between chunks are counted
+        @param x: np.array of increasing x-values (timestamps), the first one greater than the x-value of the last sample
+        @param y: np.array of y-values
+        @return: the integral from the first sample to the last sample of the chunk
+        """
+        x, y = np.asarray(x, dtype=np.float64).ravel(), np.asarray(y, dtype=np.float64).ravel()
+        if len(x) != len(y):
+            raise ValueError("extend requires the same number of x-values and y-values")
+        if len(x) == 0:
+            return self.result()
+
+        # The chunk with the carried samples in front, the sample at index i is sample start + i of the whole integral
+        carried = len(self._last_samples)
+        start = self.number_of_samples - carried
+        all_x = np.concatenate(([sample[0] for sample in self._last_samples], x))
+        all_y = np.concatenate(([sample[1] for sample in self._last_samples], y))
+        if not np.all(np.diff(all_x) > 0):
+            raise ValueError("x-values must be increasing")
+
+        # Intervals and interval pairs that end at a new sample (the pairs alternate between starting at even and odd samples)
+        new = max(carried, 1)
+        self._trapezoid += float(np.dot(np.diff(all_x[new - 1:]), all_y[new - 1:-1] + all_y[new:]) / 2)
+        first_end = max(carried, 2)
+        if first_end < len(all_x):
+            pairs = simpson_pair(all_x[first_end - 2:-2], all_x[first_end - 1:-1], all_x[first_end:],
+                                 all_y[first_end - 2:-2], all_y[first_end - 1:-1], all_y[first_end:])
+            first_even = (start + first_end) % 2 # index of the first pair that starts at an even sample
+            self._even_pairs += float(np.sum(pairs[first_even::2]))
+            self._odd_pairs += float(np.sum(pairs[1 - first_even::2]))
+
+        if start == 0: # the first 2 samples are in this chunk (or carried from the chunk before)
+            self._first_samples = list(zip(all_x[:2].tolist(), all_y[:2].tolist()))
+        self._last_samples = list(zip(all_x[-3:].tolist(), all_y[-3:].tolist()))
+        self.number_of_samples += len(x)
+        return self.result()
+
+
+    def result(self) -> float:
+        """
+        result is a method that gets the integral of every sample added so far
+        @return: the integral from the first sample to the last one (0 with less than 2 samples)
+        """
+        if self.number_of_samples < 2:
+            return 0.0
+        if self.method == "trapezoid" or self.number_of_samples == 2:
+            return self._trapezoid
+        if self.number_of_samples % 2 == 1: # even number of intervals
+            return self._even_pairs
+
+        (x0, y0), (x1, y1), (x2, y2) = self._last_samples
+        first = self._even_pairs + (x2 - x1) * (y1 + y2) / 2
+        (first_x0, first_y0), (first_x1, first_y1) = self._first_samples
+        last = (first_x1 - first_x0) * (first_y0 + first_y1) / 2 + self._odd_pairs
+        if self.even == "first":
+            return first
+        if self.even == "last":
+            return last
+        if self.even == "avg":
+            return (first + last) / 2
+        return self._even_pairs + simpson_last_interval(x0, x1, x2, y0, y1, y2)
+
+
+    def get_state(self) -> dict:
+        """
+        get_state is a method that gets the state of the integrator as a dict of numbers and lists (json serializable), to
+            checkpoint it and continue later with restore
+        @return: dict of the state of the integrator
+        """
+        return {
+            "method": self.method,
+            "even": self.even,
+            "number_of_samples": self.number_of_samples,
+            "first_samples": [list(sample) for sample in self._first_samples],
+            "last_samples": [list(sample) for sample in self._last_samples],
+            "even_pairs": self._even_pairs,
+            "odd_pairs": self._odd_pairs,
+            "trapezoid": self._trapezoid,
+        }
+
+
+    @classmethod
+    def restore(cls, state: dict):
+        """
+        restore is a class method that makes an integrator from a state saved with get_state. Adding samples to it gives the
+            same integrals as adding them to the integrator the state was saved from
+        @param state: dict of the state of an integrator (from get_state)
+        @return: StreamingIntegrator object
+        """
+        missing = [key for key in cls.STATE_KEYS if key not in state]
+        if missing:
+            raise ValueError(f"state is missing {missing}")
+
+        integrator = cls(method=state.get("method", "simpson"), even=state.get("even", "simpson"))
+        integrator.number_of_samples = int(state["number_of_samples"])
+        integrator._first_samples = [tuple(map(float, sample)) for sample in state["first_samples"]]
+        integrator._last_samples = [tuple(map(float, sample)) for sample in state["last_samples"]]
+        integrator._even_pairs = float(state["even_pairs"])
+        integrator._odd_pairs = float(state["odd_pairs"])
+        integrator._trapezoid = float(state["trapezoid"])
+        return integrator
+
+
+
+
+if __name__ == "__main__":
+    import time
+    from scipy import integrate
+
+    # Benchmark: 1 hour of current samples at 100Hz with jittered timestamps
+    rng = np.random.default_rng(0)
+    timestamps = np.cumsum(rng.uniform(0.009, 0.011, 360000))
+    currents = 20 + 5 * np.sin(timestamps / 60) + rng.normal(0, 0.5, len(timestamps))
+
+    integrator = StreamingIntegrator()
+    t0 = time.perf_counter()
+    for timestamp, current in zip(timestamps.tolist(), currents.tolist()):
+        integrator.add(timestamp, current)
+    t1 = time.perf_counter()
+    print(f"{len(timestamps)} samples: {t1 - t0:.4f}s ({(t1 - t0) / len(timestamps) * 1e6:.2f}us per sample)")
+    print(f"integral: {integrator.result():.6f}, scipy.integrate.simpson: {integrate.simpson(currents, x=timestamps):.6f}")
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+from streaming_integrator import StreamingIntegrator
+
+
+
+
+SECONDS_PER_HOUR = 3600
+TELEMETRY_DTYPE = np.dtype([("timestamp", "<f8"), ("current", "<f4"), ("voltage", "<f4")]) # 1 record per sample
+DEFAULT_CHUNK_SIZE = 1000000
+
+
+def read_csv_chunks(filepath: str, columns: list, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    read_csv_chunks is a generator that reads a csv telemetry log chunk_size rows at a time, so only 1 chunk is in memory
+    @param filepath: path of the csv file (with a header row)
+    @param columns: list of the names of the columns to read
+    @param chunk_size: number of rows per chunk
+    @return: a dict of np.array per column for each chunk
+    """
+    for chunk in pd.read_csv(filepath, usecols=columns, chunksize=chunk_size, dtype={column: np.float64 for column in columns}):
+        yield {column: chunk[column].to_numpy() for column in columns}
+
+
+def read_binary_chunks(filepath: str, dtype: np.dtype = TELEMETRY_DTYPE, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       memory_map: bool = True, offset: int = 0):
+    """
+    read_binary_chunks is a generator that reads a binary telemetry log (fixed size records) chunk_size records at a time
+    - A .npy file uses the dtype and data offset of its header, any other file is raw records of dtype starting at offset
+    @param filepath: path of the binary file
+    @param dtype: numpy structured dtype of 1 record (ignored for .npy files)
+    @param chunk_size: number of records per chunk
+    @param memory_map: True to memory-map the file (chunks are views of the map, which the OS pages in and out), False to
+        read each chunk into memory with np.fromfile
+    @param offset: number of bytes before the first record (ignored for .npy files)
+    @return: a structured np.array of the records for each chunk
+    """
+    if os.path.splitext(filepath)[1] == ".npy":
+        header = np.load(filepath, mmap_mode="r") # only maps the file, to get the dtype and data offset from its header
+        if header.ndim != 1:
+            raise ValueError("a .npy telemetry log must be a 1d array of records")
+        dtype, offset = header.dtype, header.offset
+        del header
+
+    dtype = np.dtype(dtype)
+    number_of_records = (os.path.getsize(filepath) - offset) // dtype.itemsize
+    if number_of_records == 0:
+        return
+
+    if memory_map:
+        records = np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=(number_of_records,))
+        for start in range(0, number_of_records, chunk_size):
+            yield records[start:start + chunk_size]
+    else:
+        with open(filepath, "rb") as file:
+            file.seek(offset)
+            for start in range(0, number_of_records, chunk_size):
+                yield np.fromfile(file, dtype=dtype, count=min(chunk_size, number_of_records - start))
+
+
+class TelemetryIntegrator():
+
+
+    def __init__(self, method: str = "simpson", even: str = "simpson", time_scale: float = 1):
+        """
+        TelemetryIntegrator integrates the current of a telemetry log into amp-hours and the power (current * voltage) into
+            watt-hours, 1 chunk of samples at a time. Each chunk is integrated with vectorized rules and the last samples are
+            carried over to the next chunk (see StreamingIntegrator.extend), so the result is the same however the log is split
+        @param method: "simpson" (Simpson's rule) or "trapezoid" (trapezoidal rule)
+        @param even: what Simpson's rule does with an odd number of intervals (see StreamingIntegrator)
+        @param time_scale: number of seconds per timestamp unit (e.g. 0.001 for timestamps in milliseconds)
+        @return: TelemetryIntegrator object
+        """
+        self.time_scale = time_scale
+        self.charge = StreamingIntegrator(method=method, even=even)
+        self.energy = StreamingIntegrator(method=method, even=even)
+
+
+    def ingest(self, timestamps: np.ndarray, currents: np.ndarray, voltages: np.ndarray = None):
+        """
+        ingest is a method that integrates 1 chunk of samples
+        @param timestamps: np.array of increasing timestamps, after the timestamps of the chunk before
+        @param currents: np.array of the current (A) of each sample
+        @param voltages (optional): np.array of the voltage (V) of each sample, the watt-hours are not integrated if None
+        @return: None
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        currents = np.asarray(currents, dtype=np.float64)
+        self.charge.extend(timestamps, currents)
+        if voltages is not None:
+            self.energy.extend(timestamps, currents * np.asarray(voltages, dtype=np.float64))
+
+
+    @property
+    def number_of_samples(self) -> int:
+        return self.charge.number_of_samples
+
+
+    @property
+    def amp_hours(self) -> float:
+        return self.charge.result() * self.time_scale / SECONDS_PER_HOUR
+
+
+    @property
+    def watt_hours(self) -> float:
+        return self.energy.result() * self.time_scale / SECONDS_PER_HOUR
+
+
+    def get_state(self) -> dict:
+        """
+        get_state is a method that gets the state of the integrator (json serializable), to continue later with restore
+        @return: dict of the state of the integrator
+        """
+        return {"time_scale": self.time_scale, "charge": self.charge.get_state(), "energy": self.energy.get_state()}
+
+
+    @classmethod
+    def restore(cls, state: dict):
+        """
+        restore is a class method that makes an integrator from a state saved with get_state
+        @param state: dict of the state of an integrator (from get_state)
+        @return: TelemetryIntegrator object
+        """
+        integrator = cls(time_scale=state["time_scale"])
+        integrator.charge = StreamingIntegrator.restore(state["charge"])
+        integrator.energy = StreamingIntegrator.restore(state["energy"])
+        return integrator
+
+
+def integrate_log(filepath: str, time_column: str = "timestamp", current_column: str = "current",
+                  voltage_column: str = "voltage", chunk_size: int = DEFAULT_CHUNK_SIZE, method: str = "simpson",
+                  even: str = "simpson", time_scale: float = 1, memory_map: bool = True,
+                  dtype: np.dtype = TELEMETRY_DTYPE) -> dict:
+    """
+    integrate_log is a function that integrates a whole telemetry log (csv or binary) into amp-hours and watt-hours, reading
+        chunk_size samples at a time so the memory used does not depend on the length of the log
+    @param filepath: path of the log, a .csv file with a header row or a binary file (.npy or raw records of dtype)
+    @param time_column: name of the timestamp column (or field of dtype)
+    @param current_column: name of the current (A) column
+    @param voltage_column: name of the voltage (V) column, None if the log has no voltages (no watt-hours)
+    @param chunk_size: number of samples per chunk
+    @param method: "simpson" (Simpson's rule) or "trapezoid" (trapezoidal rule)
+    @param even: what Simpson's rule does with an odd number of intervals (see StreamingIntegrator)
+    @param time_scale: number of seconds per timestamp unit (e.g. 0.001 for timestamps in milliseconds)
+    @param memory_map: True to memory-map binary logs, False to read them chunk by chunk (csv logs are always read in chunks)
+    @param dtype: numpy structured dtype of 1 record of a raw binary log
+    @return: dict of the "amp_hours", "watt_hours" (nan without voltages), "number_of_samples" and "duration(s)" of the log
+    """
+    if os.path.splitext(filepath)[1] == ".csv":
+        columns = [column for column in [time_column, current_column, voltage_column] if column is not None]
+        chunks = read_csv_chunks(filepath, columns=columns, chunk_size=chunk_size)
+    else:
+        chunks = read_binary_chunks(filepath, dtype=dtype, chunk_size=chunk_size, memory_map=memory_map)
+
+    integrator = TelemetryIntegrator(method=method, even=even, time_scale=time_scale)
+    first_timestamp = last_timestamp = np.nan
+    for chunk in chunks:
+        timestamps = chunk[time_column]
+        if len(timestamps) == 0:
+            continue
+        integrator.ingest(timestamps, chunk[current_column], None if voltage_column is None else chunk[voltage_column])
+        first_timestamp = timestamps[0] if np.isnan(first_timestamp) else first_timestamp
+        last_timestamp = timestamps[-1]
+
+    return {
+        "amp_hours": integrator.amp_hours,
+        "watt_hours": integrator.watt_hours if voltage_column is not None else np.nan,
+        "number_of_samples": integrator.number_of_samples,
+        "duration(s)": float(last_timestamp - first_timestamp) * time_scale if integrator.number_of_samples > 0 else 0.0,
+    }
+
+
+
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    # Benchmark: a 20M sample binary log (~8 hours at ~700Hz, 320MB) and a 2M sample csv log
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        binary_filepath = os.path.join(directory, "telemetry.bin")
+        with open(binary_filepath, "wb") as file:
+            for start in range(0, 20000000, DEFAULT_CHUNK_SIZE):
+                records = np.empty(DEFAULT_CHUNK_SIZE, dtype=TELEMETRY_DTYPE)
+                records["timestamp"] = (start + np.arange(DEFAULT_CHUNK_SIZE)) * 0.0014 + rng.uniform(0, 0.0001, DEFAULT_CHUNK_SIZE)
+                records["current"] = 20 + rng.normal(0, 2, DEFAULT_CHUNK_SIZE)
+                records["voltage"] = 120 + rng.normal(0, 1, DEFAULT_CHUNK_SIZE)
+                records.tofile(file)
+
+        t0 = time.perf_counter()
+        binary_result = integrate_log(binary_filepath)
+        t1 = time.perf_counter()
+        print(f"binary log: {t1 - t0:.4f}s, {binary_result}")
+
+        csv_filepath = os.path.join(directory, "telemetry.csv")
+        pd.DataFrame(np.memmap(binary_filepath, dtype=TELEMETRY_DTYPE, mode="r")[:2000000]).to_csv(csv_filepath, index=False)
+        t0 = time.perf_counter()
+        csv_result = integrate_log(csv_filepath)
+        t1 = time.perf_counter()
+        print(f"csv log: {t1 - t0:.4f}s, {csv_result}")
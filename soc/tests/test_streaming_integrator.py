@@ -0,0 +1,110 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import json
+import pytest
+import numpy as np
+from scipy import integrate
+from streaming_integrator import StreamingIntegrator
+
+
+
+
+rng = np.random.default_rng(0)
+
+
+def irregular_samples(number_of_samples):
+    x = np.cumsum(rng.uniform(0.5, 1.5, number_of_samples))
+    y = np.sin(x / 10) + rng.normal(0, 0.1, number_of_samples)
+    return x, y
+
+
+def integrate_samples(integrator, x, y):
+    results = [integrator.add(x_value, y_value) for x_value, y_value in zip(x, y)]
+    return np.array(results)
+
+
+@pytest.mark.parametrize("even", ["avg", "first", "last"])
+def test_matches_scipy_simpson(even):
+    x, y = irregular_samples(101)
+    results = integrate_samples(StreamingIntegrator(even=even), x, y)
+    assert results[0] == 0
+    for number_of_samples in [2, 3, 4, 5, 50, 51, 100, 101]:
+        correct_result = integrate.simpson(y[:number_of_samples], x=x[:number_of_samples], even=even)
+        np.testing.assert_allclose(results[number_of_samples - 1], correct_result, rtol=1e-12)
+
+
+def test_matches_trapezoid():
+    x, y = irregular_samples(100)
+    results = integrate_samples(StreamingIntegrator(method="trapezoid"), x, y)
+    np.testing.assert_allclose(results[1:], integrate.cumulative_trapezoid(y, x=x), rtol=1e-12)
+
+
+def test_simpson_is_exact_for_quadratics():
+    x, _ = irregular_samples(20)
+    y = 3 * x ** 2 - 2 * x + 1
+    antiderivative = x ** 3 - x ** 2 + x
+    results = integrate_samples(StreamingIntegrator(), x, y)
+    np.testing.assert_allclose(results[2:], antiderivative[2:] - antiderivative[0], rtol=1e-9)
+
+
+def test_independent_instances():
+    x, y = irregular_samples(50)
+    pack, string = StreamingIntegrator(), StreamingIntegrator()
+    for x_value, y_value in zip(x, y):
+        pack.add(x_value, y_value)
+        string.add(x_value, 2 * y_value)
+    np.testing.assert_allclose(string.result(), 2 * pack.result())
+
+
+def test_checkpoint_restore():
+    x, y = irregular_samples(80)
+    integrator = StreamingIntegrator()
+    integrate_samples(integrator, x[:37], y[:37])
+    state = json.loads(json.dumps(integrator.get_state()))
+
+    restored = StreamingIntegrator.restore(state)
+    np.testing.assert_array_equal(integrate_samples(restored, x[37:], y[37:]), integrate_samples(integrator, x[37:], y[37:]))
+
+    with pytest.raises(ValueError):
+        StreamingIntegrator.restore({"number_of_samples": 3})
+
+
+def test_invalid_samples():
+    integrator = StreamingIntegrator()
+    integrator.add(1, 1)
+    with pytest.raises(ValueError):
+        integrator.add(1, 2)
+    with pytest.raises(ValueError):
+        integrator.add(0.5, 2)
+    with pytest.raises(ValueError):
+        StreamingIntegrator(method="midpoint")
+
+
+def test_reset():
+    integrator = StreamingIntegrator()
+    integrate_samples(integrator, *irregular_samples(10))
+    integrator.reset()
+    assert integrator.result() == 0 and integrator.number_of_samples == 0
+    assert integrator.add(0, 1) == 0
+
+
+@pytest.mark.parametrize("method, even", [("simpson", "simpson"), ("simpson", "avg"), ("simpson", "first"), ("simpson", "last"), ("trapezoid", "simpson")])
+def test_extend_matches_add(method, even):
+    x, y = irregular_samples(300)
+    integrator = StreamingIntegrator(method=method, even=even)
+    integrate_samples(integrator, x, y)
+
+    for chunk_sizes in [[1, 1, 1, 2], [2, 1, 3], [7], [300]]:
+        chunked_integrator = StreamingIntegrator(method=method, even=even)
+        start, chunk = 0, 0
+        while start < len(x):
+            end = start + chunk_sizes[chunk % len(chunk_sizes)]
+            chunked_integrator.extend(x[start:end], y[start:end])
+            start, chunk = end, chunk + 1
+        np.testing.assert_allclose(chunked_integrator.result(), integrator.result(), rtol=1e-12)
+        assert chunked_integrator.get_state()["last_samples"] == integrator.get_state()["last_samples"]
+
+    with pytest.raises(ValueError):
+        integrator.extend([x[-1], x[-1] + 1], [0, 0])
@@ -0,0 +1,84 @@
+import sys
+import os.path
+sys.path.append(os.path.dirname(sys.path[0]))
+
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from scipy import integrate
+from telemetry_log import TELEMETRY_DTYPE, TelemetryIntegrator, integrate_log, read_binary_chunks
+
+
+
+
+rng = np.random.default_rng(0)
+number_of_samples = 10001
+records = np.empty(number_of_samples, dtype=TELEMETRY_DTYPE)
+records["timestamp"] = np.cumsum(rng.uniform(0.05, 0.15, number_of_samples))
+records["current"] = 20 + 5 * np.sin(records["timestamp"] / 60) + rng.normal(0, 0.5, number_of_samples)
+records["voltage"] = 120 + rng.normal(0, 1, number_of_samples)
+
+timestamps = records["timestamp"].astype(np.float64)
+currents = records["current"].astype(np.float64)
+powers = currents * records["voltage"].astype(np.float64)
+correct_amp_hours = integrate.simpson(currents, x=timestamps) / 3600 # odd number of samples, so every even option is the same
+correct_watt_hours = integrate.simpson(powers, x=timestamps) / 3600
+
+
+@pytest.fixture
+def log_files(tmp_path):
+    raw_filepath = str(tmp_path / "telemetry.bin")
+    records.tofile(raw_filepath)
+    npy_filepath = str(tmp_path / "telemetry.npy")
+    np.save(npy_filepath, records)
+    csv_filepath = str(tmp_path / "telemetry.csv")
+    pd.DataFrame({"timestamp": timestamps, "current": currents, "voltage": records["voltage"].astype(np.float64)}).to_csv(csv_filepath, index=False)
+    return {"raw": raw_filepath, "npy": npy_filepath, "csv": csv_filepath}
+
+
+@pytest.mark.parametrize("file_type", ["raw", "npy", "csv"])
+@pytest.mark.parametrize("chunk_size", [1, 777, 100000])
+def test_integrate_log(log_files, file_type, chunk_size):
+    if chunk_size == 1 and file_type == "csv":
+        pytest.skip("1 row chunks of a csv are very slow")
+    result = integrate_log(log_files[file_type], chunk_size=chunk_size)
+    np.testing.assert_allclose(result["amp_hours"], correct_amp_hours, rtol=1e-10)
+    np.testing.assert_allclose(result["watt_hours"], correct_watt_hours, rtol=1e-10)
+    assert result["number_of_samples"] == number_of_samples
+    np.testing.assert_allclose(result["duration(s)"], timestamps[-1] - timestamps[0])
+
+
+def test_integrate_log_options(log_files):
+    result = integrate_log(log_files["raw"], chunk_size=1000, memory_map=False, method="trapezoid", voltage_column=None)
+    np.testing.assert_allclose(result["amp_hours"], np.trapz(currents, timestamps) / 3600, rtol=1e-10)
+    assert np.isnan(result["watt_hours"])
+
+    result = integrate_log(log_files["raw"], time_scale=1000) # timestamps in kiloseconds
+    np.testing.assert_allclose(result["amp_hours"], correct_amp_hours * 1000, rtol=1e-10)
+
+
+def test_read_binary_chunks(log_files):
+    for memory_map in [True, False]:
+        chunks = list(read_binary_chunks(log_files["npy"], chunk_size=3000, memory_map=memory_map))
+        assert [len(chunk) for chunk in chunks] == [3000, 3000, 3000, 1001]
+        np.testing.assert_array_equal(np.concatenate(chunks), records)
+
+
+def test_constant_current():
+    integrator = TelemetryIntegrator()
+    for start in range(0, 3600, 100):
+        chunk_timestamps = np.arange(start, start + 100, dtype=np.float64)
+        integrator.ingest(chunk_timestamps, np.full(100, 10.0), np.full(100, 100.0))
+    integrator.ingest([3600.0], [10.0], [100.0])
+    np.testing.assert_allclose(integrator.amp_hours, 10)
+    np.testing.assert_allclose(integrator.watt_hours, 1000)
+
+
+def test_checkpoint_restore():
+    integrator = TelemetryIntegrator()
+    integrator.ingest(timestamps[:5000], currents[:5000], records["voltage"][:5000])
+    restored = TelemetryIntegrator.restore(json.loads(json.dumps(integrator.get_state())))
+    restored.ingest(timestamps[5000:], currents[5000:], records["voltage"][5000:])
+    np.testing.assert_allclose(restored.amp_hours, correct_amp_hours, rtol=1e-10)
+    np.testing.assert_allclose(restored.watt_hours, correct_watt_hours, rtol=1e-10)